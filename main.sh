@@ -1,7 +1,5 @@
 #!/usr/bin/env bash
 set -e
 
-uv run python src/main.py
-cd public
-python3 -m http.server 8888
-
+# build, serve docs/ on :8888 and rebuild + reload the browser on every save
+uv run python src/main.py serve --watch --port 8888
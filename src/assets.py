@@ -0,0 +1,131 @@
+import errno
+import os
+import shutil
+
+import instrument
+from manifest import hash_file
+
+LINK_MODES = ("auto", "hardlink", "reflink", "copy")
+
+# FICLONE from linux/fs.h: share the source's extents (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+# fast paths that already failed with "not supported" in this process
+_unsupported = set()
+
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EOPNOTSUPP}
+
+
+def iter_files(root: str):
+    # (path, stat) for every file below root, using one scandir per directory
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path, entry.stat()
+
+
+def _reflink(src: str, dest: str) -> None:
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdest:
+        fcntl.ioctl(fdest.fileno(), _FICLONE, fsrc.fileno())
+
+
+def _copy_file_range(src: str, dest: str) -> None:
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdest:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def place_file(src: str, dest: str, link_mode: str = "auto") -> str:
+    # put a copy of src at dest with the cheapest method the filesystem allows;
+    # returns the method used
+    if os.path.lexists(dest):
+        os.remove(dest)
+
+    if link_mode == "hardlink":
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+
+    if link_mode != "copy":
+        methods = [("reflink", _reflink)]
+        if hasattr(os, "copy_file_range"):
+            methods.append(("copy_file_range", _copy_file_range))
+
+        for name, method in methods:
+            if name in _unsupported:
+                continue
+            try:
+                method(src, dest)
+                shutil.copymode(src, dest)
+                return name
+            except OSError as e:
+                if e.errno not in _FALLBACK_ERRNOS:
+                    raise
+                _unsupported.add(name)
+
+    shutil.copyfile(src, dest)
+    shutil.copymode(src, dest)
+    return "copy"
+
+
+def _is_unchanged(entry: dict | None, st: os.stat_result, src: str, dest: str, verify_hash: bool) -> bool:
+    if entry is None or not os.path.exists(dest):
+        return False
+    if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        return True
+    # the stat changed (touch, checkout); with verify_hash compare contents too
+    if verify_hash and entry.get("size") == st.st_size and entry.get("hash"):
+        return hash_file(src) == entry["hash"]
+    return False
+
+
+def sync_assets(static_dir: str, dest_dir: str, manifest, verify_hash: bool = False, link_mode: str = "auto") -> None:
+    # copy only new or changed files from static_dir, drop outputs of removed
+    # ones, and leave everything else in dest_dir (generated pages) alone
+    tracer = instrument.tracer
+    created = set()
+
+    for src, st in iter_files(static_dir):
+        dest = os.path.join(dest_dir, os.path.relpath(src, static_dir))
+        entry = manifest.entry("static", src)
+
+        if _is_unchanged(entry, st, src, dest, verify_hash):
+            digest = entry.get("hash")
+            if entry.get("mtime_ns") != st.st_mtime_ns:
+                # same content under a new mtime: remember the new stat
+                manifest.record("static", src, digest, [dest], size=st.st_size, mtime_ns=st.st_mtime_ns)
+            else:
+                manifest.keep("static", src)
+            tracer.count("static_unchanged")
+            continue
+
+        parent = os.path.dirname(dest)
+        if parent not in created:
+            os.makedirs(parent, exist_ok=True)
+            created.add(parent)
+
+        with tracer.span("copy", path=src):
+            method = place_file(src, dest, link_mode)
+        tracer.debug(f"Copying file ({method}): {src} -> {dest}")
+        tracer.count("static_copied")
+        tracer.count("bytes_copied", st.st_size)
+
+        digest = hash_file(src) if verify_hash else None
+        manifest.record("static", src, digest, [dest], size=st.st_size, mtime_ns=st.st_mtime_ns)
+
+    for output in manifest.prune("static", dest_dir):
+        tracer.debug(f"Removing stale file: {output}")
+        tracer.count("outputs_removed")
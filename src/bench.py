@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from blocks import BlockType, block_to_block_type
+from converter import RENDERERS, markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+from generate_page import extract_title
+from template import compile_template
+
+SHAPES = ("paragraphs", "links", "lists", "code", "mixed")
+STAGES = (
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_textnodes",
+    "markdown_to_html_node",
+    "to_html",
+    "template",
+    "write",
+)
+# the stages a real build runs per page; the first three are timed on their
+# own as a breakdown of markdown_to_html_node
+PIPELINE = ("markdown_to_html_node", "to_html", "template", "write")
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head>
+  <body><article>{{ Content }}</article></body>
+</html>
+"""
+
+WORDS = (
+    "elf hobbit ring wizard mountain river forest tower sword song shadow light "
+    "road journey council fellowship king steward dragon gold map door"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _paragraph(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(3, 6)):
+        parts.append(_sentence(rng, rng.randint(6, 14)))
+        if rng.random() < 0.3:
+            parts.append(f"**{_sentence(rng, 2)}**")
+        if rng.random() < 0.3:
+            parts.append(f"_{_sentence(rng, 2)}_")
+    return " ".join(parts) + "."
+
+
+def _link_paragraph(rng: random.Random) -> str:
+    parts = []
+    for i in range(rng.randint(20, 60)):
+        parts.append(f"[{_sentence(rng, 2)}](/pages/{rng.randint(0, 999)}) {_sentence(rng, 3)}")
+        if i % 10 == 0:
+            parts.append(f"![{_sentence(rng, 2)}](/images/{rng.randint(0, 99)}.png)")
+    return " ".join(parts)
+
+
+def _deep_list(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return "\n".join(f"- {_sentence(rng, 5)} `item {i}`" for i in range(rng.randint(20, 80)))
+    return "\n".join(f"{i + 1}. {_sentence(rng, 5)} **step**" for i in range(rng.randint(20, 80)))
+
+
+def _code_block(rng: random.Random) -> str:
+    lines = [f"    value_{i} = compute('{rng.choice(WORDS)}', {i})" for i in range(rng.randint(40, 200))]
+    return "```\ndef generated():\n" + "\n".join(lines) + "\n```"
+
+
+BLOCK_MAKERS = {
+    "paragraphs": (_paragraph,),
+    "links": (_link_paragraph,),
+    "lists": (_deep_list,),
+    "code": (_code_block,),
+    "mixed": (_paragraph, _link_paragraph, _deep_list, _code_block),
+}
+
+
+def synthetic_markdown(shape: str, index: int, rng: random.Random, blocks: int) -> str:
+    makers = BLOCK_MAKERS[shape]
+    parts = [f"# {shape.title()} page {index}"]
+    for i in range(blocks):
+        if i % 7 == 3:
+            parts.append(f"## Section {i}")
+        parts.append(makers[i % len(makers)](rng))
+    return "\n\n".join(parts)
+
+
+def generate_corpus(shape: str, pages: int, blocks: int, seed: int) -> list[str]:
+    rng = random.Random(f"{seed}:{shape}")
+    return [synthetic_markdown(shape, i, rng, blocks) for i in range(pages)]
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_shape(shape: str, corpus: list[str], out_dir: str, renderer: str = "direct") -> dict:
+    clock = time.perf_counter
+    template = compile_template(TEMPLATE, "/")
+    totals = dict.fromkeys(STAGES, 0.0)
+    latencies = []
+    bytes_written = 0
+
+    for i, markdown in enumerate(corpus):
+        t0 = clock()
+        blocks = markdown_to_blocks(markdown)
+        t1 = clock()
+        types = [block_to_block_type(block) for block in blocks]
+        t2 = clock()
+        for block, btype in zip(blocks, types):
+            if btype is not BlockType.CODE:
+                text_to_textnodes(block)
+        t3 = clock()
+        node = markdown_to_html_node(markdown, renderer=RENDERERS[renderer])
+        t4 = clock()
+        content = node.to_html()
+        t5 = clock()
+        page = template.render({"Title": extract_title(markdown), "Content": content})
+        t6 = clock()
+        with open(os.path.join(out_dir, f"{shape}-{i}.html"), "w", encoding="utf-8") as f:
+            bytes_written += f.write(page)
+        t7 = clock()
+
+        for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t6 - t5, t7 - t6)):
+            totals[stage] += elapsed
+        latencies.append(t7 - t3)
+
+    pipeline = sum(totals[stage] for stage in PIPELINE)
+    return {
+        "pages": len(corpus),
+        "input_bytes": sum(len(markdown) for markdown in corpus),
+        "output_bytes": bytes_written,
+        "pages_per_sec": len(corpus) / pipeline if pipeline else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "stages_ms": {stage: totals[stage] * 1000 for stage in STAGES},
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    # a shape regresses when throughput drops or p99 grows by more than tolerance
+    regressions = []
+    for shape, current in results["shapes"].items():
+        previous = baseline.get("shapes", {}).get(shape)
+        if previous is None:
+            continue
+        if current["pages_per_sec"] < previous["pages_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{shape}: pages/sec {previous['pages_per_sec']:.1f} -> {current['pages_per_sec']:.1f}"
+            )
+        if current["p99_ms"] > previous["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{shape}: p99 {previous['p99_ms']:.2f} ms -> {current['p99_ms']:.2f} ms")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    print(f"{'shape':<11} {'pages':>6} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8}   stage ms")
+    for shape, r in results["shapes"].items():
+        stages = " ".join(f"{stage}={ms:.0f}" for stage, ms in r["stages_ms"].items())
+        print(f"{shape:<11} {r['pages']:>6} {r['pages_per_sec']:>9.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}   {stages}")
+    print(f"peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="main.py bench", description="Benchmark the render pipeline.")
+    parser.add_argument("--pages", type=int, default=200, help="pages per shape (default 200)")
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page (default 20)")
+    parser.add_argument("--shape", action="append", choices=SHAPES, help="shape to run; repeatable (default all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--renderer",
+        choices=sorted(RENDERERS),
+        default="direct",
+        help="renderer backend to time; the build uses direct (default direct)",
+    )
+    parser.add_argument("--output", metavar="FILE", help="write JSON results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against JSON results in FILE")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="allowed relative slowdown against the baseline (default 0.10)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    shapes = args.shape or list(SHAPES)
+
+    results = {
+        "python": platform.python_version(),
+        "pages": args.pages,
+        "blocks": args.blocks,
+        "seed": args.seed,
+        "renderer": args.renderer,
+        "shapes": {},
+    }
+    with tempfile.TemporaryDirectory() as out_dir:
+        for shape in shapes:
+            corpus = generate_corpus(shape, args.pages, args.blocks, args.seed)
+            results["shapes"][shape] = bench_shape(shape, corpus, out_dir, args.renderer)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        # baselines from before --renderer existed were timed with tree
+        if baseline.get("renderer", "tree") != args.renderer:
+            print(f"note: {args.baseline} was timed with the {baseline.get('renderer', 'tree')} renderer")
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,72 @@
+import argparse
+import gc
+import random
+import time
+
+from bench import generate_corpus
+from blocks import scan_blocks
+from converter import markdown_to_html_node
+
+
+def legacy_blocks(markdown):
+    # what markdown_to_blocks + block_to_block_type + markdown_to_html_node did
+    # before the scanner: split on blank lines, then split every block into
+    # lines again for each check and once more to render it
+    blocks = [b.strip() for b in markdown.split("\n\n") if b.strip()]
+    result = []
+    for block in blocks:
+        lines = block.split("\n")
+        if block.startswith("```\n") and block.endswith("\n```"):
+            kind = "code"
+        elif all(line.strip().startswith(">") for line in lines if line.strip() != ""):
+            kind = "quote"
+        elif all(line.startswith("- ") for line in lines):
+            kind = "unordered_list"
+        elif all(line.startswith(f"{i}. ") for i, line in enumerate(lines, 1)):
+            kind = "ordered_list"
+        else:
+            kind = "paragraph"
+        result.append((kind, block.split("\n")))
+    return result
+
+
+def document(size_mb: float, seed: int) -> str:
+    parts = []
+    total = 0
+    pages = generate_corpus("mixed", 50, 20, seed)
+    rng = random.Random(seed)
+    while total < size_mb * 2**20:
+        page = rng.choice(pages)
+        parts.append(page)
+        total += len(page) + 2
+    return "\n\n".join(parts)
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block scanning on large documents.")
+    parser.add_argument("--sizes", default="1,4,16", help="comma separated document sizes in MB")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'MB':>5} {'split+classify s':>17} {'scan_blocks s':>14} {'speedup':>8} {'full render MB/s':>17}")
+    for size in (float(s) for s in args.sizes.split(",")):
+        markdown = document(size, args.seed)
+        mb = len(markdown) / 2**20
+        legacy = timed(legacy_blocks, markdown)
+        scanned = timed(lambda text: list(scan_blocks(text.split("\n"))), markdown)
+        render = timed(markdown_to_html_node, markdown, repeat=1)
+        print(f"{mb:>5.1f} {legacy:>17.3f} {scanned:>14.3f} {legacy / scanned:>7.2f}x {mb / render:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
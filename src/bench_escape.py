@@ -0,0 +1,100 @@
+import argparse
+import gc
+import html
+import time
+
+import converter
+import htmlnode
+from bench import generate_corpus
+from converter import RENDERERS, markdown_to_html_node
+from htmlnode import attrs_to_html, escape_text
+
+_NAIVE = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+_TABLE = str.maketrans(_NAIVE)
+
+
+def naive_escape(text):
+    # a per-character loop
+    return "".join(_NAIVE.get(char, char) for char in text)
+
+
+def translate_escape(text):
+    # a translate table: simple, but slow once a character must be replaced
+    return text.translate(_TABLE)
+
+
+def per_call(func, args, repeat):
+    # best time of one call to func(arg), averaged over args
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for arg in args:
+            func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best / len(args)
+
+
+def render_times(pages, renderer, repeat):
+    # best time to render pages with escaping and with the escapers swapped
+    # for no-ops; runs alternate so both see the same machine load
+    def render():
+        start = time.perf_counter()
+        for page in pages:
+            markdown_to_html_node(page, renderer=renderer).to_html()
+        return time.perf_counter() - start
+
+    escaped = unescaped = float("inf")
+    saved = (converter.escape_text, htmlnode.escape_text, htmlnode.escape_attr)
+    for _ in range(repeat):
+        gc.collect()
+        escaped = min(escaped, render())
+        converter.escape_text = htmlnode.escape_text = htmlnode.escape_attr = str
+        htmlnode._serialize_attrs.cache_clear()
+        try:
+            gc.collect()
+            unescaped = min(unescaped, render())
+        finally:
+            converter.escape_text, htmlnode.escape_text, htmlnode.escape_attr = saved
+            htmlnode._serialize_attrs.cache_clear()
+    return escaped, unescaped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of HTML escaping and attribute serialization.")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    plain = ["see the fellowship set out from Rivendell %d" % i for i in range(1000)]
+    marked = ["if a < b && c > d then <stop> %d" % i for i in range(1000)]
+    print(f"{'escape':>18} {'plain ns':>9} {'escaped ns':>11}")
+    escapers = (
+        ("escape_text", escape_text),
+        ("str.translate", translate_escape),
+        ("html.escape", html.escape),
+        ("per-character", naive_escape),
+    )
+    for name, func in escapers:
+        print(
+            f"{name:>18} {per_call(func, plain, args.repeat) * 1e9:>9.0f} "
+            f"{per_call(func, marked, args.repeat) * 1e9:>11.0f}"
+        )
+
+    # the same few image and link props over and over, as on a real site
+    props = [{"src": f"/images/{i % 20}.png", "alt": "image", "width": "40", "height": "20"} for i in range(1000)]
+    uncached = htmlnode._serialize_attrs.__wrapped__
+    print(f"\n{'attributes':>18} {'ns/call':>9}")
+    print(f"{'cached':>18} {per_call(attrs_to_html, props, args.repeat) * 1e9:>9.0f}")
+    print(f"{'uncached':>18} {per_call(lambda p: uncached(tuple(p.items())), props, args.repeat) * 1e9:>9.0f}")
+
+    # whole pages, with the escapers swapped for no-ops to isolate their share
+    pages = generate_corpus("mixed", args.pages, 40, 0)
+    mb = sum(map(len, pages)) / 2**20
+    print(f"\n{'renderer':>18} {'MB/s':>9} {'unescaped':>10} {'overhead':>9}")
+    for name in sorted(RENDERERS):
+        escaped, unescaped = render_times(pages, RENDERERS[name], args.repeat)
+        print(f"{name:>18} {mb / escaped:>9.2f} {mb / unescaped:>10.2f} {escaped / unescaped - 1:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import time
+
+from delimiter import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from inline import tokenize_inline
+from textnode import TextNode, TextType
+
+
+def five_pass(text):
+    # the pipeline text_to_textnodes used before the single-pass tokenizer
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+
+def link_paragraph(links: int) -> str:
+    parts = []
+    for i in range(links):
+        parts.append(f"see [link number {i}](/pages/{i}) and **bold {i}** with `code` and")
+    return " ".join(parts)
+
+
+def best_of(func, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline tokenizer scaling on link-heavy paragraphs.")
+    parser.add_argument("--sizes", default="100,200,400,800,1600,3200", help="comma separated link counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'links':>7} {'five-pass ms':>13} {'us/link':>8} {'one-pass ms':>12} {'us/link':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        text = link_paragraph(size)
+        old = best_of(five_pass, text, args.repeat)
+        new = best_of(tokenize_inline, text, args.repeat)
+        print(f"{size:>7} {old * 1e3:>13.2f} {old / size * 1e6:>8.2f} {new * 1e3:>12.2f} {new / size * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
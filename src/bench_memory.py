@@ -0,0 +1,112 @@
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import converter
+import inline
+
+
+def synthetic_page(i: int) -> str:
+    return "\n\n".join(
+        [
+            f"# Page {i}",
+            f"Intro with **bold {i}**, _italic_, `code` and a [link](/pages/{i % 97}).",
+            "\n".join(f"- item {j} with [ref](/ref/{j}) and **b**" for j in range(8)),
+            "\n".join(f"{j + 1}. step {j} _detail_" for j in range(6)),
+            "> quoted line one\n> quoted **line** two",
+            "```\nfor x in range(10):\n    print(x)\n```",
+            " ".join(f"word{j} **w{j}**" for j in range(40)),
+        ]
+    )
+
+
+def use_dict_nodes():
+    # swap in dict-backed stand-ins for the pre-__slots__ node classes
+    class TextNode:
+        def __init__(self, text, text_type, url=None):
+            self.text = text
+            self.text_type = text_type
+            self.url = url
+
+    class LeafNode:
+        def __init__(self, tag, value, props=None):
+            self.tag = tag
+            self.value = value
+            self.children = None
+            self.props = props
+
+    class ParentNode:
+        def __init__(self, tag, children, props=None):
+            self.tag = tag
+            self.value = None
+            self.children = children
+            self.props = props
+
+    inline.TextNode = TextNode
+    converter.TextNode = TextNode
+    converter.LeafNode = LeafNode
+    converter.ParentNode = ParentNode
+
+
+def measure(variant: str, pages: int) -> dict:
+    if variant == "dict":
+        use_dict_nodes()
+
+    corpus = [synthetic_page(i) for i in range(pages)]
+
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    trees = [converter.markdown_to_html_node(markdown) for markdown in corpus]
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sys.getallocatedblocks() - blocks_before
+    tracemalloc.stop()
+
+    return {
+        "variant": variant,
+        "pages": len(trees),
+        "seconds": elapsed,
+        "bytes_per_page": current / pages,
+        "allocations_per_page": blocks / pages,
+        "traced_peak_mb": peak / 2**20,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Node memory use on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--variant", choices=["slots", "dict"], help="measure one variant in this process")
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(measure(args.variant, args.pages)))
+        return
+
+    # each variant runs in a fresh interpreter so peak RSS is not shared
+    results = []
+    for variant in ("dict", "slots"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, "--pages", str(args.pages)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(out))
+
+    print(f"{'variant':<8} {'pages':>7} {'KiB/page':>9} {'allocs/page':>12} {'traced peak MB':>15} {'peak RSS MB':>12} {'seconds':>8}")
+    for r in results:
+        print(
+            f"{r['variant']:<8} {r['pages']:>7} {r['bytes_per_page'] / 1024:>9.1f} {r['allocations_per_page']:>12.0f}"
+            f" {r['traced_peak_mb']:>15.1f} {r['peak_rss_mb']:>12.1f} {r['seconds']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
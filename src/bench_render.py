@@ -0,0 +1,45 @@
+import argparse
+import gc
+import time
+
+from bench import SHAPES, generate_corpus
+from converter import RENDERERS, markdown_to_html_node
+
+
+def render_all(pages, renderer):
+    return [markdown_to_html_node(page, renderer=renderer).to_html() for page in pages]
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the renderer backends, page shape by page shape.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backends = sorted(RENDERERS)
+    print(f"{'shape':>10} {'MB':>6} " + " ".join(f"{name + ' MB/s':>12}" for name in backends) + f" {'speedup':>8}")
+    for shape in SHAPES:
+        pages = generate_corpus(shape, args.pages, args.blocks, args.seed)
+        mb = sum(map(len, pages)) / 2**20
+        outputs = [render_all(pages, RENDERERS[name]) for name in backends]
+        if any(output != outputs[0] for output in outputs):
+            raise SystemExit(f"{shape}: the backends render different HTML")
+        rates = {name: mb / timed(render_all, pages, RENDERERS[name], repeat=args.repeat) for name in backends}
+        speedup = rates["direct"] / rates["tree"]
+        print(f"{shape:>10} {mb:>6.2f} " + " ".join(f"{rates[name]:>12.2f}" for name in backends) + f" {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
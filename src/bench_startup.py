@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# cumulative import time of the CLI module, in seconds; test_startup holds
+# main to it so a stray top-level import of a heavy module gets noticed
+STARTUP_BUDGET = 0.25
+# the optional stages and the modules only they need; importing main must not load them
+DEFERRED_MODULES = (
+    "search",
+    "shard",
+    "compress",
+    "pipeline",
+    "parallel",
+    "listings",
+    "serve",
+    "bench",
+    "asyncio",
+    "concurrent.futures",
+    "multiprocessing",
+    "gzip",
+    "brotli",
+    "PIL",
+    "pathlib",
+)
+
+_SRC = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_profile(module: str = "main") -> dict:
+    # import module in a fresh interpreter under -X importtime
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"],
+        cwd=_SRC,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    # "import time:  self [us] | cumulative | imported package", one line per module
+    times = {}
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[0].strip().isdigit():
+            times[fields[2].strip()] = (int(fields[0]) / 1e6, int(fields[1]) / 1e6)
+    return {"seconds": times[module][1], "times": times, "modules": json.loads(result.stdout)}
+
+
+def measure(module: str, runs: int) -> dict:
+    profiles = [import_profile(module) for _ in range(runs)]
+    loaded = set(profiles[-1]["modules"])
+    return {
+        "module": module,
+        "runs": runs,
+        "median_seconds": statistics.median(p["seconds"] for p in profiles),
+        "min_seconds": min(p["seconds"] for p in profiles),
+        "deferred_loaded": [m for m in DEFERRED_MODULES if m in loaded],
+        "times": profiles[-1]["times"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the site generator CLI.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list, by self time")
+    args = parser.parse_args()
+
+    r = measure(args.module, args.runs)
+    print(f"import {r['module']}: median {r['median_seconds'] * 1000:.1f} ms, min {r['min_seconds'] * 1000:.1f} ms over {r['runs']} runs (budget {STARTUP_BUDGET * 1000:.0f} ms)")
+    print(f"deferred modules loaded: {', '.join(r['deferred_loaded']) or 'none'}")
+    print(f"{'module':<32} {'self ms':>8} {'cumulative ms':>14}")
+    slowest = sorted(r["times"].items(), key=lambda item: item[1][0], reverse=True)[: args.top]
+    for name, (own, cumulative) in slowest:
+        print(f"{name:<32} {own * 1000:>8.2f} {cumulative * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from enum import Enum
 
+__all__ = ["BlockType", "Block", "heading_level", "classify_lines", "block_to_block_type", "scan_blocks"]
+
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
     HEADING = "heading"
@@ -9,38 +11,125 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
-def block_to_block_type(block):
-    lines = block.split("\n")
-    if block.startswith("```\n") and block.endswith("\n```"):
-        return BlockType.CODE
+class Block:
+    # A typed block from scan_blocks: its lines without newlines and the
+    # 1-based source line number of the first one.
+    __slots__ = ("block_type", "lines", "lineno")
 
-    if block.startswith("#"):
-        i = 0
-        while i < len(block) and block[i] == "#":
-            i += 1
+    def __init__(self, block_type, lines, lineno):
+        self.block_type = block_type
+        self.lines = lines
+        self.lineno = lineno
 
-        if 1 <= i <= 6 and i < len(block) and block[i] == " ":
-            return BlockType.HEADING
-    
-    if all(line.strip().startswith(">") for line in lines if line.strip() != ""):
-        return BlockType.QUOTE
+    @property
+    def text(self):
+        return "\n".join(self.lines)
 
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.UNORDERED_LIST
-    expected = 1
-    is_ordered = True
+    def __repr__(self):
+        return f"Block({self.block_type}, {self.lines}, {self.lineno})"
 
-    for line in lines:
-        prefix = f"{expected}. "
-        if not line.startswith(prefix):
-            is_ordered = False
-            break
 
-        expected += 1
+def heading_level(line):
+    # 1-6 for "# " .. "###### ", otherwise 0
+    i = 0
+    while i < len(line) and line[i] == "#":
+        i += 1
+    if 1 <= i <= 6 and i < len(line) and line[i] == " ":
+        return i
+    return 0
+
 
+def classify_lines(lines):
+    if len(lines) >= 2 and lines[0].startswith("```") and lines[-1].endswith("```"):
+        return BlockType.CODE
+
+    first = lines[0]
+    if heading_level(first):
+        return BlockType.HEADING
+
+    # most blocks are paragraphs, and the first line alone rules out the rest
+    if not (first.startswith(("- ", "1. ")) or first.lstrip().startswith(">")):
+        return BlockType.PARAGRAPH
+
+    # one pass that keeps every remaining candidate alive until a line rules it out
+    is_quote = is_unordered = is_ordered = True
+    for number, line in enumerate(lines, 1):
+        if is_quote:
+            stripped = line.strip()
+            if stripped and not stripped.startswith(">"):
+                is_quote = False
+        if is_unordered and not line.startswith("- "):
+            is_unordered = False
+        if is_ordered and not line.startswith(f"{number}. "):
+            is_ordered = False
+        if not (is_quote or is_unordered or is_ordered):
+            return BlockType.PARAGRAPH
+
+    if is_quote:
+        return BlockType.QUOTE
+    if is_unordered:
+        return BlockType.UNORDERED_LIST
     if is_ordered:
         return BlockType.ORDERED_LIST
-
     return BlockType.PARAGRAPH
-            
 
+
+def block_to_block_type(block):
+    return classify_lines(block.split("\n"))
+
+
+def _make_block(lines, lineno):
+    # blocks are trimmed like markdown_to_blocks always did: leading space of
+    # the first line and trailing space of the last
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return Block(classify_lines(lines), lines, lineno)
+
+
+def scan_blocks(lines):
+    # Single pass over an iterable of lines (a list, or an open file) that
+    # yields Blocks separated by blank lines. A block opening with ``` runs to
+    # its closing fence, blank lines included.
+    current = []
+    start = 0
+    fenced = False
+
+    for lineno, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+
+        if fenced:
+            # cheap substring test first: most code lines hold no fence at all
+            if "```" in line and line.strip().startswith("```"):
+                current.append(line.strip())
+                yield Block(BlockType.CODE, current, start)
+                current = []
+                fenced = False
+            else:
+                current.append(line)
+            continue
+
+        if not line or line.isspace():
+            if current:
+                yield _make_block(current, start)
+                current = []
+            continue
+
+        if not current:
+            start = lineno
+            opening = line.strip()
+            # an info string may not contain backticks, so ```x``` is inline code
+            if opening.startswith("```") and "`" not in opening[3:]:
+                current.append(opening)
+                fenced = True
+                continue
+        current.append(line)
+
+    if fenced:
+        # an unclosed fence runs to the end of the document, less the blank
+        # lines after its last line: a file read line by line has no "" after
+        # its final newline, where markdown.split("\n") has one
+        while len(current) > 1 and (not current[-1] or current[-1].isspace()):
+            current.pop()
+        yield Block(BlockType.CODE, current, start)
+    elif current:
+        yield _make_block(current, start)
@@ -0,0 +1,130 @@
+import os
+
+import instrument
+from assets import iter_files
+from manifest import hash_file
+
+COMPRESSIBLE = (".html", ".css", ".js", ".svg")
+COMPRESS_LEVEL = 9
+# smaller files barely shrink and a compressed response saves nothing
+COMPRESS_MIN_SIZE = 1024
+# below this much stale input, starting worker processes costs more than
+# they save (the pool takes 10-20 ms to start)
+PARALLEL_MIN_BYTES = 2**20
+
+
+def _brotli():
+    # optional: imported the first time a build asks for it
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def available_formats() -> tuple[str, ...]:
+    return ("gz", "br") if _brotli() is not None else ("gz",)
+
+
+def _encode(data: bytes, fmt: str, level: int) -> bytes:
+    if fmt == "gz":
+        import gzip
+
+        # mtime=0 keeps the bytes, and so rebuilt files, reproducible
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    # brotli's quality runs 0-11; level 9 maps to its best
+    return _brotli().compress(data, quality=min(11, level + 2))
+
+
+def compress_file(path: str, formats: tuple[str, ...], level: int) -> dict[str, int]:
+    # write path.gz / path.br next to path; returns the size of each sibling
+    # kept, and drops any that would not be smaller than the original
+    with open(path, "rb") as f:
+        data = f.read()
+
+    sizes = {}
+    for fmt in formats:
+        dest = f"{path}.{fmt}"
+        encoded = _encode(data, fmt, level)
+        if len(encoded) >= len(data):
+            if os.path.exists(dest):
+                os.remove(dest)
+            continue
+        tmp_path = f"{dest}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encoded)
+        os.replace(tmp_path, dest)
+        sizes[fmt] = len(encoded)
+    return sizes
+
+
+def _compress_many(paths: list[str], formats: tuple[str, ...], level: int) -> list[dict[str, int]]:
+    return [compress_file(path, formats, level) for path in paths]
+
+
+def precompress(
+    output_dir: str,
+    manifest,
+    level: int = COMPRESS_LEVEL,
+    min_size: int = COMPRESS_MIN_SIZE,
+    jobs: int | None = None,
+) -> dict[str, int]:
+    # compress every eligible output whose content changed since the last
+    # build, on jobs worker processes (default one per CPU); returns, per
+    # format, the bytes saved over all compressed files
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    tracer = instrument.tracer
+    formats = available_formats()
+    settings = {"level": level, "min_size": min_size, "formats": list(formats)}
+    if manifest.data["settings"].get("compressed") != settings:
+        # everything is redone; siblings of a format no longer written go too
+        remove_precompressed(output_dir, manifest)
+    manifest.use_settings("compressed", **settings)
+
+    stale = []
+    for path, st in iter_files(output_dir):
+        if not path.endswith(COMPRESSIBLE) or st.st_size < min_size:
+            continue
+        digest = hash_file(path)
+        if manifest.is_fresh("compressed", path, digest):
+            manifest.keep("compressed", path)
+            tracer.count("compress_unchanged")
+        else:
+            stale.append((path, digest, st.st_size))
+
+    paths = [path for path, _, _ in stale]
+    if jobs > 1 and len(paths) > 1 and sum(size for _, _, size in stale) >= PARALLEL_MIN_BYTES:
+        size = max(1, len(paths) // (jobs * 4))
+        chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_compress_many, chunk, formats, level) for chunk in chunks]
+            results = [sizes for future in futures for sizes in future.result()]
+    else:
+        results = _compress_many(paths, formats, level)
+
+    for (path, digest, size), sizes in zip(stale, results):
+        outputs = [f"{path}.{fmt}" for fmt in sizes]
+        manifest.record("compressed", path, digest, outputs, size=size, compressed=sizes)
+        tracer.debug(f"Compressed {path}: " + ", ".join(f"{fmt} {n}" for fmt, n in sizes.items()))
+        tracer.count("files_compressed")
+
+    for output in manifest.prune("compressed", output_dir):
+        tracer.debug(f"Removing stale compressed file: {output}")
+        tracer.count("outputs_removed")
+
+    saved = dict.fromkeys(formats, 0)
+    for entry in manifest.data["compressed"].values():
+        for fmt, compressed_size in entry["compressed"].items():
+            if fmt in saved:
+                saved[fmt] += entry["size"] - compressed_size
+    return saved
+
+
+def remove_precompressed(output_dir: str, manifest) -> None:
+    # a build without compression must not leave siblings of older outputs behind
+    for output in manifest.prune("compressed", output_dir):
+        instrument.tracer.debug(f"Removing compressed file: {output}")
+        instrument.tracer.count("outputs_removed")
@@ -1,9 +1,53 @@
+import images
 from textnode import TextNode, TextType
-from htmlnode import LeafNode, HTMLNode, ParentNode
-from delimiter import *
-from blocks import *
+from htmlnode import LeafNode, ParentNode, RawNode, attrs_to_html, escape_text
+from blocks import Block, BlockType, heading_level, scan_blocks
+from inline import INLINE_PATTERN, iter_inline_tokens, tokenize_inline
+from render_cache import MIN_BLOCK_CHARS
 
-def text_node_to_html_node(text_node):
+__all__ = [
+    "LINK_KINDS",
+    "RENDERERS",
+    "Renderer",
+    "TreeRenderer",
+    "DirectRenderer",
+    "configure_renderer",
+    "prefix_url",
+    "image_props",
+    "text_node_to_html_node",
+    "text_to_textnodes",
+    "markdown_to_blocks",
+    "text_to_children",
+    "collect_links",
+    "block_layout",
+    "block_to_html_node",
+    "inline_to_html",
+    "block_to_html",
+    "render_block",
+    "markdown_to_html_node",
+    "write_markdown_html",
+]
+
+def prefix_url(url, basepath="/"):
+    # site-absolute urls get the basepath; external and protocol-relative ones do not
+    if basepath != "/" and url.startswith("/") and not url.startswith("//"):
+        return basepath + url[1:]
+    return url
+
+def image_props(url, alt, basepath="/"):
+    props = {"src": prefix_url(url, basepath), "alt": alt}
+    measured = images.index.get(url)
+    if measured is not None:
+        # known sizes let the browser reserve the space before the image loads
+        width, height, variants = measured
+        props["width"] = str(width)
+        props["height"] = str(height)
+        if variants:
+            candidates = [*variants, (url, width)]
+            props["srcset"] = ", ".join(f"{prefix_url(u, basepath)} {w}w" for u, w in candidates)
+    return props
+
+def text_node_to_html_node(text_node, basepath="/"):
 
     if text_node.text_type is TextType.TEXT:
         return LeafNode(tag=None, value=text_node.text)
@@ -18,118 +62,233 @@ def text_node_to_html_node(text_node):
         return LeafNode(tag="code", value=text_node.text)
 
     if text_node.text_type is TextType.LINKS:
-        return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
+        return LeafNode(tag="a", value=text_node.text, props={"href": prefix_url(text_node.url, basepath)})
 
     if text_node.text_type is TextType.IMAGES:
-        return LeafNode(tag="img", value="", props={"src": text_node.url, "alt": text_node.text})
+        return LeafNode(tag="img", value="", props=image_props(text_node.url, text_node.text, basepath))
     
     raise ValueError(f"Unsupported TextType: {text_node.text_type}")
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC) 
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-
+    # single left-to-right scan; see inline.py
+    return tokenize_inline(text)
 
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+def markdown_to_blocks(markdown):
+    return [block.text for block in scan_blocks(markdown.split("\n"))]
 
-    return nodes
+LINK_KINDS = {TextType.LINKS: "link", TextType.IMAGES: "image"}
 
-def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    cleaned_blocks = []
-    for block in blocks:
-        stripped = block.strip()
-        if len(stripped) == 0:
-            continue
-        cleaned_blocks.append(stripped)
-    
-    return cleaned_blocks
+def text_to_children(text, basepath="/", links=None, lineno=1):
+    if links is None:
+        text_nodes = text_to_textnodes(text)
+        html_nodes = []
+        for node in text_nodes:
+            html_nodes.append(text_node_to_html_node(node, basepath))
+        return html_nodes
 
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
+    # same tokens, also noting (line, kind, url) of every link and image
     html_nodes = []
-    for node in text_nodes:
-        html_nodes.append(text_node_to_html_node(node))
+    for offset, node in iter_inline_tokens(text):
+        kind = LINK_KINDS.get(node.text_type)
+        if kind is not None:
+            links.append((lineno + text.count("\n", 0, offset), kind, node.url))
+        html_nodes.append(text_node_to_html_node(node, basepath))
     return html_nodes
+
+def collect_links(block: Block, links: list) -> None:
+    # for blocks whose HTML came from the render cache and was never tokenized
+    if block.block_type == BlockType.CODE:
+        return
+    text = block.text
+    if "](" not in text:
+        return
+    for offset, node in iter_inline_tokens(text):
+        kind = LINK_KINDS.get(node.text_type)
+        if kind is not None:
+            links.append((block.lineno + text.count("\n", 0, offset), kind, node.url))
  
-def markdown_to_html_node(markdown: str):
-    blocks = markdown_to_blocks(markdown)
-
-    block_nodes = []
-    for block in blocks:
-        btype = block_to_block_type(block)
-
-        if btype == BlockType.HEADING:
-            level = 0
-            while level < len(block) and block[level] == "#":
-                level += 1
-            text = block[level:].lstrip()
-            block_nodes.append(
-                ParentNode(tag=f"h{level}", children=text_to_children(text))
-            )
-
-        elif btype == BlockType.PARAGRAPH:
-            block_nodes.append(
-                ParentNode(tag="p", children=text_to_children(block))
-            )
-
-        elif btype == BlockType.QUOTE:
-            quote_lines = []
-            for line in block.split("\n"):
-                stripped = line.strip()
-                if stripped.startswith(">"):
-                    stripped = stripped[1:].lstrip()  # remove ">" then one+ spaces
-                quote_lines.append(stripped)
-
-            quote_text = "\n".join(quote_lines).strip()
-
-            block_nodes.append(
-                ParentNode("blockquote", children=text_to_children(quote_text))
-            )
-
-
-        elif btype == BlockType.UNORDERED_LIST:
-            # each line like: "- item" or "* item"
-            items = []
-            for line in block.split("\n"):
-                text = line[2:].strip()  # remove "- " or "* "
-                items.append(ParentNode(tag="li", children=text_to_children(text)))
-            block_nodes.append(ParentNode(tag="ul", children=items))
-
-        elif btype == BlockType.ORDERED_LIST:
-            # each line like: "1. item"
-            items = []
-            for line in block.split("\n"):
-                # split only on the first "."
-                _, rest = line.split(".", 1)
-                text = rest.strip()
-                items.append(ParentNode(tag="li", children=text_to_children(text)))
-            block_nodes.append(ParentNode(tag="ol", children=items))
-
-        elif btype == BlockType.CODE:
-            # strip the surrounding triple backticks; DO NOT parse inline markdown
-            lines = block.split("\n")
-            # remove first and last line if they are ``` fences
-            if lines and lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].endswith("```"):
-                lines = lines[:-1]
-            code_text = "\n".join(lines)
-
-            code_leaf = text_node_to_html_node(TextNode(code_text, TextType.TEXT))
-            code_node = ParentNode(tag="code", children=[code_leaf])
-            block_nodes.append(ParentNode(tag="pre", children=[code_node]))
+def block_layout(block: Block):
+    # how a block maps onto HTML, for every backend: its tag, the tag around
+    # each item (li in lists, code in code blocks, else None) and its pieces
+    # as (text, line number). A code block's one piece is literal text; the
+    # others hold inline markup.
+    btype = block.block_type
+    lines = block.lines
+    lineno = block.lineno
+
+    if btype == BlockType.HEADING:
+        level = heading_level(lines[0])
+        return f"h{level}", None, [(block.text[level:].lstrip(), lineno)]
 
+    if btype == BlockType.QUOTE:
+        quote_lines = []
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith(">"):
+                stripped = stripped[1:].lstrip()  # remove ">" then one+ spaces
+            quote_lines.append(stripped)
+
+        # leading blank quote lines are stripped away, so count them back in
+        skipped = 0
+        while skipped < len(quote_lines) and not quote_lines[skipped].strip():
+            skipped += 1
+        return "blockquote", None, [("\n".join(quote_lines).strip(), lineno + skipped)]
+
+    if btype == BlockType.UNORDERED_LIST:
+        # each line like: "- item"
+        return "ul", "li", [(line[2:].strip(), lineno + i) for i, line in enumerate(lines)]
+
+    if btype == BlockType.ORDERED_LIST:
+        # each line like: "1. item"; split only on the first "."
+        return "ol", "li", [(line.split(".", 1)[1].strip(), lineno + i) for i, line in enumerate(lines)]
+
+    if btype == BlockType.CODE:
+        # strip the surrounding triple backticks; DO NOT parse inline markdown
+        # remove first and last line if they are ``` fences
+        if lines and lines[0].startswith("```"):
+            lines = lines[1:]
+        if lines and lines[-1].endswith("```"):
+            lines = lines[:-1]
+        return "pre", "code", [("\n".join(lines), lineno)]
+
+    # paragraphs, and the fallback for anything else
+    return "p", None, [(block.text, lineno)]
+
+def block_to_html_node(block: Block, basepath: str = "/", links=None):
+    tag, item_tag, pieces = block_layout(block)
+    if block.block_type == BlockType.CODE:
+        code_leaf = text_node_to_html_node(TextNode(pieces[0][0], TextType.TEXT))
+        return ParentNode(tag=tag, children=[ParentNode(tag=item_tag, children=[code_leaf])])
+    if item_tag is None:
+        text, lineno = pieces[0]
+        return ParentNode(tag=tag, children=text_to_children(text, basepath, links, lineno))
+    items = [
+        ParentNode(tag=item_tag, children=text_to_children(text, basepath, links, lineno)) for text, lineno in pieces
+    ]
+    return ParentNode(tag=tag, children=items)
+
+
+# direct emit: the same HTML as the tree above, written as text straight
+# from the block layout and the inline pattern, with no node objects
+_SPAN_TAGS = {"bold": ("<b>", "</b>"), "italic": ("<i>", "</i>"), "code": ("<code>", "</code>")}
+
+def inline_to_html(text, basepath="/", links=None, lineno=1):
+    # twin of "".join(n.to_html() for n in text_to_children(...))
+    # most runs hold no &, < or >, and then none of their pieces is escaped
+    plain = not ("&" in text or "<" in text or ">" in text)
+    parts = []
+    append = parts.append
+    pos = 0
+    for match in INLINE_PATTERN.finditer(text):
+        start = match.start()
+        if start > pos:
+            append(text[pos:start] if plain else escape_text(text[pos:start]))
+        kind = match.lastgroup
+        if kind == "src" or kind == "href":
+            url = match.group(kind)
+            if links is not None:
+                links.append((lineno + text.count("\n", 0, start), "image" if kind == "src" else "link", url))
+            if kind == "src":
+                append(f"<img{attrs_to_html(image_props(url, match.group('alt'), basepath))}>")
+            else:
+                anchor = match.group("anchor")
+                append(f'<a{attrs_to_html({"href": prefix_url(url, basepath)})}>{anchor if plain else escape_text(anchor)}</a>')
         else:
-            # fallback: treat as paragraph
-            block_nodes.append(
-                ParentNode(tag="p", children=text_to_children(block))
-            )
+            open_tag, close_tag = _SPAN_TAGS[kind]
+            content = match.group(kind)
+            append(open_tag + (content if plain else escape_text(content)) + close_tag)
+        pos = match.end()
+    if not pos:
+        return text if plain else escape_text(text)
+    append(text[pos:] if plain else escape_text(text[pos:]))
+    return "".join(parts)
+
+def block_to_html(block: Block, basepath: str = "/", links=None):
+    tag, item_tag, pieces = block_layout(block)
+    if block.block_type == BlockType.CODE:
+        return f"<{tag}><{item_tag}>{escape_text(pieces[0][0])}</{item_tag}></{tag}>"
+    if item_tag is None:
+        text, lineno = pieces[0]
+        return f"<{tag}>{inline_to_html(text, basepath, links, lineno)}</{tag}>"
+    items = "".join(
+        f"<{item_tag}>{inline_to_html(text, basepath, links, lineno)}</{item_tag}>" for text, lineno in pieces
+    )
+    return f"<{tag}>{items}</{tag}>"
 
+
+class Renderer:
+    # A rendering backend: turns one block into HTML. Every backend must
+    # produce the same bytes for the same block (see test_render.py).
+    name = None
+
+    def block_html(self, block: Block, basepath: str = "/", links=None) -> str:
+        raise NotImplementedError("not implemented")
+
+    def block_node(self, block: Block, basepath: str = "/", links=None):
+        return RawNode(self.block_html(block, basepath, links))
+
+
+class TreeRenderer(Renderer):
+    # TextNode -> LeafNode/ParentNode -> to_html: for callers that inspect
+    # or rewrite the HTMLNode tree of a page
+    name = "tree"
+
+    def block_html(self, block: Block, basepath: str = "/", links=None) -> str:
+        return block_to_html_node(block, basepath, links).to_html()
+
+    def block_node(self, block: Block, basepath: str = "/", links=None):
+        return block_to_html_node(block, basepath, links)
+
+
+class DirectRenderer(Renderer):
+    # block and inline tokens straight to HTML text; each block becomes a
+    # single RawNode
+    name = "direct"
+
+    def block_html(self, block: Block, basepath: str = "/", links=None) -> str:
+        return block_to_html(block, basepath, links)
+
+
+RENDERERS = {backend.name: backend for backend in (TreeRenderer(), DirectRenderer())}
+
+# backend used when a call names none; the build picks one with configure_renderer()
+default_renderer = RENDERERS["tree"]
+
+def configure_renderer(name: str) -> Renderer:
+    global default_renderer
+    default_renderer = RENDERERS[name]
+    return default_renderer
+
+
+def render_block(block: Block, basepath: str = "/", cache=None, links=None, renderer=None):
+    # links, when given, collects (line, kind, url) for every link and image
+    if renderer is None:
+        renderer = default_renderer
+    if cache is None or sum(map(len, block.lines)) < MIN_BLOCK_CHARS:
+        return renderer.block_node(block, basepath, links)
+
+    # identical blocks on any page render once; later ones reuse the HTML
+    key = cache.key(block, basepath, images.digest if "![" in block.text else "")
+    html = cache.get(key)
+    if html is None:
+        html = renderer.block_html(block, basepath, links)
+        cache.put(key, html)
+    elif links is not None:
+        collect_links(block, links)
+    return RawNode(html)
+
+
+def markdown_to_html_node(markdown: str, basepath: str = "/", cache=None, links=None, renderer=None):
+    block_nodes = [
+        render_block(block, basepath, cache, links, renderer) for block in scan_blocks(markdown.split("\n"))
+    ]
     return ParentNode(tag="div", children=block_nodes)
 
-        
+
+def write_markdown_html(lines, write, basepath: str = "/", cache=None, links=None, renderer=None):
+    # streaming twin of markdown_to_html_node(...).write_html(write): lines can
+    # be an open file, and only one block is held in memory at a time
+    write("<div>")
+    for block in scan_blocks(lines):
+        render_block(block, basepath, cache, links, renderer).write_html(write)
+    write("</div>")
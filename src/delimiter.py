@@ -1,7 +1,33 @@
-from textnode import *
-from extract import extract_markdown_images, extract_markdown_links
 import re
 
+from textnode import TextNode, TextType
+from extract import IMAGE_PATTERN, LINK_PATTERN, extract_markdown_images, extract_markdown_links
+
+__all__ = [
+    "split_nodes_delimiter",
+    "split_nodes_link",
+    "split_nodes_image",
+    "extract_markdown_images",
+    "extract_markdown_links",
+]
+
+
+def _compile_delimiter(delimiter):
+    d = re.escape(delimiter)
+    return re.compile(fr"({d}(?:(?!{d}).)*{d})")
+
+
+# the markdown delimiters, compiled once at import; others on first use
+_DELIMITER_PATTERNS = {d: _compile_delimiter(d) for d in ("**", "_", "`")}
+
+
+def _delimiter_pattern(delimiter):
+    pattern = _DELIMITER_PATTERNS.get(delimiter)
+    if pattern is None:
+        pattern = _DELIMITER_PATTERNS[delimiter] = _compile_delimiter(delimiter)
+    return pattern
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     result = []
     for old_node in old_nodes:
@@ -11,8 +37,7 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
         if delimiter not in old_node.text:
             result.append(old_node)
             continue
-        d = re.escape(delimiter)
-        text_list = re.split(fr"({d}(?:(?!{d}).)*{d})", old_node.text)
+        text_list = _delimiter_pattern(delimiter).split(old_node.text)
     
         for text in text_list:
             if text.startswith(delimiter) and text.endswith(delimiter):
@@ -23,78 +48,35 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
                 result.append(new_node)
     return result
 
-def split_nodes_link(old_nodes):
-    new_nodes = []
-
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        
-        text = old_node.text
-        links = extract_markdown_links(text)
-
-        if not links:
-            new_nodes.append(old_node)
-            continue
-
-        for anchor, url in links:
-            markdown = f"[{anchor}]({url})"
-            parts = text.split(markdown, 1)
-            before = parts[0]
-            if len(parts) != 2:
-                raise Exception("Sorry, an error occurred")
-            after = parts[1]
-
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-        
-            new_nodes.append(TextNode(anchor, TextType.LINKS, url))
 
-            text = after
-        
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
-
-    return new_nodes
-
-def split_nodes_image(old_nodes):
+def _split_nodes_pattern(old_nodes, pattern, text_type):
+    # slice around each match instead of re-splitting the remaining text
     new_nodes = []
 
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        
-        text = old_node.text
-        images = extract_markdown_images(text)
 
-        if not images:
+        text = old_node.text
+        pos = 0
+        for match in pattern.finditer(text):
+            if match.start() > pos:
+                new_nodes.append(TextNode(text[pos:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
+
+        if pos == 0:
             new_nodes.append(old_node)
-            continue
-
-        for alt, url in images:
-            markdown = f"![{alt}]({url})"
-            parts = text.split(markdown, 1)
-            before = parts[0]
+        elif pos < len(text):
+            new_nodes.append(TextNode(text[pos:], TextType.TEXT))
 
-            if len(parts) != 2:
-                raise Exception("Sorry, an error occurred")
-            after = parts[1]
+    return new_nodes
 
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-        
-            new_nodes.append(TextNode(alt, TextType.IMAGES, url))
 
-            text = after
-        
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
+def split_nodes_link(old_nodes):
+    return _split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINKS)
 
-    return new_nodes
-        
 
-   
-            
-        
\ No newline at end of file
+def split_nodes_image(old_nodes):
+    return _split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGES)
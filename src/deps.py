@@ -0,0 +1,63 @@
+import os
+
+from manifest import hash_file
+
+# dependencies that are not files: values computed during the build
+NAV = "@nav"
+IMAGE_PREFIX = "@image:"
+
+
+class DependencyGraph:
+    # Edges from each page (keyed by its markdown source) to everything its
+    # output was built from: the source, its template and partials, and
+    # values such as the site navigation or the size of an image it shows.
+    # Each edge carries the dependency's hash at build time; the edges live
+    # in the pages' manifest entries, so the graph persists between runs.
+
+    def __init__(self, manifest, settings_changed: bool = False):
+        self.manifest = manifest
+        self.settings_changed = settings_changed
+        self.values = {}
+        self._hashes = {}
+
+    def provide(self, name: str, digest: str) -> None:
+        # register the current hash of a non-file dependency
+        self.values[name] = digest
+
+    def hash(self, dep: str) -> str | None:
+        # current hash of a dependency, each file hashed at most once per build
+        if dep in self.values:
+            return self.values[dep]
+        if dep.startswith("@"):
+            return None
+        if dep not in self._hashes:
+            try:
+                self._hashes[dep] = hash_file(dep)
+            except FileNotFoundError:
+                self._hashes[dep] = None
+        return self._hashes[dep]
+
+    def reasons(self, page: str, deps: list[str]) -> list[str]:
+        # why page must be rebuilt, given the files it depends on now; an
+        # empty list means its outputs are up to date
+        entry = self.manifest.entry("pages", page)
+        if entry is None:
+            return ["build settings changed" if self.settings_changed else "new page"]
+        if "deps" not in entry:
+            return ["no dependency record from an earlier build"]
+
+        reasons = [f"output missing: {output}" for output in entry["outputs"] if not os.path.exists(output)]
+        recorded = entry["deps"]
+        for dep in deps:
+            if dep not in recorded:
+                reasons.append(f"now uses {dep}")
+        for dep, digest in recorded.items():
+            if self.hash(dep) != digest:
+                reasons.append(f"{dep} changed")
+            elif not dep.startswith(IMAGE_PREFIX) and dep not in deps:
+                reasons.append(f"no longer uses {dep}")
+        return reasons
+
+    def snapshot(self, deps) -> dict[str, str]:
+        # the edges to store for a page built from deps right now
+        return {dep: self.hash(dep) for dep in deps}
@@ -0,0 +1,83 @@
+import io
+import re
+from itertools import chain, repeat
+
+__all__ = ["FENCE", "parse_front_matter", "split_front_matter", "skip_front_matter"]
+
+# a page may open with a block of "key: value" lines between two fences:
+#   ---
+#   title: Why Tom Bombadil Was a Mistake
+#   date: 2024-03-01
+#   tags: [tolkien, characters]
+#   draft: false
+#   ---
+FENCE = "---"
+FIELD_PATTERN = re.compile(r"([A-Za-z_][\w-]*)\s*:\s*(.*)")
+_BOOLEANS = {"true": True, "yes": True, "false": False, "no": False}
+
+
+def _scalar(text: str):
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    return _BOOLEANS.get(text.lower(), text)
+
+
+def _value(text: str):
+    if text.startswith("[") and text.endswith("]"):
+        return [_scalar(item.strip()) for item in text[1:-1].split(",") if item.strip()]
+    return _scalar(text)
+
+
+def parse_front_matter(lines) -> tuple[dict, int]:
+    # reads lines only up to the closing fence; returns the fields and the
+    # number of lines the front matter spans, 0 when the text has none
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None or first.rstrip("\r\n") != FENCE:
+        return {}, 0
+
+    fields = {}
+    key = None
+    for lineno, line in enumerate(lines, 2):
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if line == FENCE:
+            return fields, lineno
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and isinstance(fields[key], list):
+            # a block list under the previous "key:" line
+            fields[key].append(_scalar(stripped[2:].strip()))
+            continue
+        match = FIELD_PATTERN.fullmatch(stripped)
+        if match is None:
+            raise ValueError(f"line {lineno}: cannot parse front matter: {line!r}")
+        key, text = match.group(1).lower(), match.group(2).strip()
+        fields[key] = _value(text) if text else []
+    raise ValueError(f"front matter is not closed by {FENCE}")
+
+
+def split_front_matter(markdown: str) -> tuple[dict, str]:
+    # fields, and the markdown with the front matter blanked out so line
+    # numbers in the rest of the page stay those of the source
+    if not markdown.startswith(FENCE):
+        return {}, markdown
+    fields, span = parse_front_matter(io.StringIO(markdown))
+    if not span:
+        return {}, markdown
+    end = -1
+    for _ in range(span):
+        end = markdown.find("\n", end + 1)
+        if end == -1:
+            return fields, "\n" * (span - 1)
+    return fields, "\n" * span + markdown[end + 1:]
+
+
+def skip_front_matter(f) -> tuple[dict, object]:
+    # the same for an open file: fields, and its lines with the front matter blanked
+    fields, span = parse_front_matter(f)
+    if not span:
+        f.seek(0)
+        return fields, f
+    return fields, chain(repeat("", span), f)
+
@@ -1,56 +1,318 @@
+import datetime
+import hashlib
 import os
-from pathlib import Path
 
-from converter import *
-from htmlnode import *
+import images
+import instrument
+from blocks import Block, BlockType, heading_level, scan_blocks
+from converter import markdown_to_html_node, text_to_textnodes, write_markdown_html
+from deps import IMAGE_PREFIX, NAV, DependencyGraph
+from frontmatter import skip_front_matter, split_front_matter
+from htmlnode import escape_attr, escape_text
+from links import LinkIndex, page_dir, page_relative
+from manifest import hash_bytes
+from output import link_alias, write_output_stream
+from render_cache import RENDERER_VERSION
+from template import load_template, resolve_template
+from textnode import TextType
+
+__all__ = [
+    "STREAM_THRESHOLD",
+    "PageBuildError",
+    "extract_title",
+    "extract_description",
+    "scan_page_head",
+    "build_nav",
+    "page_metadata",
+    "collect_metadata",
+    "fill_page_values",
+    "generate_page",
+    "render_page",
+    "write_aliases",
+    "discover_pages",
+    "page_shard",
+    "generate_pages_recursive",
+]
+
+
+class PageBuildError(Exception):
+    def __init__(self, failures: list[tuple[str, str]]):
+        self.failures = failures
+        lines = [f"{len(failures)} page(s) failed to build:"]
+        lines += [f"  {path}: {error}" for path, error in failures]
+        super().__init__("\n".join(lines))
 
 
 def extract_title(markdown: str) -> str:
-    for line in markdown.splitlines():
-        stripped = line.strip()
-        if stripped.startswith("# "):
-            return stripped[2:].strip()
-    raise Exception("No H1 header found in markdown")
+    return scan_page_head(markdown.split("\n"))[0]
 
 
-def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str = "/") -> None:
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+# sources at least this large are rendered block by block straight from disk
+STREAM_THRESHOLD = 16 * 2**20
 
-    with open(from_path, "r", encoding="utf-8") as f:
-        markdown = f.read()
 
-    with open(template_path, "r", encoding="utf-8") as f:
-        template = f.read()
+def _paragraph_description(block: Block, limit: int) -> str:
+    nodes = text_to_textnodes(block.text)
+    text = " ".join("".join(n.text for n in nodes if n.text_type != TextType.IMAGES).split())
+    if len(text) > limit:
+        text = text[:limit - 1].rstrip() + "…"
+    return escape_attr(text)
 
-    html_node = markdown_to_html_node(markdown)
-    content_html = html_node.to_html()
-    title = extract_title(markdown)
 
-    full_html = template.replace("{{ Title }}", title).replace("{{ Content }}", content_html)
+def extract_description(markdown: str, limit: int = 160) -> str:
+    # plain text of the first paragraph, for the {{ Description }} slot
+    for block in scan_blocks(markdown.split("\n")):
+        if block.block_type == BlockType.PARAGRAPH:
+            text = _paragraph_description(block, limit)
+            if text:
+                return text
+    return ""
 
-    full_html = full_html.replace('href="/', f'href="{basepath}')
-    full_html = full_html.replace('src="/', f'src="{basepath}')
 
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w", encoding="utf-8") as f:
-        f.write(full_html)
+def scan_page_head(
+    lines, want_description: bool = False, limit: int = 160, title: str | None = None
+) -> tuple[str, str]:
+    # title from the first H1 block (unless the front matter gave one), plus
+    # the description if asked for, consuming lines (e.g. an open file) only
+    # as far as needed
+    description = ""
+    for block in scan_blocks(lines):
+        if title is None and block.block_type == BlockType.HEADING and heading_level(block.lines[0]) == 1:
+            title = block.lines[0][2:].strip()
+        elif want_description and not description and block.block_type == BlockType.PARAGRAPH:
+            description = _paragraph_description(block, limit)
 
+        if title is not None and (description or not want_description):
+            break
 
-def generate_pages_recursive(
-    dir_path_content: str,
+    if title is None:
+        raise Exception("No H1 header found in markdown")
+    return title, description
+
+
+def build_nav(pages: list, content_root: str, basepath: str = "/") -> str:
+    # links to the top-level pages of the site, for the {{ Nav }} slot
+    links = []
+    for from_path, _ in pages:
+        parts = tuple(os.path.splitext(os.path.relpath(from_path, content_root))[0].split(os.sep))
+        if parts == ("index",):
+            links.append((basepath, "Home"))
+        elif len(parts) == 1 or parts[1:] == ("index",):
+            links.append((basepath + parts[0], parts[0].replace("-", " ").title()))
+    items = "".join(f'<li><a href="{escape_attr(url)}">{escape_text(label)}</a></li>' for url, label in links)
+    return f"<nav><ul>{items}</ul></nav>"
+
+
+def _front_matter_title(fields: dict) -> str | None:
+    title = fields.get("title")
+    return title if isinstance(title, str) and title else None
+
+
+def _front_matter_date(fields: dict) -> str | None:
+    date = fields.get("date")
+    if not date:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(date)).isoformat()
+    except ValueError:
+        raise ValueError(f"date is not YYYY-MM-DD: {date!r}")
+
+
+def _front_matter_tags(fields: dict) -> list[str]:
+    tags = fields.get("tags", [])
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return sorted({str(tag).strip().lower() for tag in tags if str(tag).strip()})
+
+
+def _fill_front_matter_values(values: dict, fields: dict, template) -> None:
+    # the {{ Date }} and {{ Tags }} slots, read the same way as for the listings
+    if "Date" in template.slots:
+        values["Date"] = _front_matter_date(fields) or ""
+    if "Tags" in template.slots:
+        values["Tags"] = escape_text(", ".join(_front_matter_tags(fields)))
+
+
+def page_metadata(path: str) -> dict:
+    # title, date, tags and draft status of one page from a read of its front
+    # matter alone; only a page without a front matter title is scanned on
+    # to its first H1, and a page with neither is an error
+    with open(path, "r", encoding="utf-8") as f:
+        fields, lines = skip_front_matter(f)
+        title = _front_matter_title(fields)
+        if title is None:
+            for block in scan_blocks(lines):
+                if block.block_type == BlockType.HEADING and heading_level(block.lines[0]) == 1:
+                    title = block.lines[0][2:].strip()
+                    break
+    if title is None:
+        raise ValueError(f"{path}: no title: add a title to the front matter or an H1 header")
+
+    try:
+        date = _front_matter_date(fields)
+    except ValueError as e:
+        raise ValueError(f"{path}: {e}")
+    return {
+        "title": title,
+        "date": date,
+        "tags": _front_matter_tags(fields),
+        "draft": fields.get("draft") is True,
+    }
+
+
+def collect_metadata(sources: list[str], manifest=None) -> tuple[dict[str, dict], list[tuple[str, str]]]:
+    # the metadata index: page_metadata() of every source, persisted in the
+    # build manifest and re-read only for sources whose size or mtime changed;
+    # also returns (source, error) for sources with malformed front matter or
+    # no title, so none of them reaches the listings
+    tracer = instrument.tracer
+    metadata = {}
+    failures = []
+    for source in sources:
+        st = os.stat(source)
+        entry = manifest.entry("metadata", source) if manifest is not None else None
+        if (
+            entry is not None
+            and entry["size"] == st.st_size
+            and entry["mtime_ns"] == st.st_mtime_ns
+            and entry["title"] is not None
+        ):
+            meta = {key: entry[key] for key in ("title", "date", "tags", "draft")}
+            tracer.count("metadata_unchanged")
+        else:
+            try:
+                meta = page_metadata(source)
+            except ValueError as e:
+                failures.append((source, f"{type(e).__name__}: {e}"))
+                continue
+            tracer.count("metadata_read")
+        if manifest is not None:
+            manifest.record("metadata", source, None, [], size=st.st_size, mtime_ns=st.st_mtime_ns, **meta)
+        metadata[source] = meta
+    if manifest is not None:
+        manifest.prune("metadata", ".")
+    return metadata, failures
+
+
+def fill_page_values(values: dict, markdown: str, template, basepath: str = "/", cache=None, links=None) -> None:
+    fields, markdown = split_front_matter(markdown)
+    html_node = markdown_to_html_node(markdown, basepath, cache, links)
+    # escaped for attributes too, as templates may use it in og:title content="..."
+    values["Title"] = escape_attr(_front_matter_title(fields) or extract_title(markdown))
+    if "Description" in template.slots:
+        values["Description"] = extract_description(markdown)
+    _fill_front_matter_values(values, fields, template)
+    # the article is streamed straight into the output at the Content slot
+    values["Content"] = html_node.write_html
+
+
+def generate_page(
+    from_path: str,
     template_path: str,
-    dest_dir_path: str,
+    dest_path: str,
     basepath: str = "/",
-    content_root: str | None = None,
+    slots: dict | None = None,
+    cache=None,
+    stream_threshold: int | None = STREAM_THRESHOLD,
+    links: list | None = None,
 ) -> None:
+    tracer = instrument.tracer
+    tracer.debug(f"Generating page from {from_path} to {dest_path} using {template_path}")
+
+    with tracer.span("page", path=from_path):
+        template = load_template(template_path, basepath)
+        values = dict(slots) if slots else {}
+        want_description = "Description" in template.slots
+
+        streamed = stream_threshold is not None and os.path.getsize(from_path) >= stream_threshold
+        if streamed:
+            # big sources never sit in memory whole: a first pass stops at the
+            # H1, and the article is rendered block by block while writing
+            with tracer.span("read"):
+                with open(from_path, "r", encoding="utf-8") as f:
+                    fields, lines = skip_front_matter(f)
+                    title, description = scan_page_head(
+                        lines, want_description, title=_front_matter_title(fields)
+                    )
+                    values["Title"] = escape_attr(title)
+            _fill_front_matter_values(values, fields, template)
+            if want_description:
+                values["Description"] = description
+
+            def write_content(write):
+                with open(from_path, "r", encoding="utf-8") as f:
+                    write_markdown_html(skip_front_matter(f)[1], write, basepath, cache, links)
+
+            values["Content"] = write_content
+            if tracer.enabled:
+                tracer.count("bytes_read", os.path.getsize(from_path))
+                tracer.count("pages_streamed")
+        else:
+            with tracer.span("read"):
+                with open(from_path, "r", encoding="utf-8") as f:
+                    markdown = f.read()
+                    if tracer.enabled:
+                        tracer.count("bytes_read", os.fstat(f.fileno()).st_size)
+
+            with tracer.span("parse"):
+                fill_page_values(values, markdown, template, basepath, cache, links)
+
+        with tracer.span("write"):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            # every page, not just streamed sources: the article goes
+            # straight into the file between the template's chunks
+            written, size = write_output_stream(dest_path, lambda write: template.write(write, values))
+            if written:
+                tracer.count("bytes_written", size)
+            else:
+                tracer.count("outputs_unchanged")
+        tracer.count("pages_rendered")
+
+
+def render_page(
+    from_path: str,
+    dest_paths: list[str],
+    template_path: str,
+    basepath: str = "/",
+    slots: dict | None = None,
+    cache=None,
+    stream_threshold: int | None = STREAM_THRESHOLD,
+) -> list:
+    # render one source to its first output and point the others at it;
+    # returns the (line, kind, url) of the links and images its content
+    # emits, collected while rendering
+    links = []
+    generate_page(from_path, template_path, dest_paths[0], basepath, slots, cache, stream_threshold, links)
+    write_aliases(dest_paths, links)
+    return links
+
+
+def write_aliases(dest_paths: list[str], links: list) -> None:
+    # links are the page's (line, kind, url); a relative one makes every
+    # alias a redirect to the first output
+    tracer = instrument.tracer
+    if len(dest_paths) < 2:
+        return
+    redirect = any(page_relative(url) for _, _, url in links)
+    for alias in dest_paths[1:]:
+        tracer.count("aliases_" + link_alias(dest_paths[0], alias, redirect))
+
+
+def discover_pages(
+    dir_path_content: str,
+    dest_dir_path: str,
+    content_root: str | None = None,
+) -> list[tuple[str, list[str]]]:
+    # walk the content tree once and return (source, [outputs]) for every page
     if content_root is None:
         content_root = dir_path_content
 
-    for entry in os.listdir(dir_path_content):
+    pages = []
+    for entry in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, entry)
 
         if os.path.isdir(from_path):
-            generate_pages_recursive(from_path, template_path, dest_dir_path, basepath, content_root)
+            pages.extend(discover_pages(from_path, dest_dir_path, content_root))
             continue
 
         if not entry.endswith(".md"):
@@ -61,14 +323,149 @@ def generate_pages_recursive(
 
         if rel_no_ext.endswith("index"):
             # content/index.md -> docs/index.html
-            dest_path = os.path.join(dest_dir_path, rel_no_ext + ".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+            dest_paths = [os.path.join(dest_dir_path, rel_no_ext + ".html")]
         else:
-            # 1) content/contact.md -> docs/contact/index.html
-            dest_index = os.path.join(dest_dir_path, rel_no_ext, "index.html")
-            generate_page(from_path, template_path, dest_index, basepath)
+            dest_paths = [
+                # 1) content/contact.md -> docs/contact/index.html
+                os.path.join(dest_dir_path, rel_no_ext, "index.html"),
+                # 2) and docs/contact.html for hosts that map /contact to it:
+                #    a hardlink to (or redirect page for) the first, not a second render;
+                #    always the redirect when the page has relative links or images
+                os.path.join(dest_dir_path, rel_no_ext + ".html"),
+            ]
+        pages.append((from_path, dest_paths))
+
+    return pages
+
+
+def page_shard(from_path: str, content_root: str, count: int) -> int:
+    # 1-based shard of a page: a hash of its path below the content root,
+    # the same on every machine and independent of which other pages exist
+    rel = os.path.relpath(from_path, content_root).replace(os.sep, "/")
+    return int.from_bytes(hashlib.sha256(rel.encode("utf-8")).digest()[:8], "big") % count + 1
+
+
+def generate_pages_recursive(
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    basepath: str = "/",
+    content_root: str | None = None,
+    manifest=None,
+    jobs: int = 1,
+    cache=None,
+    stream_threshold: int | None = STREAM_THRESHOLD,
+    queue_size: int | None = None,
+    explain: bool = False,
+    shard: tuple[int, int] | None = None,
+    drafts: bool = False,
+    listings: bool = False,
+    site_url: str = "",
+) -> LinkIndex:
+    if content_root is None:
+        content_root = dir_path_content
+
+    graph = None
+    if manifest is not None:
+        first_build = "pages" not in manifest.data["settings"]
+        settings = {"basepath": basepath, "renderer": RENDERER_VERSION}
+        settings_changed = manifest.use_settings("pages", **settings) and not first_build
+        graph = DependencyGraph(manifest, settings_changed)
+
+    discovered = discover_pages(dir_path_content, dest_dir_path, content_root)
+    metadata, unreadable = collect_metadata([from_path for from_path, _ in discovered], manifest)
+    discovered = [
+        page for page in discovered if page[0] in metadata and (drafts or not metadata[page[0]]["draft"])
+    ]
+    slots = {"Nav": build_nav(discovered, content_root, basepath)}
+    site_pages = discovered
+    if shard is not None:
+        # every shard sees the whole site for the nav, then renders its slice
+        index, count = shard
+        discovered = [page for page in discovered if page_shard(page[0], content_root, count) == index]
+
+    if graph is not None:
+        graph.provide(NAV, hash_bytes(slots["Nav"].encode("utf-8")))
+        for url, measured in images.index.items():
+            graph.provide(IMAGE_PREFIX + url, hash_bytes(repr(measured).encode("utf-8")))
+
+    pages = []
+    edges = {}
+    link_index = LinkIndex()
+    for from_path, dest_paths in discovered:
+        page_template = resolve_template(from_path, content_root, template_path)
+
+        if graph is not None:
+            # a page depends on its source, its template and partials and, if
+            # the template shows it, the navigation; images are added once
+            # the render has seen which ones the page shows
+            template = load_template(page_template, basepath)
+            deps = [from_path, page_template, *template.partials]
+            if "Nav" in template.slots:
+                deps.append(NAV)
+            reasons = graph.reasons(from_path, deps)
+            if not reasons:
+                entry = manifest.entry("pages", from_path)
+                manifest.keep("pages", from_path)
+                link_index.add(from_path, page_dir(dest_paths[0], dest_dir_path), entry["links"])
+                instrument.tracer.count("pages_unchanged")
+                continue
+            if explain:
+                print(f"Rebuilding {from_path}: {'; '.join(reasons)}")
+            edges[from_path] = graph.snapshot(deps)
+        elif explain:
+            print(f"Rebuilding {from_path}: no build manifest")
+        pages.append((from_path, dest_paths, page_template))
+
+    if jobs > 1 and len(pages) > 1:
+        from parallel import render_pages_parallel
+
+        built, failures = render_pages_parallel(pages, basepath, slots, jobs, cache, stream_threshold)
+    elif queue_size is not None and pages:
+        from pipeline import render_pages_pipelined
+
+        built, failures = render_pages_pipelined(pages, basepath, slots, cache, stream_threshold, queue_size)
+    else:
+        built, failures = [], []
+        for from_path, dest_paths, page_template in pages:
+            # collected like the worker and pipeline paths do, so every mode
+            # reports the failing source and still records the pages that built
+            try:
+                links = render_page(from_path, dest_paths, page_template, basepath, slots, cache, stream_threshold)
+            except Exception as e:
+                failures.append((from_path, f"{type(e).__name__}: {e}"))
+            else:
+                built.append((from_path, dest_paths, links))
+
+    for from_path, dest_paths, links in built:
+        link_index.add(from_path, page_dir(dest_paths[0], dest_dir_path), links)
+
+    if manifest is not None:
+        for from_path, dest_paths, links in built:
+            shown = sorted({IMAGE_PREFIX + url for _, kind, url in links if kind == "image"})
+            deps = {**edges[from_path], **graph.snapshot(shown)}
+            manifest.record("pages", from_path, deps[from_path], dest_paths, links=links, deps=deps)
+        # a page that failed to read or render keeps its old entry, and with
+        # it its last good output, until it builds again
+        for from_path, _ in unreadable + failures:
+            manifest.keep("pages", from_path)
+        for output in manifest.prune("pages", dest_dir_path):
+            instrument.tracer.debug(f"Removing stale page: {output}")
+            instrument.tracer.count("outputs_removed")
+
+    failures = unreadable + failures
+    if failures:
+        raise PageBuildError(failures)
 
-            # 2) ALSO write a no-extension file so /contact works
-            dest_no_ext = os.path.join(dest_dir_path, rel_no_ext)
-            generate_page(from_path, template_path, dest_no_ext, basepath)
+    if listings and (shard is None or shard[0] == 1):
+        # site-wide pages, made by one shard only
+        from listings import generate_listings
 
+        generate_listings(
+            site_pages, metadata, content_root, template_path, dest_dir_path, basepath, slots, manifest, site_url
+        )
+    elif manifest is not None:
+        for output in manifest.prune("listings", dest_dir_path):
+            instrument.tracer.debug(f"Removing stale listing: {output}")
+            instrument.tracer.count("outputs_removed")
+    return link_index
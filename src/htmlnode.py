@@ -1,8 +1,86 @@
+import sys
 from enum import Enum
+from functools import lru_cache
+from types import MappingProxyType
+
+__all__ = [
+    "EMPTY_PROPS",
+    "VOID_TAGS",
+    "escape_text",
+    "escape_attr",
+    "attrs_to_html",
+    "LeafTag",
+    "HTMLNode",
+    "LeafNode",
+    "ParentNode",
+    "RawNode",
+]
 
 
 _MISSING = object()
 
+# shared by every node without attributes instead of a fresh dict or None
+EMPTY_PROPS = MappingProxyType({})
+
+
+def _intern_tag(tag):
+    # tags such as f"h{level}" are built at runtime; intern them so every
+    # node shares one string per tag name
+    if type(tag) is str:
+        return sys.intern(tag)
+    return tag
+
+
+# elements that have no content and no closing tag
+VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"})
+
+
+# the one place text and attribute values are serialized, for the node
+# tree and the direct renderer alike
+def escape_text(text):
+    # most text holds none of these, and the membership tests run at C speed;
+    # text that does goes through one str.replace per entity ("&" first),
+    # which bench_escape.py shows well ahead of str.translate or a regex
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attr(value):
+    # the same for values inside double quotes
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    return value
+
+
+@lru_cache(maxsize=4096)
+def _serialize_attrs(items):
+    # None unless every value is a string: 1, 1.0 and True are equal keys
+    # here but different text, so such props are serialized uncached
+    for _, value in items:
+        if type(value) is not str:
+            return None
+    return "".join(f' {key}="{escape_attr(value)}"' for key, value in items)
+
+
+def _serialize_any_attrs(items):
+    return "".join(f' {key}="{escape_attr(str(value))}"' for key, value in items)
+
+
+def attrs_to_html(props):
+    # ' key="value"' for every prop, with a leading space; the same props,
+    # e.g. a link or image used on many pages, are serialized once
+    if not props:
+        return ""
+    items = tuple(props.items())
+    try:
+        html = _serialize_attrs(items)
+    except TypeError:
+        # an unhashable value, such as a list
+        html = None
+    return _serialize_any_attrs(items) if html is None else html
+
+
 class LeafTag(Enum):
     TEXT = None
     BOLD = "b"
@@ -13,79 +91,72 @@ class LeafTag(Enum):
     PARAGRAPH = "p"
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        self.tag = _intern_tag(tag)
         self.value = value
         self.children = children
-        self.props = props
+        self.props = props if props else EMPTY_PROPS
 
     def to_html(self):
         raise NotImplementedError("not implemented")
 
-    def props_to_html(self):
-        if self.props == None:
-            return ""
+    def write_html(self, write):
+        # stream the serialized node into write(str), e.g. file.write or list.append
+        write(self.to_html())
 
-        parts = []
-        for key, value in self.props.items():
-            parts.append(f'{key}="{value}"')
-        text = " ".join(parts)
-        return text
+    def props_to_html(self):
+        return attrs_to_html(self.props)[1:]
 
     def __repr__(self):
-        return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
+        props = None if self.props is EMPTY_PROPS else self.props
+        return f"HTMLNode({self.tag}, {self.value}, {self.children}, {props})"
 
 
 class LeafNode(HTMLNode):
-    def __init__(self, tag, value, props=None):
-        super().__init__(tag=tag, value=value, children=None, props=props)
+    __slots__ = ()
 
+    def __init__(self, tag, value, props=None):
         if tag is _MISSING:
             raise TypeError("tag is required (can be None)")
 
-        self.tag = tag
-        self.value = value
-        self.props = props
+        super().__init__(tag=tag, value=value, children=None, props=props)
 
     def to_html(self):
-
         if self.value is None:
             raise ValueError("Node has no value")
 
-        if self.tag is None:
-            return self.value
-        
-        if self.tag == "a":
-            attrs = ""
-            if self.props:
-                parts = [f'{k}="{v}"' for k, v in self.props.items()]
-                attrs = " " + " ".join(parts)
-            
-            return f'<{self.tag}{attrs}>{self.value}</{self.tag}>'
-        
-        if self.tag == "img":
-            attrs = ""
-            parts = []
-
-            for k, v in self.props.items():
-                parts.append(f'{k}="{v}"')
-            
-            attrs = " " + " ".join(parts) if parts else ""
-
-            return f'<{self.tag}{attrs}>'
-
-        else:
-            return f"<{self.tag}>{self.value}</{self.tag}>"
+        tag = self.tag
+        if tag is None:
+            return escape_text(self.value)
+        if tag in VOID_TAGS:
+            return f"<{tag}{attrs_to_html(self.props)}>"
+        return f"<{tag}{attrs_to_html(self.props)}>{escape_text(self.value)}</{tag}>"
+
+class RawNode(HTMLNode):
+    # Already-serialized HTML, e.g. a block served from the render cache.
+    __slots__ = ()
+
+    def __init__(self, html):
+        super().__init__(tag=None, value=html)
+
+    def to_html(self):
+        return self.value
+
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, value=None, children=children, props=props)
 
-        self.tag = tag
-        self.children = children
-        self.props = props
-
     def to_html(self):
+        parts = []
+        self.write_html(parts.append)
+        return "".join(parts)
+
+    def write_html(self, write):
 
         if self.tag is None:
             raise ValueError("Node has no tag")
@@ -93,14 +164,7 @@ class ParentNode(HTMLNode):
         if self.children is None:
             raise ValueError("Node has no children")
 
-        opening_tag = f"<{self.tag}>"
-        closing_tag = f"</{self.tag}>"
-
+        write(f"<{self.tag}{attrs_to_html(self.props)}>")
         for child in self.children:
-            opening_tag += child.to_html()
-        
-        return opening_tag + closing_tag
-        
-            
-
-        
\ No newline at end of file
+            child.write_html(write)
+        write(f"</{self.tag}>")
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import struct
+
+import instrument
+from assets import iter_files
+from manifest import hash_file
+
+IMAGE_EXTENSIONS = (".png", ".gif", ".jpg", ".jpeg", ".webp")
+# downscaled copies offered in srcset, when an imaging library is available
+VARIANT_WIDTHS = (480, 960, 1440)
+
+# site URL ("/images/tom.png") -> (width, height, [(variant url, width), ...]);
+# installed per build with configure(), read by the renderer
+index = {}
+# changes whenever anything in index does, for cache keys and page digests
+digest = ""
+
+
+def configure(new_index: dict) -> None:
+    global index, digest
+    index = new_index
+    digest = ""
+    if new_index:
+        digest = hashlib.sha256(json.dumps(sorted(new_index.items())).encode("utf-8")).hexdigest()
+
+
+def _png_size(head: bytes):
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    return None
+
+
+def _gif_size(head: bytes):
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", head[6:10])
+    return None
+
+
+def _webp_size(head: bytes):
+    if head[:4] != b"RIFF" or head[8:12] != b"WEBP":
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack("<HH", head[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and head[20:21] == b"\x2f":
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpeg_size(f):
+    # walk the segments up to the first start-of-frame marker
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        length = struct.unpack(">H", length)[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            h, w = struct.unpack(">HH", data[1:5])
+            return w, h
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def image_size(path: str) -> tuple[int, int] | None:
+    # (width, height) from the file header alone, or None if unrecognised
+    with open(path, "rb") as f:
+        head = f.read(32)
+        size = _png_size(head) or _gif_size(head) or _webp_size(head)
+        if size is None and head[:2] == b"\xff\xd8":
+            f.seek(0)
+            size = _jpeg_size(f)
+    return tuple(size) if size else None
+
+
+def _pillow():
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def variant_path(path: str, width: int) -> str:
+    # images/tom.png -> images/tom-480w.png
+    root, ext = os.path.splitext(path)
+    return f"{root}-{width}w{ext}"
+
+
+def make_variants(src: str, dest: str, size: tuple[int, int], widths) -> list[tuple[str, int]]:
+    # downscaled copies of src next to dest, one per width narrower than the
+    # original; returns (path, width) for each
+    Image = _pillow()
+    if Image is None:
+        return []
+
+    width, height = size
+    variants = []
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with Image.open(src) as image:
+        for w in sorted(widths):
+            if w >= width:
+                break
+            path = variant_path(dest, w)
+            image.resize((w, max(1, round(height * w / width))), Image.LANCZOS).save(path)
+            variants.append((path, w))
+    return variants
+
+
+def _site_url(path: str, root: str) -> str:
+    return "/" + os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def process_images(static_dir: str, dest_dir: str, manifest, widths=VARIANT_WIDTHS) -> dict:
+    # measure every image under static_dir and build its variants in dest_dir,
+    # redoing only images whose content changed; returns the index for configure()
+    tracer = instrument.tracer
+    settings = {"widths": sorted(widths) if _pillow() is not None else []}
+    if manifest.data["settings"].get("images") != settings:
+        # variants of widths no longer made must not linger
+        for output in manifest.prune("images", dest_dir):
+            tracer.count("outputs_removed")
+    manifest.use_settings("images", **settings)
+
+    new_index = {}
+    for src, st in iter_files(static_dir):
+        if not src.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+
+        entry = manifest.entry("images", src)
+        if entry is not None and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            content_hash = entry["hash"]
+        else:
+            content_hash = hash_file(src)
+
+        if entry is not None and entry["hash"] == content_hash and all(os.path.exists(p) for p in entry["outputs"]):
+            dimensions, variants = entry["dimensions"], entry["variants"]
+            tracer.count("images_unchanged")
+        else:
+            with tracer.span("image", path=src):
+                size = image_size(src)
+                made = []
+                if size is not None and settings["widths"]:
+                    dest = os.path.join(dest_dir, os.path.relpath(src, static_dir))
+                    made = make_variants(src, dest, size, settings["widths"])
+            dimensions = list(size) if size else None
+            variants = [[_site_url(path, dest_dir), w] for path, w in made]
+            entry = {"outputs": [path for path, _ in made]}
+            tracer.count("images_processed")
+
+        manifest.record(
+            "images",
+            src,
+            content_hash,
+            entry["outputs"],
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            dimensions=dimensions,
+            variants=variants,
+        )
+        if dimensions is not None:
+            new_index[_site_url(src, static_dir)] = (dimensions[0], dimensions[1], [tuple(v) for v in variants])
+
+    for output in manifest.prune("images", dest_dir):
+        tracer.debug(f"Removing stale image variant: {output}")
+        tracer.count("outputs_removed")
+
+    return new_index
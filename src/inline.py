@@ -0,0 +1,48 @@
+import re
+
+from textnode import TextNode, TextType
+
+__all__ = ["INLINE_PATTERN", "iter_inline_tokens", "tokenize_inline"]
+
+# One alternation, tried left to right at each position. Alternatives are
+# listed in the precedence the old split passes used (bold, italic, code,
+# image, link) so ties at the same offset resolve the same way.
+INLINE_PATTERN = re.compile(
+    r"\*\*(?P<bold>(?:(?!\*\*).)*)\*\*"
+    r"|_(?P<italic>[^_\n]*)_"
+    r"|`(?P<code>[^`\n]*)`"
+    r"|!\[(?P<alt>[^\[\]]*)\]\((?P<src>[^\(\)]*)\)"
+    r"|(?<!!)\[(?P<anchor>[^\[\]]*)\]\((?P<href>[^\(\)]*)\)"
+)
+
+
+def iter_inline_tokens(text: str):
+    # yields (offset, TextNode) pairs in a single scan over text
+    pos = 0
+    for match in INLINE_PATTERN.finditer(text):
+        start = match.start()
+        if start > pos:
+            yield pos, TextNode(text[pos:start], TextType.TEXT)
+
+        # lastgroup is the last group that closed: the url for images and links
+        kind = match.lastgroup
+        if kind == "bold":
+            node = TextNode(match.group("bold"), TextType.BOLD)
+        elif kind == "italic":
+            node = TextNode(match.group("italic"), TextType.ITALIC)
+        elif kind == "code":
+            node = TextNode(match.group("code"), TextType.CODE)
+        elif kind == "src":
+            node = TextNode(match.group("alt"), TextType.IMAGES, match.group("src"))
+        else:
+            node = TextNode(match.group("anchor"), TextType.LINKS, match.group("href"))
+        yield start, node
+
+        pos = match.end()
+
+    if pos < len(text):
+        yield pos, TextNode(text[pos:], TextType.TEXT)
+
+
+def tokenize_inline(text: str) -> list[TextNode]:
+    return [node for _, node in iter_inline_tokens(text)]
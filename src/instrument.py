@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+
+QUIET = 0
+SUMMARY = 1
+VERBOSE = 2
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    # Installed when nothing is reported or traced: every hook is a no-op.
+    enabled = False
+    level = QUIET
+    keep_events = False
+
+    def span(self, name, **args):
+        return _NULL_SPAN
+
+    def count(self, name, amount=1):
+        pass
+
+    def info(self, message):
+        pass
+
+    def debug(self, message):
+        pass
+
+    def export(self):
+        return None
+
+    def merge(self, data):
+        pass
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer._add(self.name, self.start, end - self.start, self.args)
+        return False
+
+
+class Tracer:
+    # Collects per-stage durations and counters; with keep_events it also
+    # keeps every span so the build can be written as a Chrome/Perfetto trace.
+    enabled = True
+
+    def __init__(self, level=SUMMARY, keep_events=False):
+        self.level = level
+        self.keep_events = keep_events
+        self.stages = {}
+        self.counters = {}
+        self.events = []
+        self.started = time.perf_counter_ns()
+        # spans and counters may be recorded from pipeline threads
+        self._lock = threading.Lock()
+
+    def span(self, name, **args):
+        return _Span(self, name, args)
+
+    def _add(self, name, start, duration, args):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                self.stages[name] = [1, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+
+        if self.keep_events:
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": duration / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+            if args:
+                event["args"] = args
+            self.events.append(event)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def info(self, message):
+        if self.level >= SUMMARY:
+            print(message)
+
+    def debug(self, message):
+        if self.level >= VERBOSE:
+            print(message)
+
+    def export(self):
+        return {"stages": self.stages, "counters": self.counters, "events": self.events}
+
+    def merge(self, data):
+        # fold in what a worker process recorded
+        if data is None:
+            return
+        for name, (count, duration) in data["stages"].items():
+            stats = self.stages.setdefault(name, [0, 0])
+            stats[0] += count
+            stats[1] += duration
+        for name, amount in data["counters"].items():
+            self.count(name, amount)
+        self.events.extend(data["events"])
+
+    def summary(self) -> str:
+        elapsed = (time.perf_counter_ns() - self.started) / 1e9
+        lines = [f"Build finished in {elapsed:.2f}s"]
+        if self.counters:
+            lines.append("  " + ", ".join(f"{name}={value}" for name, value in sorted(self.counters.items())))
+        for name, (count, duration) in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {name:<16} {count:>7}x {duration / 1e6:>10.1f} ms")
+        return "\n".join(lines)
+
+    def write_trace(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+tracer = NullTracer()
+
+
+def configure(level=SUMMARY, keep_events=False):
+    # install the process-wide tracer; quiet builds without a trace file get
+    # the no-op tracer so instrumentation costs nothing
+    global tracer
+    if level == QUIET and not keep_events:
+        tracer = NullTracer()
+    else:
+        tracer = Tracer(level, keep_events)
+    return tracer
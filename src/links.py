@@ -0,0 +1,96 @@
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+from assets import iter_files
+
+
+class BrokenLink:
+    __slots__ = ("source", "lineno", "kind", "url")
+
+    def __init__(self, source: str, lineno: int, kind: str, url: str):
+        self.source = source
+        self.lineno = lineno
+        self.kind = kind
+        self.url = url
+
+    def __str__(self):
+        return f"{self.source}:{self.lineno}: broken {self.kind} {self.url}"
+
+    def __repr__(self):
+        return f"BrokenLink({self.source!r}, {self.lineno}, {self.kind!r}, {self.url!r})"
+
+
+class BrokenLinkError(Exception):
+    def __init__(self, broken: list[BrokenLink]):
+        self.broken = broken
+        lines = [f"{len(broken)} broken link(s):"]
+        lines += [f"  {link}" for link in broken]
+        super().__init__("\n".join(lines))
+
+
+class LinkIndex:
+    # Every link and image URL the site's pages emit, as (line, kind, url)
+    # per source file, with the URL directory each page is served from so
+    # relative links can be resolved.
+
+    def __init__(self):
+        self.pages = {}
+
+    def add(self, source: str, page_dir: str, links) -> None:
+        self.pages[source] = (page_dir, [tuple(link) for link in links])
+
+    def __len__(self):
+        return sum(len(links) for _, links in self.pages.values())
+
+    def check(self, targets: set[str]) -> list[BrokenLink]:
+        broken = []
+        for source in sorted(self.pages):
+            page_dir, links = self.pages[source]
+            for lineno, kind, url in links:
+                if not resolves(url, page_dir, targets):
+                    broken.append(BrokenLink(source, lineno, kind, url))
+        return broken
+
+
+def page_dir(dest_path: str, output_dir: str) -> str:
+    # "/blog/tom/" for docs/blog/tom/index.html
+    rel = os.path.relpath(os.path.dirname(dest_path), output_dir).replace(os.sep, "/")
+    return "/" if rel == "." else f"/{rel}/"
+
+
+def output_targets(output_dir: str) -> set[str]:
+    # every servable path below output_dir, as "blog/tom/index.html"
+    return {
+        os.path.relpath(path, output_dir).replace(os.sep, "/") for path, _ in iter_files(output_dir)
+    }
+
+
+def page_relative(url: str) -> bool:
+    # whether url depends on the directory the page is served from
+    parts = urlsplit(url)
+    return not (parts.scheme or parts.netloc) and bool(parts.path) and not parts.path.startswith("/")
+
+
+def resolves(url: str, page_dir: str, targets: set[str]) -> bool:
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        # external: http:, mailto:, //cdn... are not ours to check
+        return True
+    if not parts.path:
+        # "#section" or "?q" on the page itself
+        return True
+
+    path = unquote(parts.path)
+    if not path.startswith("/"):
+        path = page_dir + path
+    path = posixpath.normpath(path).lstrip("/")
+    if path in ("", "."):
+        return "index.html" in targets
+    return path in targets or f"{path}/index.html" in targets
+
+
+def check_links(index: LinkIndex, output_dir: str) -> list[BrokenLink]:
+    # one pass after rendering: resolve every indexed URL against the pages
+    # and assets that ended up in output_dir
+    return index.check(output_targets(output_dir))
@@ -0,0 +1,160 @@
+import os
+import re
+
+import instrument
+from htmlnode import escape_attr, escape_text
+from links import page_dir
+from manifest import hash_bytes
+from output import write_output
+from template import load_template, resolve_template
+
+# posts are the pages below content/blog/; their listings go to docs/blog/
+BLOG_SECTION = "blog"
+POSTS_PER_PAGE = 10
+TAGS_DIR = "tags"
+FEED_NAME = "feed.xml"
+FEED_ENTRIES = 20
+
+_SLUG_PATTERN = re.compile(r"[^\w-]+")
+
+
+def tag_slug(tag: str) -> str:
+    return _SLUG_PATTERN.sub("-", tag).strip("-")
+
+
+def blog_posts(pages: list, metadata: dict, content_root: str, output_dir: str) -> list[dict]:
+    # metadata of every post plus the URL directory it is served from,
+    # newest first; undated posts come last, by title
+    posts = []
+    for from_path, dest_paths in pages:
+        parts = os.path.relpath(from_path, content_root).split(os.sep)
+        if parts[0] != BLOG_SECTION or parts[1:] in ([], ["index.md"]):
+            continue
+        posts.append({**metadata[from_path], "path": page_dir(dest_paths[0], output_dir)})
+    posts.sort(key=lambda post: post["title"])
+    posts.sort(key=lambda post: post["date"] or "", reverse=True)
+    return posts
+
+
+def post_list(posts: list[dict], basepath: str = "/") -> str:
+    items = []
+    for post in posts:
+        date = f' <time datetime="{post["date"]}">{post["date"]}</time>' if post["date"] else ""
+        items.append(f'<li><a href="{escape_attr(basepath + post["path"][1:])}">{escape_text(post["title"])}</a>{date}</li>')
+    return f'<ul class="posts">{"".join(items)}</ul>'
+
+
+def paginate(posts: list[dict], url_dir: str, per_page: int = POSTS_PER_PAGE) -> list[tuple[str, list, str | None, str | None]]:
+    # (url dir, posts, previous url dir, next url dir) per page: the first
+    # page at url_dir ("blog/"), the n-th at url_dir + "page/n/"
+    chunks = [posts[i:i + per_page] for i in range(0, len(posts), per_page)] or [[]]
+    dirs = [url_dir] + [f"{url_dir}page/{n}/" for n in range(2, len(chunks) + 1)]
+    return [
+        (dirs[i], chunk, dirs[i - 1] if i > 0 else None, dirs[i + 1] if i + 1 < len(dirs) else None)
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def _listing_pages(title: str, posts: list[dict], url_dir: str, basepath: str) -> dict[str, tuple[str, str]]:
+    # output path -> (title, content) for a paginated list of posts
+    pages = {}
+    for number, (directory, chunk, newer, older) in enumerate(paginate(posts, url_dir), 1):
+        links = []
+        if newer is not None:
+            links.append(f'<a href="{basepath}{newer}" rel="prev">Newer posts</a>')
+        if older is not None:
+            links.append(f'<a href="{basepath}{older}" rel="next">Older posts</a>')
+        nav = f'<nav class="pagination">{" ".join(links)}</nav>' if links else ""
+        page_title = title if number == 1 else f"{title}, page {number}"
+        content = f"<div><h1>{escape_text(page_title)}</h1>{post_list(chunk, basepath)}{nav}</div>"
+        pages[f"{directory}index.html"] = (page_title, content)
+    return pages
+
+
+def atom_feed(posts: list[dict], title: str, site_url: str = "", basepath: str = "/") -> str:
+    # the newest dated posts; links are absolute when site_url is given
+    base = site_url.rstrip("/") + basepath
+    dated = [post for post in posts if post["date"]][:FEED_ENTRIES]
+    updated = dated[0]["date"] if dated else "1970-01-01"
+    entries = []
+    for post in dated:
+        url = escape_attr(base + post["path"][1:])
+        categories = "".join(f'<category term="{escape_attr(tag)}"/>' for tag in post["tags"])
+        entries.append(
+            f'<entry><title>{escape_text(post["title"])}</title><link href="{url}"/><id>{url}</id>'
+            f'<updated>{post["date"]}T00:00:00Z</updated>{categories}</entry>'
+        )
+    blog = escape_attr(f"{base}{BLOG_SECTION}/")
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>{escape_text(title)}</title><link href="{blog}{FEED_NAME}" rel="self"/><link href="{blog}"/>'
+        f"<id>{blog}</id><updated>{updated}T00:00:00Z</updated>{''.join(entries)}</feed>\n"
+    )
+
+
+def generate_listings(
+    pages: list,
+    metadata: dict,
+    content_root: str,
+    template_path: str,
+    output_dir: str,
+    basepath: str = "/",
+    slots: dict | None = None,
+    manifest=None,
+    site_url: str = "",
+) -> None:
+    # blog index, tag pages and feed, built from the metadata index alone:
+    # no post is read or rendered. Outputs are rewritten only when their
+    # bytes change, and ones no longer produced (an unused tag) are removed.
+    tracer = instrument.tracer
+    posts = blog_posts(pages, metadata, content_root, output_dir)
+
+    listings = {}
+    if posts:
+        listings.update(_listing_pages("Blog", posts, f"{BLOG_SECTION}/", basepath))
+        tags = sorted({tag for post in posts for tag in post["tags"] if tag_slug(tag)})
+        for tag in tags:
+            tagged = [post for post in posts if tag in post["tags"]]
+            listings.update(_listing_pages(f"Posts tagged {tag}", tagged, f"{TAGS_DIR}/{tag_slug(tag)}/", basepath))
+        if tags:
+            items = "".join(
+                f'<li><a href="{basepath}{TAGS_DIR}/{tag_slug(tag)}/">{escape_text(tag)}</a> '
+                f"({sum(tag in post['tags'] for post in posts)})</li>"
+                for tag in tags
+            )
+            listings[f"{TAGS_DIR}/index.html"] = ("Tags", f'<div><h1>Tags</h1><ul class="tags">{items}</ul></div>')
+
+    outputs = {}
+    taken = {os.path.normpath(dest) for _, dest_paths in pages for dest in dest_paths}
+    for rel, (title, content) in listings.items():
+        path = os.path.join(output_dir, *rel.split("/"))
+        if os.path.normpath(path) in taken:
+            # a hand-written page (content/blog/index.md) wins over the generated one
+            continue
+        # a section's own template.html applies to its listings too
+        section_page = os.path.join(content_root, rel.split("/")[0], "index.md")
+        template = load_template(resolve_template(section_page, content_root, template_path), basepath)
+        outputs[path] = template.render({**(slots or {}), "Title": escape_attr(title), "Content": content})
+    if posts:
+        home = metadata.get(os.path.join(content_root, "index.md"))
+        feed_title = home["title"] if home is not None and home["title"] else "Blog"
+        outputs[os.path.join(output_dir, BLOG_SECTION, FEED_NAME)] = atom_feed(posts, feed_title, site_url, basepath)
+
+    for path, text in outputs.items():
+        data = text.encode("utf-8")
+        digest = hash_bytes(data)
+        if manifest is not None and manifest.is_fresh("listings", path, digest):
+            manifest.keep("listings", path)
+            tracer.count("listings_unchanged")
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_output(path, data)
+        if manifest is not None:
+            manifest.record("listings", path, digest, [path])
+        tracer.count("listings_written")
+
+    if manifest is not None:
+        for output in manifest.prune("listings", output_dir):
+            tracer.debug(f"Removing stale listing: {output}")
+            tracer.count("outputs_removed")
@@ -1,59 +1,613 @@
+import argparse
 import os
 import shutil
 import sys
 
-from generate_page import *
+import images
+import instrument
+from generate_page import STREAM_THRESHOLD, PageBuildError, generate_pages_recursive
+from assets import LINK_MODES, sync_assets
+from converter import RENDERERS, configure_renderer
+from manifest import BuildManifest
+from render_cache import RenderCache
+
+# the optional stages (search, shard, compress, pipeline, ...) are imported
+# where a build uses them, not on every start; their defaults are repeated
+# here for the parser, and test_startup checks they match
+QUEUE_SIZE = 16
+COMPRESS_LEVEL = 9
+COMPRESS_MIN_SIZE = 1024
+
+LINK_CHECK_MODES = ("warn", "error", "off")
+
+CONTENT_DIR = "content"
+STATIC_DIR = "static"
+TEMPLATE_PATH = "template.html"
+OUTPUT_DIR = "docs"
+MANIFEST_PATH = os.path.join(".cache", "build-manifest.json")
+# shard builds ("--shard 2/4") go to shards/2-of-4 for "main.py merge"
+SHARDS_DIR = "shards"
+RENDER_CACHE_DIR = os.path.join(".cache", "render")
 
 
 def copy_directory_recursive(src_dir: str, dest_dir: str) -> None:
-    for entry in os.listdir(src_dir):
-        src_path = os.path.join(src_dir, entry)
-        dest_path = os.path.join(dest_dir, entry)
+    with os.scandir(src_dir) as entries:
+        entries = list(entries)
 
-        if os.path.isfile(src_path):
-            print(f"Copying file: {src_path} -> {dest_path}")
+    for entry in entries:
+        src_path = entry.path
+        dest_path = os.path.join(dest_dir, entry.name)
+
+        if entry.is_file():
+            instrument.tracer.debug(f"Copying file: {src_path} -> {dest_path}")
             shutil.copy(src_path, dest_path)
+            instrument.tracer.count("static_copied")
         else:
-            print(f"Creating directory: {dest_path}")
+            instrument.tracer.debug(f"Creating directory: {dest_path}")
             os.makedirs(dest_path, exist_ok=True)
             copy_directory_recursive(src_path, dest_path)
 
 
-def copy_static_to_dest(static_dir: str, dest_dir: str) -> None:
+def copy_static_to_dest(
+    static_dir: str,
+    dest_dir: str,
+    manifest: BuildManifest | None = None,
+    verify_hash: bool = False,
+    link_mode: str = "auto",
+) -> None:
     if not os.path.exists(static_dir):
         raise FileNotFoundError(f"Source directory does not exist: {static_dir}")
 
+    if manifest is not None:
+        # incremental: only copy what changed and drop outputs of deleted assets
+        os.makedirs(dest_dir, exist_ok=True)
+        sync_assets(static_dir, dest_dir, manifest, verify_hash, link_mode)
+        return
+
     if os.path.exists(dest_dir):
-        print(f"Deleting existing directory: {dest_dir}")
+        instrument.tracer.debug(f"Deleting existing directory: {dest_dir}")
         shutil.rmtree(dest_dir)
 
-    print(f"Creating directory: {dest_dir}")
+    instrument.tracer.debug(f"Creating directory: {dest_dir}")
     os.makedirs(dest_dir, exist_ok=True)
 
     copy_directory_recursive(static_dir, dest_dir)
 
 
-def main():
-    # basepath from CLI: default "/"
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-
+def normalize_basepath(basepath: str) -> str:
     # normalize basepath to always start and end with "/"
     if not basepath.startswith("/"):
         basepath = "/" + basepath
     if not basepath.endswith("/"):
         basepath = basepath + "/"
+    return basepath
+
+
+def report_broken_links(link_index, output_dir: str, link_check: str) -> None:
+    from links import BrokenLinkError, check_links
+
+    tracer = instrument.tracer
+    with tracer.span("links"):
+        broken = check_links(link_index, output_dir)
+    tracer.count("links_checked", len(link_index))
+    tracer.count("links_broken", len(broken))
+    if broken and link_check == "error":
+        raise BrokenLinkError(broken)
+    for link in broken:
+        print(f"warning: {link}", file=sys.stderr)
+
+
+def build_site(
+    basepath: str = "/",
+    clean: bool = False,
+    jobs: int = 1,
+    level: int = instrument.SUMMARY,
+    trace_path: str | None = None,
+    verify_hash: bool = False,
+    link_mode: str = "auto",
+    cache: RenderCache | None = None,
+    stream_threshold: int | None = STREAM_THRESHOLD,
+    link_check: str = "warn",
+    queue_size: int | None = None,
+    compress_level: int | None = None,
+    compress_min_size: int = COMPRESS_MIN_SIZE,
+    compress_jobs: int | None = None,
+    image_widths: tuple[int, ...] = images.VARIANT_WIDTHS,
+    explain: bool = False,
+    search_index: bool = False,
+    shard: tuple[int, int] | None = None,
+    drafts: bool = False,
+    listings: bool = False,
+    site_url: str = "",
+    renderer: str = "direct",
+) -> None:
+    tracer = instrument.configure(level, keep_events=trace_path is not None)
+    configure_renderer(renderer)
+
+    output_dir = OUTPUT_DIR
+    manifest_path = MANIFEST_PATH
+    if shard is not None:
+        from shard import shard_dir, write_shard_info
+
+        # a shard renders its slice of the pages, plus every static file,
+        # into a directory and manifest of its own
+        output_dir = shard_dir(SHARDS_DIR, shard)
+        manifest_path = os.path.join(".cache", f"build-manifest-{shard[0]}-of-{shard[1]}.json")
+
+    try:
+        with tracer.span("static"):
+            if clean:
+                manifest = BuildManifest(manifest_path)
+                if os.path.exists(output_dir):
+                    tracer.debug(f"Deleting existing directory: {output_dir}")
+                    shutil.rmtree(output_dir)
+            else:
+                manifest = BuildManifest.load(manifest_path)
+            copy_static_to_dest(STATIC_DIR, output_dir, manifest, verify_hash, link_mode)
+
+        with tracer.span("images"):
+            images.configure(images.process_images(STATIC_DIR, output_dir, manifest, image_widths))
+
+        try:
+            with tracer.span("pages"):
+                link_index = generate_pages_recursive(
+                    dir_path_content=CONTENT_DIR,
+                    template_path=TEMPLATE_PATH,
+                    dest_dir_path=output_dir,
+                    basepath=basepath,
+                    manifest=manifest,
+                    jobs=jobs,
+                    cache=cache,
+                    stream_threshold=stream_threshold,
+                    queue_size=queue_size,
+                    explain=explain,
+                    shard=shard,
+                    drafts=drafts,
+                    listings=listings,
+                    site_url=site_url,
+                )
+            if shard is not None:
+                write_shard_info(output_dir, shard, basepath, link_index, manifest)
+            if search_index:
+                from search import build_search_index
+
+                with tracer.span("search"):
+                    pages = {source: page_dir for source, (page_dir, _) in link_index.pages.items()}
+                    index = build_search_index(pages, output_dir, basepath, manifest)
+                tracer.info(f"Search index covers {len(index.docs)} page(s)")
+            else:
+                from search import remove_search_index
+
+                remove_search_index(output_dir)
+            if compress_level is not None:
+                from compress import precompress
+
+                with tracer.span("compress"):
+                    saved = precompress(output_dir, manifest, compress_level, compress_min_size, compress_jobs)
+                tracer.info(
+                    "Precompressed outputs save "
+                    + ", ".join(f"{n / 1024:.1f} KiB as .{fmt}" for fmt, n in saved.items())
+                )
+            elif manifest.data["compressed"]:
+                from compress import remove_precompressed
+
+                remove_precompressed(output_dir, manifest)
+        finally:
+            # only successfully built pages are recorded, so partial progress is kept
+            manifest.save()
+            if cache is not None:
+                cache.prune_disk()
+
+        if shard is not None:
+            # links into other shards only resolve once they are merged
+            tracer.info(f"Built shard {shard[0]}/{shard[1]} into {output_dir}; links are checked by merge")
+        elif link_check != "off":
+            report_broken_links(link_index, output_dir, link_check)
+    finally:
+        if tracer.enabled:
+            tracer.info(tracer.summary())
+            if cache is not None:
+                tracer.info(cache.summary())
+        if trace_path is not None:
+            tracer.write_trace(trace_path)
+            tracer.info(f"Wrote trace to {trace_path}")
 
-    output_dir = "docs"
 
-    copy_static_to_dest("static", output_dir)
+def merge_site(
+    shard_dirs: list[str],
+    level: int = instrument.SUMMARY,
+    link_mode: str = "auto",
+    link_check: str = "warn",
+) -> None:
+    # combine the outputs of "--shard i/N" builds into docs/
+    from shard import merge_shards
 
-    generate_pages_recursive(
-        dir_path_content="content",
-        template_path="template.html",
-        dest_dir_path=output_dir,
-        basepath=basepath,
+    tracer = instrument.configure(level)
+    try:
+        with tracer.span("merge"):
+            link_index = merge_shards(shard_dirs, OUTPUT_DIR, link_mode)
+        if link_check != "off":
+            report_broken_links(link_index, OUTPUT_DIR, link_check)
+    finally:
+        if tracer.enabled:
+            tracer.info(tracer.summary())
+
+
+def parse_shard_arg(text: str) -> tuple[int, int]:
+    from shard import parse_shard
+
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_widths(text: str) -> tuple[int, ...]:
+    try:
+        widths = tuple(int(part) for part in text.split(",") if part.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a comma-separated list of widths: {text!r}")
+    if any(width < 1 for width in widths):
+        raise argparse.ArgumentTypeError("widths must be positive")
+    return widths
+
+
+def add_build_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="render pages on N worker processes (default 1)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading, rendering and writing of pages on one process with asyncio",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=QUEUE_SIZE,
+        metavar="N",
+        help=f"pages buffered between pipeline stages (default {QUEUE_SIZE})",
+    )
+    parser.add_argument(
+        "--hash-assets",
+        action="store_true",
+        help="when a static file's mtime changes, compare content hashes before copying",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="auto",
+        help="how static files are placed in docs/: auto tries reflink, then copy_file_range, then a plain copy",
+    )
+    parser.add_argument(
+        "--no-render-cache",
+        dest="render_cache",
+        action="store_false",
+        help="render every markdown block from scratch",
+    )
+    parser.add_argument(
+        "--render-cache-dir",
+        default=RENDER_CACHE_DIR,
+        metavar="DIR",
+        help=f"on-disk store for rendered blocks (default {RENDER_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--render-cache-entries",
+        type=int,
+        default=20_000,
+        metavar="N",
+        help="blocks kept in the in-memory LRU (default 20000)",
+    )
+    parser.add_argument(
+        "--render-cache-memory",
+        type=int,
+        default=64,
+        metavar="MB",
+        help="size limit of the in-memory LRU (default 64)",
+    )
+    parser.add_argument(
+        "--render-cache-disk",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="size limit of the on-disk store, least recently used dropped first (default 256)",
+    )
+    parser.add_argument(
+        "--stream-threshold",
+        type=float,
+        default=STREAM_THRESHOLD / 2**20,
+        metavar="MB",
+        help="read and render sources of at least this size block by block from disk with bounded memory; "
+        "smaller sources are parsed whole, and every page's HTML is streamed into its output file "
+        f"(default {STREAM_THRESHOLD // 2**20})",
+    )
+    parser.add_argument(
+        "--link-check",
+        choices=LINK_CHECK_MODES,
+        default="warn",
+        help="after the build, report links and images whose targets were not generated; "
+        "error fails the build (default warn)",
+    )
+    parser.add_argument(
+        "--image-widths",
+        type=parse_widths,
+        default=images.VARIANT_WIDTHS,
+        metavar="W,W,...",
+        help="widths of the downscaled image copies offered in srcset when Pillow is installed; "
+        "empty for none (default " + ",".join(map(str, images.VARIANT_WIDTHS)) + ")",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write .gz siblings (and .br ones when brotli is installed) of every HTML, CSS, JS and SVG output, "
+        "for servers that send them as-is",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=COMPRESS_LEVEL,
+        metavar="N",
+        help=f"compression level 1-9; brotli uses quality N+2 (default {COMPRESS_LEVEL})",
+    )
+    parser.add_argument(
+        "--compress-min-size",
+        type=int,
+        default=COMPRESS_MIN_SIZE,
+        metavar="BYTES",
+        help=f"leave outputs smaller than this uncompressed (default {COMPRESS_MIN_SIZE})",
     )
+    parser.add_argument(
+        "--compress-jobs",
+        type=int,
+        metavar="N",
+        help="compress on N worker processes once at least 1 MiB of outputs changed; "
+        "smaller batches are compressed serially (default one per CPU)",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=sorted(RENDERERS),
+        default="direct",
+        help="how markdown becomes HTML: direct writes HTML text straight from the parsed markup, "
+        "tree goes through HTMLNode objects; both produce the same pages (default direct)",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also build pages whose front matter says draft: true",
+    )
+    parser.add_argument(
+        "--listings",
+        action="store_true",
+        help="generate paginated blog/ index pages, tags/ pages and blog/feed.xml (Atom) "
+        "from the front matter of the posts in content/blog/",
+    )
+    parser.add_argument(
+        "--site-url",
+        default="",
+        metavar="URL",
+        help="scheme and host the site is served from (https://example.com), for absolute links in the feed",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="write docs/search-index.json.gz, a gzipped inverted index of page words and titles "
+        "for client-side search; pages that did not change are not re-read",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="print why each page is rebuilt (new, source, template or partial changed, ...)",
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "--quiet", "-q", dest="level", action="store_const", const=instrument.QUIET, help="print nothing"
+    )
+    verbosity.add_argument(
+        "--verbose",
+        "-v",
+        dest="level",
+        action="store_const",
+        const=instrument.VERBOSE,
+        help="print every page and file as it is processed",
+    )
+    parser.set_defaults(level=instrument.SUMMARY)
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="write a Chrome/Perfetto trace of the build to FILE",
+    )
+
+
+def check_build_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.pipeline and args.jobs > 1:
+        parser.error("--pipeline runs on one process; it cannot be combined with --jobs")
+    if args.queue_size < 1:
+        parser.error("--queue-size must be at least 1")
+    if args.compress_jobs is not None and args.compress_jobs < 1:
+        parser.error("--compress-jobs must be at least 1")
+    if not 1 <= args.compress_level <= 9:
+        parser.error("--compress-level must be between 1 and 9")
+
+
+def make_render_cache(args: argparse.Namespace) -> RenderCache | None:
+    if not args.render_cache:
+        return None
+    return RenderCache(
+        cache_dir=args.render_cache_dir,
+        max_entries=args.render_cache_entries,
+        max_memory_bytes=args.render_cache_memory * 2**20,
+        max_disk_bytes=args.render_cache_disk * 2**20,
+    )
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the static site into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/", help='URL prefix of the site (default "/")')
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="ignore the build manifest and rebuild docs/ from scratch",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard_arg,
+        metavar="i/N",
+        help=f"render only the i-th of N slices of the pages (split by a stable hash of their path) "
+        f"into {SHARDS_DIR}/i-of-N; combine the N shards with 'main.py merge'",
+    )
+    add_build_arguments(parser)
+    args = parser.parse_args(argv)
+    check_build_arguments(parser, args)
+    return args
+
+
+def parse_serve_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py serve", description="Build the site and serve docs/ for local development."
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild on changes to content/, static/ and template.html and reload open pages",
+    )
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between change polls")
+    parser.add_argument("--debounce", type=float, default=0.2, help="quiet seconds to wait before rebuilding")
+    add_build_arguments(parser)
+    args = parser.parse_args(argv)
+    check_build_arguments(parser, args)
+    return args
+
+
+def parse_merge_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py merge", description="Combine the outputs of sharded builds into docs/."
+    )
+    parser.add_argument(
+        "shard_dirs",
+        nargs="*",
+        metavar="DIR",
+        help=f"shard output directories (default: every {SHARDS_DIR}/i-of-N)",
+    )
+    parser.add_argument("--link-mode", choices=LINK_MODES, default="auto", help="how files are placed into docs/")
+    parser.add_argument("--link-check", choices=LINK_CHECK_MODES, default="warn")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "--quiet", "-q", dest="level", action="store_const", const=instrument.QUIET, help="print nothing"
+    )
+    verbosity.add_argument(
+        "--verbose",
+        "-v",
+        dest="level",
+        action="store_const",
+        const=instrument.VERBOSE,
+        help="print every file as it is placed into docs/",
+    )
+    parser.set_defaults(level=instrument.SUMMARY)
+    args = parser.parse_args(argv)
+    if not args.shard_dirs:
+        found = sorted(os.listdir(SHARDS_DIR)) if os.path.isdir(SHARDS_DIR) else []
+        args.shard_dirs = [os.path.join(SHARDS_DIR, name) for name in found if "-of-" in name]
+        if not args.shard_dirs:
+            parser.error(f"no shard directories given or found in {SHARDS_DIR}/")
+    return args
+
+
+def run(argv: list[str]) -> None:
+    if argv and argv[0] == "bench":
+        from bench import main as bench_main
+
+        sys.exit(bench_main(argv[1:]))
+
+    if argv and argv[0] == "merge":
+        args = parse_merge_args(argv[1:])
+        merge_site(args.shard_dirs, args.level, args.link_mode, args.link_check)
+        return
+
+    if argv and argv[0] == "serve":
+        args = parse_serve_args(argv[1:])
+        from serve import serve
+
+        # one cache for the whole session so its memory tier survives rebuilds
+        cache = make_render_cache(args)
+
+        serve(
+            build=lambda: build_site(
+                jobs=args.jobs,
+                level=args.level,
+                trace_path=args.trace,
+                verify_hash=args.hash_assets,
+                link_mode=args.link_mode,
+                cache=cache,
+                stream_threshold=int(args.stream_threshold * 2**20),
+                link_check=args.link_check,
+                queue_size=args.queue_size if args.pipeline else None,
+                compress_level=args.compress_level if args.compress else None,
+                compress_min_size=args.compress_min_size,
+                compress_jobs=args.compress_jobs,
+                image_widths=args.image_widths,
+                explain=args.explain,
+                search_index=args.search_index,
+                drafts=args.drafts,
+                listings=args.listings,
+                site_url=args.site_url,
+                renderer=args.renderer,
+            ),
+            output_dir=OUTPUT_DIR,
+            watch_paths=[CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH] if args.watch else [],
+            host=args.host,
+            port=args.port,
+            interval=args.interval,
+            debounce=args.debounce,
+        )
+        return
+
+    args = parse_args(argv)
+
+    # basepath from CLI: default "/"
+    basepath = normalize_basepath(args.basepath)
+
+    build_site(
+        basepath,
+        clean=args.clean,
+        jobs=args.jobs,
+        level=args.level,
+        trace_path=args.trace,
+        verify_hash=args.hash_assets,
+        link_mode=args.link_mode,
+        cache=make_render_cache(args),
+        stream_threshold=int(args.stream_threshold * 2**20),
+        link_check=args.link_check,
+        queue_size=args.queue_size if args.pipeline else None,
+        compress_level=args.compress_level if args.compress else None,
+        compress_min_size=args.compress_min_size,
+        compress_jobs=args.compress_jobs,
+        image_widths=args.image_widths,
+        explain=args.explain,
+        search_index=args.search_index,
+        shard=args.shard,
+        drafts=args.drafts,
+        listings=args.listings,
+        site_url=args.site_url,
+        renderer=args.renderer,
+    )
+
+
+def main():
+    try:
+        run(sys.argv[1:])
+    except PageBuildError as e:
+        # the failures are collected per page already; a traceback adds nothing
+        sys.exit(f"error: {e}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
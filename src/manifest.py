@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def remove_output(path: str, stop_dir: str) -> None:
+    # delete a generated file, then any directories it leaves empty below stop_dir
+    if os.path.isfile(path) or os.path.islink(path):
+        os.remove(path)
+
+    stop_dir = os.path.abspath(stop_dir)
+    parent = os.path.dirname(os.path.abspath(path))
+    while parent.startswith(stop_dir + os.sep):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+class BuildManifest:
+    # Records, per section ("pages", "static", "images", "compressed", "metadata", "listings"), the
+    # content hash of each source file and the output paths it produced during the last build.
+
+    def __init__(self, path: str, data: dict | None = None):
+        self.path = path
+        self.data = data if data is not None else self._empty()
+        self.seen = {}
+
+    @staticmethod
+    def _empty() -> dict:
+        sections = ("pages", "static", "images", "compressed", "metadata", "listings")
+        return {"version": MANIFEST_VERSION, "settings": {}, **{section: {} for section in sections}}
+
+    @classmethod
+    def load(cls, path: str) -> "BuildManifest":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+
+        # sections added since the file was written start out empty
+        for section, value in cls._empty().items():
+            data.setdefault(section, value)
+        return cls(path, data)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def use_settings(self, section: str, **settings) -> bool:
+        # forget every entry of a section when the settings it was built with change
+        previous = self.data["settings"].get(section)
+        self.data["settings"][section] = settings
+        if previous == settings:
+            return False
+        self.data[section] = {}
+        return True
+
+    def is_fresh(self, section: str, src: str, digest: str) -> bool:
+        entry = self.data[section].get(src)
+        if entry is None or entry["hash"] != digest:
+            return False
+        return all(os.path.exists(output) for output in entry["outputs"])
+
+    def entry(self, section: str, src: str) -> dict | None:
+        return self.data[section].get(src)
+
+    def keep(self, section: str, src: str) -> None:
+        self.seen.setdefault(section, set()).add(src)
+
+    def record(self, section: str, src: str, digest: str | None, outputs: list[str], **extra) -> None:
+        self.data[section][src] = {"hash": digest, "outputs": list(outputs), **extra}
+        self.keep(section, src)
+
+    def prune(self, section: str, stop_dir: str) -> list[str]:
+        # drop entries whose sources were not seen in this build and delete their outputs
+        seen = self.seen.get(section, set())
+        removed = []
+        for src in sorted(set(self.data[section]) - seen):
+            for output in self.data[section].pop(src)["outputs"]:
+                remove_output(output, stop_dir)
+                removed.append(output)
+        return removed
@@ -0,0 +1,112 @@
+import errno
+import hashlib
+import os
+
+from htmlnode import escape_attr
+from manifest import hash_bytes, hash_file
+
+__all__ = ["write_output", "write_output_stream", "link_alias", "redirect_page"]
+
+# os.link failures that mean "not on this filesystem" rather than a real error
+_NO_LINK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOSYS, errno.EOPNOTSUPP}
+
+
+def _temp_path(path: str) -> str:
+    # a hidden sibling, so the rename stays on one filesystem and is atomic
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+
+
+def _holds(path: str, size: int, digest: str) -> bool:
+    # whether path already holds the bytes of that size and hash
+    try:
+        return os.path.getsize(path) == size and hash_file(path) == digest
+    except OSError:
+        return False
+
+
+def write_output(path: str, data: bytes) -> bool:
+    # replace path (in an existing directory) with data through a temp file
+    # and a rename, so a server never sees half a page; a file already holding
+    # exactly these bytes is left alone, mtime included. Returns whether the
+    # file was written.
+    if _holds(path, len(data), hash_bytes(data)):
+        return False
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def write_output_stream(path: str, produce) -> tuple[bool, int]:
+    # the same for text produced piecewise by produce(write): it streams into
+    # the temp file while being hashed, so a big page never sits in memory.
+    # Returns whether the file was written and its size.
+    tmp_path = _temp_path(path)
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            def write(text: str) -> None:
+                nonlocal size
+                data = text.encode("utf-8")
+                h.update(data)
+                size += len(data)
+                f.write(data)
+
+            produce(write)
+        if _holds(path, size, h.hexdigest()):
+            os.remove(tmp_path)
+            return False, size
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True, size
+
+
+def redirect_page(url: str) -> bytes:
+    url = escape_attr(url)
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<link rel="canonical" href="{url}"><meta http-equiv="refresh" content="0; url={url}">'
+        f'</head><body><a href="{url}">{url}</a></body></html>\n'
+    ).encode("utf-8")
+
+
+def link_alias(target: str, alias: str, redirect: bool = False) -> str:
+    # make alias serve target's page without rendering it again: a hardlink
+    # where the filesystem allows one, else a small redirect page. A page with
+    # page-relative URLs always gets the redirect (redirect=True), as a copy
+    # served from the alias's directory would resolve them elsewhere.
+    # Returns "unchanged", "hardlink" or "redirect".
+    if not redirect:
+        try:
+            if os.path.samefile(target, alias):
+                return "unchanged"
+        except OSError:
+            pass
+
+        tmp_path = _temp_path(alias)
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(target, tmp_path)
+        except OSError as e:
+            if e.errno not in _NO_LINK_ERRNOS:
+                raise
+        else:
+            os.replace(tmp_path, alias)
+            return "hardlink"
+
+    url = os.path.relpath(target, os.path.dirname(alias)).replace(os.sep, "/")
+    if url == "index.html" or url.endswith("/index.html"):
+        url = url[: -len("index.html")] or "./"
+    return "redirect" if write_output(alias, redirect_page(url)) else "unchanged"
@@ -0,0 +1,106 @@
+import os
+import time
+
+import converter
+import images
+import instrument
+from render_cache import RenderCache
+
+# one render cache per worker process, reused across the chunks it runs
+_worker_cache = None
+
+
+def _render_chunk(
+    chunk, basepath, slots, level, keep_events, cache_config, stream_threshold, image_index, renderer
+):
+    # runs inside a worker process: render every page of the chunk, never raise
+    from generate_page import render_page
+
+    images.configure(image_index)
+    converter.configure_renderer(renderer)
+
+    global _worker_cache
+    cache = None
+    if cache_config is not None:
+        if _worker_cache is None or _worker_cache.config() != cache_config:
+            _worker_cache = RenderCache(**cache_config)
+        cache = _worker_cache
+        stats_before = dict(cache.stats)
+
+    # a fresh tracer per chunk; what it records is merged into the parent's
+    tracer = instrument.configure(level, keep_events)
+    start = time.perf_counter()
+    results = []
+    for from_path, dest_paths, template_path in chunk:
+        try:
+            links = render_page(from_path, dest_paths, template_path, basepath, slots, cache, stream_threshold)
+        except Exception as e:
+            results.append((from_path, dest_paths, None, f"{type(e).__name__}: {e}"))
+        else:
+            results.append((from_path, dest_paths, links, None))
+    cache_stats = None
+    if cache is not None:
+        cache_stats = {name: value - stats_before[name] for name, value in cache.stats.items()}
+    return os.getpid(), results, time.perf_counter() - start, tracer.export(), cache_stats
+
+
+def chunk_pages(pages: list, jobs: int) -> list[list]:
+    # aim for a few chunks per worker so slow pages do not leave cores idle
+    size = max(1, min(64, len(pages) // (jobs * 4)))
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+def render_pages_parallel(
+    pages: list,
+    basepath: str,
+    slots: dict,
+    jobs: int,
+    cache=None,
+    stream_threshold: int | None = None,
+):
+    built = []
+    failures = []
+    workers = {}
+
+    tracer = instrument.tracer
+    cache_config = cache.config() if cache is not None else None
+    start = time.perf_counter()
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(
+                _render_chunk,
+                chunk,
+                basepath,
+                slots,
+                tracer.level,
+                tracer.keep_events,
+                cache_config,
+                stream_threshold,
+                images.index,
+                converter.default_renderer.name,
+            )
+            for chunk in chunk_pages(pages, jobs)
+        ]
+        for future in futures:
+            pid, results, elapsed, recorded, cache_stats = future.result()
+            tracer.merge(recorded)
+            if cache_stats is not None:
+                cache.merge_stats(cache_stats)
+            count, busy = workers.get(pid, (0, 0.0))
+            workers[pid] = (count + len(results), busy + elapsed)
+
+            for from_path, dest_paths, links, error in results:
+                if error is None:
+                    built.append((from_path, dest_paths, links))
+                else:
+                    failures.append((from_path, error))
+    wall = time.perf_counter() - start
+
+    tracer.info(f"Rendered {len(built)} page(s) on {len(workers)} worker(s) in {wall:.2f}s")
+    for pid, (count, busy) in sorted(workers.items()):
+        rate = count / busy if busy > 0 else float("inf")
+        tracer.info(f"  worker {pid}: {count} page(s) in {busy:.2f}s ({rate:.1f} pages/s)")
+
+    return built, failures
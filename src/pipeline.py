@@ -0,0 +1,172 @@
+import os
+from collections import deque
+
+import instrument
+from generate_page import fill_page_values, render_page, write_aliases
+from output import write_output
+from template import load_template
+
+# pages allowed to wait between two stages; a full queue stalls the stage
+# feeding it, which keeps memory bounded whatever the size of the site
+QUEUE_SIZE = 16
+# rendered pages handed to one writer call
+WRITE_BATCH = 32
+# threads that read sources and write outputs
+IO_THREADS = 4
+
+_DONE = object()
+
+
+def _read(from_path: str) -> str:
+    tracer = instrument.tracer
+    with tracer.span("read", path=from_path):
+        with open(from_path, "r", encoding="utf-8") as f:
+            markdown = f.read()
+            if tracer.enabled:
+                tracer.count("bytes_read", os.fstat(f.fileno()).st_size)
+    return markdown
+
+
+def _render(from_path: str, markdown: str, template_path: str, basepath: str, slots: dict, cache):
+    tracer = instrument.tracer
+    links = []
+    with tracer.span("parse", path=from_path):
+        template = load_template(template_path, basepath)
+        values = dict(slots) if slots else {}
+        fill_page_values(values, markdown, template, basepath, cache, links)
+        html = template.render(values)
+    return html, links
+
+
+def _write_batch(batch: list, created: set) -> list:
+    # one makedirs per new directory across the whole batch; returns
+    # (from_path, error) for every page that could not be written
+    tracer = instrument.tracer
+    failures = []
+    with tracer.span("write", pages=len(batch)):
+        for from_path, dest_paths, html, links in batch:
+            try:
+                parent = os.path.dirname(dest_paths[0])
+                if parent not in created:
+                    os.makedirs(parent, exist_ok=True)
+                    created.add(parent)
+                data = html.encode("utf-8")
+                if write_output(dest_paths[0], data):
+                    tracer.count("bytes_written", len(data))
+                else:
+                    tracer.count("outputs_unchanged")
+                write_aliases(dest_paths, links)
+            except OSError as e:
+                failures.append((from_path, f"{type(e).__name__}: {e}"))
+    return failures
+
+
+async def _run(pages, basepath, slots, cache, stream_threshold, queue_size, built, failures):
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    tracer = instrument.tracer
+    rendered = asyncio.Queue(queue_size)
+    loaded = asyncio.Queue(queue_size)
+
+    # rendering is CPU-bound and the render cache is not thread-safe, so it
+    # gets one thread of its own; reads and writes share the I/O threads
+    with ThreadPoolExecutor(IO_THREADS) as io_pool, ThreadPoolExecutor(1) as render_pool:
+
+        def start_read(from_path):
+            if stream_threshold is not None and os.path.getsize(from_path) >= stream_threshold:
+                # streamed pages read their source while they render
+                return None
+            return loop.run_in_executor(io_pool, _read, from_path)
+
+        async def reader():
+            # keep up to IO_THREADS reads in flight, handing pages on in order
+            pending = deque()
+            for page in pages:
+                try:
+                    pending.append((page, start_read(page[0])))
+                except Exception as e:
+                    failures.append((page[0], f"{type(e).__name__}: {e}"))
+                if len(pending) >= IO_THREADS:
+                    await hand_on(*pending.popleft())
+            while pending:
+                await hand_on(*pending.popleft())
+            await loaded.put(_DONE)
+
+        async def hand_on(page, read):
+            try:
+                markdown = None if read is None else await read
+            except Exception as e:
+                failures.append((page[0], f"{type(e).__name__}: {e}"))
+                return
+            # blocks while the renderer is QUEUE_SIZE pages behind
+            await loaded.put((page, markdown))
+
+        async def renderer():
+            while (item := await loaded.get()) is not _DONE:
+                (from_path, dest_paths, template_path), markdown = item
+                try:
+                    if markdown is None:
+                        links = await loop.run_in_executor(
+                            render_pool,
+                            render_page,
+                            from_path,
+                            dest_paths,
+                            template_path,
+                            basepath,
+                            slots,
+                            cache,
+                            stream_threshold,
+                        )
+                        built.append((from_path, dest_paths, links))
+                        continue
+                    html, links = await loop.run_in_executor(
+                        render_pool, _render, from_path, markdown, template_path, basepath, slots, cache
+                    )
+                except Exception as e:
+                    failures.append((from_path, f"{type(e).__name__}: {e}"))
+                    continue
+                await rendered.put((from_path, dest_paths, html, links))
+            await rendered.put(_DONE)
+
+        async def writer():
+            created = set()
+            done = False
+            while not done:
+                items = [await rendered.get()]
+                while len(items) < WRITE_BATCH and not rendered.empty():
+                    items.append(rendered.get_nowait())
+                if items[-1] is _DONE:
+                    items.pop()
+                    done = True
+                if not items:
+                    continue
+
+                errors = dict(await loop.run_in_executor(io_pool, _write_batch, items, created))
+                for from_path, dest_paths, _, links in items:
+                    if from_path in errors:
+                        failures.append((from_path, errors[from_path]))
+                    else:
+                        built.append((from_path, dest_paths, links))
+                        tracer.count("pages_rendered")
+
+        await asyncio.gather(reader(), renderer(), writer())
+
+
+def render_pages_pipelined(
+    pages: list,
+    basepath: str,
+    slots: dict,
+    cache=None,
+    stream_threshold: int | None = None,
+    queue_size: int = QUEUE_SIZE,
+):
+    # read, render and write stages run concurrently over bounded queues, so
+    # the next source is read and the previous page written while one renders
+    import asyncio
+
+    built = []
+    failures = []
+    asyncio.run(_run(pages, basepath, slots, cache, stream_threshold, queue_size, built, failures))
+    return built, failures
@@ -0,0 +1,143 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+# bump whenever block rendering changes so stale fragments are never reused
+RENDERER_VERSION = "2"
+
+# blocks shorter than this render faster than they hash, so they skip the cache
+MIN_BLOCK_CHARS = 64
+
+
+class RenderCache:
+    # Content-addressed block -> HTML cache: an in-memory LRU bounded by entry
+    # count and bytes, backed by an optional on-disk store under cache_dir.
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        max_entries: int = 20_000,
+        max_memory_bytes: int = 64 * 2**20,
+        max_disk_bytes: int = 256 * 2**20,
+    ):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+    def config(self) -> dict:
+        # enough to build an equivalent cache in a worker process
+        return {
+            "cache_dir": self.cache_dir,
+            "max_entries": self.max_entries,
+            "max_memory_bytes": self.max_memory_bytes,
+            "max_disk_bytes": self.max_disk_bytes,
+        }
+
+    @staticmethod
+    def key(block, basepath: str, salt: str = "") -> str:
+        # salt: anything else the block's HTML depends on, e.g. image sizes
+        h = hashlib.sha256()
+        h.update(f"{RENDERER_VERSION}\0{basepath}\0{block.block_type.value}\0".encode("utf-8"))
+        if salt:
+            h.update(f"{salt}\0".encode("utf-8"))
+        h.update(block.text.encode("utf-8"))
+        return h.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key[2:] + ".html")
+
+    def get(self, key: str) -> str | None:
+        html = self.memory.get(key)
+        if html is not None:
+            self.memory.move_to_end(key)
+            self.stats["hits"] += 1
+            return html
+
+        if self.cache_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    html = f.read()
+            except FileNotFoundError:
+                html = None
+            if html is not None:
+                # refresh the mtime so disk eviction drops least recently used first
+                os.utime(path)
+                self.stats["disk_hits"] += 1
+                self._remember(key, html)
+                return html
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, html: str) -> None:
+        self._remember(key, html)
+
+        if self.cache_dir is not None:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # write then rename so concurrent workers never read a partial entry
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key: str, html: str) -> None:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return
+        self.memory[key] = html
+        self.memory_bytes += len(html)
+        while self.memory and (
+            len(self.memory) > self.max_entries or self.memory_bytes > self.max_memory_bytes
+        ):
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def prune_disk(self) -> None:
+        # drop the least recently used files until the store fits max_disk_bytes
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return
+
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as files:
+                    for entry in files:
+                        st = entry.stat()
+                        entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                        total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self.stats["disk_evictions"] += 1
+
+    def merge_stats(self, stats: dict) -> None:
+        for name, value in stats.items():
+            self.stats[name] += value
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        if lookups == 0:
+            return 0.0
+        return (self.stats["hits"] + self.stats["disk_hits"]) / lookups
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"Render cache: {self.hit_rate():.1%} hit rate "
+            f"({s['hits']} memory, {s['disk_hits']} disk, {s['misses']} misses, "
+            f"{s['evictions']} evicted from memory, {s['disk_evictions']} from disk)"
+        )
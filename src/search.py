@@ -0,0 +1,180 @@
+import json
+import os
+import re
+
+import instrument
+from blocks import BlockType, heading_level, scan_blocks
+from frontmatter import skip_front_matter
+from inline import tokenize_inline
+from manifest import hash_file
+from output import write_output
+
+SEARCH_INDEX_NAME = "search-index.json.gz"
+SEARCH_INDEX_VERSION = 1
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _block_texts(block) -> list[str]:
+    # the inline markdown of a block, without the syntax the renderer strips
+    btype = block.block_type
+    if btype == BlockType.HEADING:
+        return [block.text[heading_level(block.lines[0]):]]
+    if btype == BlockType.QUOTE:
+        return [line.strip().removeprefix(">") for line in block.lines]
+    if btype == BlockType.UNORDERED_LIST:
+        return [line[2:] for line in block.lines]
+    if btype == BlockType.ORDERED_LIST:
+        return [line.split(".", 1)[1] for line in block.lines]
+    return [block.text]
+
+
+def block_words(block):
+    # lowercased words of a block as a reader sees them: link text and image
+    # alt text included, code blocks taken literally
+    if block.block_type == BlockType.CODE:
+        lines = [line for line in block.lines if not line.startswith("```")]
+        for word in WORD_PATTERN.findall("\n".join(lines)):
+            yield word.lower()
+        return
+    for text in _block_texts(block):
+        for node in tokenize_inline(text):
+            for word in WORD_PATTERN.findall(node.text):
+                yield word.lower()
+
+
+def page_document(path: str) -> tuple[str, dict[str, list[int]], int]:
+    # title, positions of every word and word count of one markdown source,
+    # read in one pass as a stream so big sources are never held whole; the
+    # title is the front matter's, else the first H1 block's
+    with open(path, "r", encoding="utf-8") as f:
+        fields, lines = skip_front_matter(f)
+        title = fields.get("title")
+        if not isinstance(title, str) or not title:
+            title = None
+        terms = {}
+        position = 0
+        for block in scan_blocks(lines):
+            if title is None and block.block_type == BlockType.HEADING and heading_level(block.lines[0]) == 1:
+                title = block.lines[0][2:].strip()
+            for word in block_words(block):
+                terms.setdefault(word, []).append(position)
+                position += 1
+    if title is None:
+        raise Exception("No H1 header found in markdown")
+    return title, terms, position
+
+
+class SearchIndex:
+    # An inverted index over the site's pages. Each page (keyed by its URL)
+    # keeps its title, source hash, word count and the positions of each of
+    # its words; to_json() merges them into term -> postings.
+
+    def __init__(self):
+        self.docs = {}
+
+    def add(self, url: str, title: str, digest: str, terms: dict[str, list[int]], words: int) -> None:
+        self.docs[url] = {"title": title, "hash": digest, "words": words, "terms": terms}
+
+    def to_json(self) -> dict:
+        # postings are [doc, first position, gap, gap, ...], gaps keep them short
+        urls = sorted(self.docs)
+        docs = []
+        postings = {}
+        for number, url in enumerate(urls):
+            doc = self.docs[url]
+            docs.append({"url": url, "title": doc["title"], "hash": doc["hash"], "words": doc["words"]})
+            for term, positions in doc["terms"].items():
+                gaps = [positions[0]] + [b - a for a, b in zip(positions, positions[1:])]
+                postings.setdefault(term, []).append([number, *gaps])
+        return {"version": SEARCH_INDEX_VERSION, "docs": docs, "terms": dict(sorted(postings.items()))}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "SearchIndex":
+        index = cls()
+        urls = []
+        for doc in data["docs"]:
+            index.add(doc["url"], doc["title"], doc["hash"], {}, doc["words"])
+            urls.append(doc["url"])
+        for term, postings in data["terms"].items():
+            for number, *gaps in postings:
+                positions = []
+                position = 0
+                for gap in gaps:
+                    position += gap
+                    positions.append(position)
+                index.docs[urls[number]]["terms"][term] = positions
+        return index
+
+    def encode(self) -> bytes:
+        import gzip
+
+        text = json.dumps(self.to_json(), ensure_ascii=False, separators=(",", ":"))
+        # mtime=0: an unchanged index compresses to the same bytes
+        return gzip.compress(text.encode("utf-8"), compresslevel=9, mtime=0)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        # an unreadable or outdated index is rebuilt from scratch
+        import gzip
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SEARCH_INDEX_VERSION:
+                return cls()
+            return cls.from_json(data)
+        except (OSError, ValueError, KeyError, TypeError, EOFError):
+            return cls()
+
+    def save(self, path: str) -> bool:
+        # returns whether the file changed; an identical index is not rewritten
+        return write_output(path, self.encode())
+
+    def search(self, query: str) -> list[tuple[str, str]]:
+        # (url, title) of pages holding every word of query, most hits first
+        words = [word.lower() for word in WORD_PATTERN.findall(query)]
+        if not words:
+            return []
+        hits = []
+        for url, doc in self.docs.items():
+            counts = [len(doc["terms"].get(word, ())) for word in words]
+            if all(counts):
+                hits.append((-sum(counts), url, doc["title"]))
+        return [(url, title) for _, url, title in sorted(hits)]
+
+
+def build_search_index(pages: dict[str, str], output_dir: str, basepath: str = "/", manifest=None) -> SearchIndex:
+    # pages maps each markdown source to the URL directory it is served from
+    # ("/blog/tom/"); only sources whose hash differs from the one recorded in
+    # the previous index are read and tokenized again
+    tracer = instrument.tracer
+    path = os.path.join(output_dir, SEARCH_INDEX_NAME)
+    previous = SearchIndex.load(path)
+
+    index = SearchIndex()
+    indexed = 0
+    for source in sorted(pages):
+        url = basepath + pages[source][1:]
+        entry = manifest.entry("pages", source) if manifest is not None else None
+        digest = (entry["hash"] if entry is not None else hash_file(source))[:16]
+
+        old = previous.docs.get(url)
+        if old is not None and old["hash"] == digest:
+            index.docs[url] = old
+            tracer.count("search_pages_unchanged")
+            continue
+        title, terms, words = page_document(source)
+        index.add(url, title, digest, terms, words)
+        indexed += 1
+        tracer.count("search_pages_indexed")
+
+    if (indexed or index.docs.keys() != previous.docs.keys()) and index.save(path):
+        tracer.debug(f"Wrote search index {path}")
+    return index
+
+
+def remove_search_index(output_dir: str) -> None:
+    # a build without search leaves no stale index behind
+    path = os.path.join(output_dir, SEARCH_INDEX_NAME)
+    if os.path.exists(path):
+        os.remove(path)
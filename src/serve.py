@@ -0,0 +1,251 @@
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = b'<script>new EventSource("/__reload").onmessage = () => location.reload();</script>'
+
+
+def snapshot(paths: list[str]) -> dict[str, tuple[int, int]]:
+    # path -> (mtime_ns, size) for every file under the given files/directories
+    state = {}
+    stack = list(paths)
+    while stack:
+        path = stack.pop()
+        try:
+            if not os.path.isdir(path):
+                st = os.stat(path)
+                state[path] = (st.st_mtime_ns, st.st_size)
+                continue
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        st = entry.stat()
+                        state[entry.path] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            continue
+    return state
+
+
+def diff_snapshots(old: dict, new: dict) -> set[str]:
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+
+class OutputStore:
+    # In-memory copy of the output directory. refresh() re-reads only the
+    # files whose mtime or size changed since the last refresh.
+
+    def __init__(self, root: str):
+        self.root = root
+        self.files = {}
+
+    def refresh(self) -> list[str]:
+        files = {}
+        changed = []
+        for path, key in snapshot([self.root]).items():
+            rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+            current = self.files.get(rel)
+            if current is not None and current[0] == key:
+                files[rel] = current
+                continue
+
+            with open(path, "rb") as f:
+                body = f.read()
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            files[rel] = (key, body, etag)
+            if current is None or current[2] != etag:
+                changed.append(rel)
+
+        changed.extend(rel for rel in self.files if rel not in files)
+        # swap the whole dict so request threads never see a half-updated store
+        self.files = files
+        return changed
+
+    def lookup(self, url_path: str):
+        rel = unquote(url_path).lstrip("/")
+        if rel == "" or rel.endswith("/"):
+            candidates = [rel + "index.html"]
+        else:
+            candidates = [rel, rel + "/index.html"]
+
+        files = self.files
+        for candidate in candidates:
+            if candidate in files:
+                return candidate, files[candidate]
+        return None
+
+
+class ReloadHub:
+    # Browser tabs block in wait() until notify() bumps the generation.
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.generation = 0
+
+    def notify(self) -> None:
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation: int, timeout: float) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+def content_type(rel: str) -> str:
+    # every page, page aliases included (docs/contact.html), ends in .html
+    ctype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+    if ctype.startswith("text/"):
+        ctype += "; charset=utf-8"
+    return ctype
+
+
+def make_handler(store: OutputStore, hub: ReloadHub):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.respond(send_body=True)
+
+        def do_HEAD(self):
+            self.respond(send_body=False)
+
+        def respond(self, send_body: bool) -> None:
+            path = urlsplit(self.path).path
+            if path == RELOAD_PATH:
+                self.stream_reloads()
+                return
+
+            found = store.lookup(path)
+            if found is None:
+                self.send_error(404)
+                return
+
+            rel, (_, body, etag) = found
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            ctype = content_type(rel)
+            if ctype.startswith("text/html"):
+                if b"</body>" in body:
+                    body = body.replace(b"</body>", RELOAD_SCRIPT + b"</body>", 1)
+                else:
+                    body += RELOAD_SCRIPT
+
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def stream_reloads(self) -> None:
+            # server-sent events: one "reload" message per finished rebuild
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+            generation = hub.generation
+            try:
+                while True:
+                    latest = hub.wait(generation, timeout=15)
+                    if latest == generation:
+                        self.wfile.write(b": keepalive\n\n")
+                    else:
+                        generation = latest
+                        self.wfile.write(b"data: reload\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def watch(build, store: OutputStore, hub: ReloadHub, paths: list[str], interval: float, debounce: float) -> None:
+    print(f"Watching {', '.join(paths)} for changes")
+    state = snapshot(paths)
+
+    while True:
+        time.sleep(interval)
+        current = snapshot(paths)
+        changed = diff_snapshots(state, current)
+        if not changed:
+            continue
+
+        # wait until the tree has been quiet for `debounce` seconds so a burst
+        # of saves (editor swap files, git checkout) triggers a single rebuild
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < debounce:
+            time.sleep(min(interval, debounce))
+            latest = snapshot(paths)
+            more = diff_snapshots(current, latest)
+            if more:
+                changed |= more
+                current = latest
+                quiet_since = time.monotonic()
+        state = current
+
+        saved = [current[path][0] / 1e9 for path in changed if path in current]
+        saved_at = max(saved) if saved else time.time()
+
+        start = time.perf_counter()
+        try:
+            build()
+        except Exception as e:
+            print(f"Build failed: {e}")
+            continue
+        build_ms = (time.perf_counter() - start) * 1000
+
+        outputs = store.refresh()
+        if outputs:
+            hub.notify()
+        print(
+            f"{len(changed)} change(s): rebuilt in {build_ms:.0f} ms, "
+            f"{len(outputs)} output(s) updated, save to reload {(time.time() - saved_at) * 1000:.0f} ms"
+        )
+
+
+def serve(
+    build,
+    output_dir: str,
+    watch_paths: list[str],
+    host: str = "127.0.0.1",
+    port: int = 8888,
+    interval: float = 0.25,
+    debounce: float = 0.2,
+) -> None:
+    build()
+
+    store = OutputStore(output_dir)
+    store.refresh()
+    hub = ReloadHub()
+
+    server = ThreadingHTTPServer((host, port), make_handler(store, hub))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {output_dir}/ at http://{host}:{port}/")
+
+    try:
+        if watch_paths:
+            watch(build, store, hub, watch_paths, interval, debounce)
+        else:
+            thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
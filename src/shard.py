@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+
+import instrument
+from assets import iter_files, place_file
+from links import LinkIndex
+from search import SEARCH_INDEX_NAME, SearchIndex
+
+# what a shard build leaves next to its outputs for the merge step
+SHARD_INFO_NAME = "shard.json"
+# per-shard pieces of site-wide artifacts, merged rather than copied
+MERGED_FILES = (SHARD_INFO_NAME, SEARCH_INDEX_NAME)
+
+
+class ShardMergeError(Exception):
+    def __init__(self, problems: list[str]):
+        self.problems = problems
+        lines = [f"cannot merge shards, {len(problems)} problem(s):"]
+        lines += [f"  {problem}" for problem in problems]
+        super().__init__("\n".join(lines))
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    # "2/4" -> (2, 4)
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"not a shard of the form i/N: {text!r}")
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {index}/{count} out of range: i must be between 1 and N")
+    return index, count
+
+
+def shard_dir(root: str, shard: tuple[int, int]) -> str:
+    return os.path.join(root, f"{shard[0]}-of-{shard[1]}")
+
+
+def write_shard_info(output_dir: str, shard: tuple[int, int], basepath: str, link_index: LinkIndex, manifest) -> None:
+    # the pages this shard rendered, with their outputs and links, for merge_shards
+    pages = {}
+    for source, (page_dir, links) in link_index.pages.items():
+        outputs = manifest.entry("pages", source)["outputs"]
+        pages[source] = {
+            "outputs": [os.path.relpath(path, output_dir).replace(os.sep, "/") for path in outputs],
+            "page_dir": page_dir,
+            "links": links,
+        }
+    info = {"shard": shard[0], "of": shard[1], "basepath": basepath, "pages": pages}
+    with open(os.path.join(output_dir, SHARD_INFO_NAME), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=1, sort_keys=True)
+
+
+def _same_bytes(a: str, b: str) -> bool:
+    if os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            chunk = fa.read(1 << 16)
+            if chunk != fb.read(1 << 16):
+                return False
+            if not chunk:
+                return True
+
+
+def load_shards(shard_dirs: list[str]) -> list[dict]:
+    # read every shard's info and check they form one complete build
+    problems = []
+    infos = []
+    for directory in shard_dirs:
+        try:
+            with open(os.path.join(directory, SHARD_INFO_NAME), "r", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError) as e:
+            problems.append(f"{directory}: no readable {SHARD_INFO_NAME} ({e})")
+            continue
+        info["dir"] = directory
+        infos.append(info)
+
+    if infos:
+        counts = {info["of"] for info in infos}
+        basepaths = {info["basepath"] for info in infos}
+        if len(counts) > 1:
+            problems.append(f"shards of different splits: N in {sorted(counts)}")
+        if len(basepaths) > 1:
+            problems.append(f"shards built with different basepaths: {sorted(basepaths)}")
+        seen = {}
+        for info in infos:
+            if info["shard"] in seen:
+                problems.append(f"shard {info['shard']} given twice: {seen[info['shard']]} and {info['dir']}")
+            seen[info["shard"]] = info["dir"]
+        if len(counts) == 1:
+            missing = sorted(set(range(1, counts.pop() + 1)) - set(seen))
+            if missing:
+                problems.append(f"missing shard(s): {', '.join(map(str, missing))}")
+
+    if problems:
+        raise ShardMergeError(problems)
+    return sorted(infos, key=lambda info: info["shard"])
+
+
+def merge_shards(shard_dirs: list[str], output_dir: str, link_mode: str = "auto") -> LinkIndex:
+    # combine the outputs of every shard into output_dir. A page output may
+    # come from one shard only; shared files (static assets, image variants)
+    # are built by every shard and must be byte-identical. Returns the merged
+    # link index of the whole site.
+    tracer = instrument.tracer
+    infos = load_shards(shard_dirs)
+
+    problems = []
+    owners = {}
+    page_outputs = {}
+    rendered_twice = set()
+    for info in infos:
+        for source, page in info["pages"].items():
+            for rel in page["outputs"]:
+                if rel in page_outputs:
+                    problems.append(f"{rel}: rendered by shard {page_outputs[rel]} and shard {info['shard']} ({source})")
+                    rendered_twice.add(rel)
+                page_outputs.setdefault(rel, info["shard"])
+
+        for path, _ in iter_files(info["dir"]):
+            rel = os.path.relpath(path, info["dir"]).replace(os.sep, "/")
+            if rel in MERGED_FILES:
+                continue
+            first = owners.get(rel)
+            if first is None:
+                owners[rel] = (info["shard"], path)
+            elif rel in page_outputs:
+                if rel not in rendered_twice:
+                    page_shard = page_outputs[rel]
+                    other = info["shard"] if first[0] == page_shard else first[0]
+                    problems.append(f"{rel}: page of shard {page_shard} also written by shard {other}")
+            elif not _same_bytes(first[1], path):
+                problems.append(f"{rel}: differs between shard {first[0]} and shard {info['shard']}")
+    for rel, shard in page_outputs.items():
+        if rel not in owners:
+            problems.append(f"{rel}: recorded by shard {shard} but missing from its output")
+
+    search_paths = [os.path.join(info["dir"], SEARCH_INDEX_NAME) for info in infos]
+    searched = [path for path in search_paths if os.path.exists(path)]
+    if searched and len(searched) != len(search_paths):
+        problems.append(f"only {len(searched)} of {len(search_paths)} shards wrote {SEARCH_INDEX_NAME}")
+    if problems:
+        raise ShardMergeError(problems)
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    for rel, (_, path) in sorted(owners.items()):
+        dest = os.path.join(output_dir, *rel.split("/"))
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tracer.debug(f"Placing {path} -> {dest}")
+        place_file(path, dest, link_mode)
+        tracer.count("merged_files")
+
+    link_index = LinkIndex()
+    for info in infos:
+        for source, page in info["pages"].items():
+            link_index.add(source, page["page_dir"], page["links"])
+
+    if searched:
+        merged = SearchIndex()
+        for path in searched:
+            merged.docs.update(SearchIndex.load(path).docs)
+        merged.save(os.path.join(output_dir, SEARCH_INDEX_NAME))
+
+    tracer.info(f"Merged {len(infos)} shard(s): {len(link_index.pages)} page(s), {len(owners)} file(s)")
+    return link_index
@@ -0,0 +1,116 @@
+import os
+import re
+
+import instrument
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# {{> header.html }} pulls in a partial, relative to the including file
+PARTIAL_PATTERN = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+TEMPLATE_NAME = "template.html"
+
+_cache = {}
+
+
+def rewrite_urls(html: str, basepath: str) -> str:
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
+
+
+class CompiledTemplate:
+    # A template parsed into alternating literal chunks and named slots:
+    # chunks[0], slots[0], chunks[1], slots[1], ..., chunks[-1]
+
+    def __init__(self, chunks: list[str], slots: list[str], partials: tuple[str, ...] = ()):
+        self.chunks = chunks
+        self.slots = slots
+        # every file included into this template, nested ones too
+        self.partials = partials
+
+    def write(self, write, values: dict) -> None:
+        # slot values are strings, or callables that stream into write
+        chunks = self.chunks
+        write(chunks[0])
+        for i, name in enumerate(self.slots):
+            value = values.get(name, "")
+            if callable(value):
+                value(write)
+            else:
+                write(value)
+            write(chunks[i + 1])
+
+    def render(self, values: dict) -> str:
+        parts = []
+        self.write(parts.append, values)
+        return "".join(parts)
+
+
+def compile_template(text: str, basepath: str = "/") -> CompiledTemplate:
+    chunks = []
+    slots = []
+    pos = 0
+    for match in SLOT_PATTERN.finditer(text):
+        chunks.append(text[pos:match.start()])
+        slots.append(match.group(1))
+        pos = match.end()
+    chunks.append(text[pos:])
+
+    if basepath != "/":
+        chunks = [rewrite_urls(chunk, basepath) for chunk in chunks]
+
+    return CompiledTemplate(chunks, slots)
+
+
+def expand_partials(text: str, directory: str, stack: tuple[str, ...] = ()) -> tuple[str, list[str]]:
+    partials = []
+
+    def include(match):
+        path = os.path.normpath(os.path.join(directory, match.group(1)))
+        if path in stack:
+            raise ValueError(f"Template include cycle: {' -> '.join(stack + (path,))}")
+        with open(path, "r", encoding="utf-8") as f:
+            inner, nested = expand_partials(f.read(), os.path.dirname(path), stack + (path,))
+        partials.append(path)
+        partials.extend(nested)
+        return inner
+
+    return PARTIAL_PATTERN.sub(include, text), partials
+
+
+def _stamp(paths) -> tuple | None:
+    try:
+        return tuple((st.st_mtime_ns, st.st_size) for st in map(os.stat, paths))
+    except FileNotFoundError:
+        return None
+
+
+def load_template(path: str, basepath: str = "/") -> CompiledTemplate:
+    # parsed once per process; re-read only when the mtime or size of the
+    # file or of one of its partials changes
+    key = (path, basepath)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == _stamp([path, *cached[1].partials]):
+        instrument.tracer.count("template_cache_hits")
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        text, partials = expand_partials(f.read(), os.path.dirname(path), (os.path.normpath(path),))
+    compiled = compile_template(text, basepath)
+    compiled.partials = tuple(dict.fromkeys(partials))
+
+    _cache[key] = (_stamp([path, *compiled.partials]), compiled)
+    return compiled
+
+
+def resolve_template(from_path: str, content_root: str, default_path: str) -> str:
+    # a template.html in the page's directory or any parent up to the content
+    # root overrides the default template for that section
+    directory = os.path.dirname(from_path)
+    root = os.path.normpath(content_root)
+    while True:
+        candidate = os.path.join(directory, TEMPLATE_NAME)
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if os.path.normpath(directory) == root or parent == directory:
+            return default_path
+        directory = parent
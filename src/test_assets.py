@@ -0,0 +1,57 @@
+import os
+import unittest
+
+import instrument
+from assets import place_file, sync_assets
+from manifest import BuildManifest
+from testing import TempDirTestCase
+
+
+class TestSyncAssets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.dest, "index.html"), "<p>generated</p>")
+
+    def sync(self, **kwargs):
+        tracer = instrument.configure(instrument.QUIET, keep_events=True)
+        manifest = BuildManifest.load(self.manifest_path)
+        sync_assets(self.static, self.dest, manifest, **kwargs)
+        manifest.save()
+        return tracer.counters
+
+    def test_copies_then_skips_unchanged(self):
+        self.assertEqual(self.sync()["static_copied"], 2)
+        self.assertEqual(self.sync(), {"static_unchanged": 2})
+        with open(os.path.join(self.dest, "images", "a.png"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "png")
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_removes_orphaned_outputs(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.assertEqual(self.sync()["outputs_removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+    def test_hash_skips_touched_but_identical_file(self):
+        self.sync(verify_hash=True)
+        os.utime(os.path.join(self.static, "index.css"), ns=(1, 1))
+        counters = self.sync(verify_hash=True)
+        self.assertNotIn("static_copied", counters)
+        self.assertEqual(self.sync(verify_hash=True), {"static_unchanged": 2})
+
+    def test_place_file_hardlink(self):
+        src = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.root, "linked.css")
+        self.assertEqual(place_file(src, dest, "hardlink"), "hardlink")
+        self.assertTrue(os.path.samefile(src, dest))
+        self.assertEqual(place_file(src, dest, "copy"), "copy")
+        self.assertFalse(os.path.samefile(src, dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import gzip
+import os
+import unittest
+from unittest import mock
+
+import instrument
+from compress import available_formats, compress_file, precompress, remove_precompressed
+from manifest import BuildManifest
+from testing import TempDirTestCase, write_file
+
+PAGE = "<p>" + "the road goes ever on and on " * 200 + "</p>"
+
+
+class TestPrecompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.out = os.path.join(self.root, "docs")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.write("index.html", PAGE)
+        self.write("blog/post/index.html", PAGE.upper())
+        self.write("index.css", "body { color: red; }\n" * 100)
+        self.write("tiny.js", "x()")
+        self.write("images/a.png", "\x89PNG" + "z" * 4000)
+
+    def write(self, rel, text):
+        return write_file(os.path.join(self.out, rel), text)
+
+    def build(self, **kwargs):
+        # one manifest per build, as main.py does
+        manifest = BuildManifest.load(self.manifest_path)
+        saved = precompress(self.out, manifest, **kwargs)
+        manifest.save()
+        return saved
+
+    def siblings(self):
+        found = set()
+        for dirpath, _, filenames in os.walk(self.out):
+            for name in filenames:
+                if name.endswith((".gz", ".br")):
+                    found.add(os.path.relpath(os.path.join(dirpath, name), self.out))
+        return found
+
+    def test_sibling_round_trips(self):
+        path = os.path.join(self.out, "index.html")
+        sizes = compress_file(path, ("gz",), 9)
+        with gzip.open(path + ".gz", "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), PAGE)
+        self.assertEqual(sizes, {"gz": os.path.getsize(path + ".gz")})
+
+    def test_incompressible_files_get_no_sibling(self):
+        path = self.write("random.svg", os.urandom(600).hex()[:40])
+        self.assertEqual(compress_file(path, ("gz",), 9), {})
+        self.assertFalse(os.path.exists(path + ".gz"))
+
+    def test_eligible_outputs_are_compressed_once(self):
+        saved = self.build(min_size=256)
+        gz = {"index.html.gz", "blog/post/index.html.gz", "index.css.gz"}
+        self.assertEqual({name for name in self.siblings() if name.endswith(".gz")}, gz)
+        self.assertEqual(set(saved), set(available_formats()))
+        self.assertGreater(saved["gz"], len(PAGE))
+
+        tracer = instrument.configure(instrument.SUMMARY)
+        self.assertEqual(self.build(min_size=256), saved)
+        self.assertEqual(tracer.counters.get("files_compressed"), None)
+        self.assertEqual(tracer.counters["compress_unchanged"], 3)
+
+    def test_changed_and_removed_outputs(self):
+        self.build(min_size=256)
+        self.write("index.html", PAGE + "<p>more</p>")
+        os.remove(os.path.join(self.out, "index.css"))
+
+        tracer = instrument.configure(instrument.SUMMARY)
+        self.build(min_size=256)
+        self.assertEqual(tracer.counters["files_compressed"], 1)
+        with gzip.open(os.path.join(self.out, "index.html.gz"), "rt", encoding="utf-8") as f:
+            self.assertTrue(f.read().endswith("<p>more</p>"))
+        self.assertNotIn("index.css.gz", self.siblings())
+
+    def test_process_pool_matches_serial(self):
+        serial = self.build(min_size=256)
+        manifest = BuildManifest.load(self.manifest_path)
+        remove_precompressed(self.out, manifest)
+        manifest.save()
+        self.assertEqual(self.siblings(), set())
+
+        # these few small files stay below the batch size worth a pool
+        with mock.patch("compress.PARALLEL_MIN_BYTES", 0):
+            self.assertEqual(self.build(min_size=256, jobs=2), serial)
+
+    def test_settings_change_redoes_everything(self):
+        self.build(level=1, min_size=256)
+        self.build(level=9, min_size=10_000)
+        self.assertEqual(self.siblings(), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
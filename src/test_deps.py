@@ -0,0 +1,90 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+
+import images
+from generate_page import generate_pages_recursive
+from manifest import BuildManifest
+from testing import TempDirTestCase
+
+
+class TestDependencyGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.out = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![map](/images/map.png)")
+        self.write(os.path.join(self.content, "about", "index.md"), "# About")
+        self.write(os.path.join(self.content, "blog", "template.html"), "{{> parts/head.html }}{{ Content }}")
+        self.write(os.path.join(self.content, "blog", "parts", "head.html"), "<h1>{{ Title }}</h1>")
+        for name in ("one", "two"):
+            self.write(os.path.join(self.content, "blog", name, "index.md"), f"# Post {name}")
+
+    def build(self):
+        # the sources rebuilt by one incremental build, with the reasons given
+        manifest = BuildManifest.load(self.manifest_path)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            generate_pages_recursive(self.content, self.template, self.out, manifest=manifest, explain=True)
+        manifest.save()
+        rebuilt = {}
+        for line in output.getvalue().splitlines():
+            path, reasons = line.removeprefix("Rebuilding ").split(": ", 1)
+            rebuilt[os.path.relpath(path, self.content)] = reasons
+        return rebuilt
+
+    def test_first_build_then_nothing(self):
+        self.assertEqual(set(self.build().values()), {"new page"})
+        self.assertEqual(self.build(), {})
+
+    def test_partial_change_rebuilds_only_its_section(self):
+        self.build()
+        partial = os.path.join(self.content, "blog", "parts", "head.html")
+        self.write(partial, "<h1>{{ Title }}!</h1>")
+        self.assertEqual(
+            self.build(),
+            {
+                os.path.join("blog", "one", "index.md"): f"{partial} changed",
+                os.path.join("blog", "two", "index.md"): f"{partial} changed",
+            },
+        )
+        with open(os.path.join(self.out, "blog", "one", "index.html"), encoding="utf-8") as f:
+            self.assertTrue(f.read().startswith("<h1>Post one!</h1>"))
+
+    def test_root_template_change_skips_sections_with_their_own(self):
+        self.build()
+        self.write(self.template, "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(set(self.build()), {"index.md", os.path.join("about", "index.md")})
+
+    def test_source_change_and_template_switch(self):
+        self.build()
+        self.write(os.path.join(self.content, "about", "index.md"), "# About us")
+        self.assertEqual(list(self.build()), [os.path.join("about", "index.md")])
+
+        section_template = os.path.join(self.content, "about", "template.html")
+        self.write(section_template, "{{ Content }}")
+        self.assertEqual(
+            self.build(),
+            {os.path.join("about", "index.md"): f"now uses {section_template}; no longer uses {self.template}"},
+        )
+
+    def test_image_size_change_rebuilds_pages_showing_it(self):
+        images.configure({"/images/map.png": (10, 10, [])})
+        self.build()
+        images.configure({"/images/map.png": (20, 10, [])})
+        self.assertEqual(self.build(), {"index.md": "@image:/images/map.png changed"})
+
+    def test_missing_output(self):
+        self.build()
+        output = os.path.join(self.out, "about", "index.html")
+        os.remove(output)
+        self.assertEqual(self.build(), {os.path.join("about", "index.md"): f"output missing: {output}"})
+
+
+if __name__ == "__main__":
+    unittest.main()
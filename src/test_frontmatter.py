@@ -0,0 +1,74 @@
+import io
+import unittest
+
+from converter import markdown_to_html_node
+from frontmatter import parse_front_matter, skip_front_matter, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_fields(self):
+        fields, span = parse_front_matter(
+            [
+                "---",
+                "title: 'Tom: a mistake?'",
+                "Date: 2024-03-01",
+                "# a comment",
+                "tags: [tolkien, \"characters\"]",
+                "draft: yes",
+                "aliases:",
+                "  - /tom",
+                "  - /bombadil",
+                "---",
+                "# Tom",
+            ]
+        )
+        self.assertEqual(span, 10)
+        self.assertEqual(
+            fields,
+            {
+                "title": "Tom: a mistake?",
+                "date": "2024-03-01",
+                "tags": ["tolkien", "characters"],
+                "draft": True,
+                "aliases": ["/tom", "/bombadil"],
+            },
+        )
+
+    def test_reads_no_further_than_the_fence(self):
+        lines = iter(["---", "title: T", "---", "# body", "more"])
+        parse_front_matter(lines)
+        self.assertEqual(next(lines), "# body")
+
+    def test_no_front_matter(self):
+        self.assertEqual(parse_front_matter(["# Title", "---"]), ({}, 0))
+        self.assertEqual(split_front_matter("# Title\n\n---\n"), ({}, "# Title\n\n---\n"))
+
+    def test_errors(self):
+        with self.assertRaisesRegex(ValueError, "not closed"):
+            parse_front_matter(["---", "title: T", "# Title"])
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            parse_front_matter(["---", "just words", "---"])
+
+    def test_split_keeps_line_numbers(self):
+        markdown = "---\ntitle: T\n---\n# Title\n\n[link](/x)"
+        fields, body = split_front_matter(markdown)
+        self.assertEqual(fields, {"title": "T"})
+        self.assertEqual(body.split("\n")[3:], ["# Title", "", "[link](/x)"])
+
+        links = []
+        html = markdown_to_html_node(body, links=links).to_html()
+        self.assertEqual(html, '<div><h1>Title</h1><p><a href="/x">link</a></p></div>')
+        self.assertEqual(links, [(6, "link", "/x")])
+
+    def test_skip_in_open_file(self):
+        fields, lines = skip_front_matter(io.StringIO("---\ndraft: false\n---\n# T\n"))
+        self.assertEqual(fields, {"draft": False})
+        self.assertEqual(list(lines), ["", "", "", "# T\n"])
+
+        f = io.StringIO("# T\nbody\n")
+        fields, lines = skip_front_matter(f)
+        self.assertEqual((fields, list(lines)), ({}, ["# T\n", "body\n"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import io
+import unittest
+
+from htmlnode import LeafNode, ParentNode, attrs_to_html, escape_attr, escape_text
+
+
+class TestParentNode(unittest.TestCase):
+    def tree(self):
+        return ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "plain "), LeafNode("b", "bold")]),
+                ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(3)]),
+            ],
+        )
+
+    def test_to_html_nested(self):
+        self.assertEqual(
+            self.tree().to_html(),
+            "<div><p>plain <b>bold</b></p><ul><li>0</li><li>1</li><li>2</li></ul></div>",
+        )
+
+    def test_write_html_streams_into_file(self):
+        buffer = io.StringIO()
+        self.tree().write_html(buffer.write)
+        self.assertEqual(buffer.getvalue(), self.tree().to_html())
+
+    def test_write_html_emits_chunks(self):
+        chunks = []
+        ParentNode("p", [LeafNode("i", "x"), LeafNode(None, "y")]).write_html(chunks.append)
+        self.assertEqual(chunks, ["<p>", "<i>x</i>", "y", "</p>"])
+
+    def test_missing_children_raises(self):
+        with self.assertRaises(ValueError):
+            ParentNode("p", None).to_html()
+
+
+
+class TestSerialization(unittest.TestCase):
+    def test_escape(self):
+        self.assertEqual(escape_text('a < b && "c" > d'), 'a &lt; b &amp;&amp; "c" &gt; d')
+        self.assertEqual(escape_attr('a < b && "c" > d'), "a &lt; b &amp;&amp; &quot;c&quot; &gt; d")
+        plain = "nothing to escape here"
+        self.assertIs(escape_text(plain), plain)
+        self.assertIs(escape_attr(plain), plain)
+
+    def test_attributes(self):
+        props = {"src": "/a.png?x=1&y=2", "alt": 'say "hi"'}
+        self.assertEqual(attrs_to_html(props), ' src="/a.png?x=1&amp;y=2" alt="say &quot;hi&quot;"')
+        # serialized once, then served from the cache
+        self.assertIs(attrs_to_html(dict(props)), attrs_to_html(props))
+        self.assertEqual(attrs_to_html({}), "")
+        self.assertEqual(LeafNode("img", "", props).props_to_html(), attrs_to_html(props)[1:])
+
+    def test_attribute_values_that_are_not_strings(self):
+        self.assertEqual(LeafNode("img", "", {"width": 100}).to_html(), '<img width="100">')
+        self.assertEqual(LeafNode("img", "", {"alt": None}).to_html(), '<img alt="None">')
+        # equal as cache keys, different as text
+        self.assertEqual(attrs_to_html({"x": "1"}), ' x="1"')
+        self.assertEqual(attrs_to_html({"x": 1}), ' x="1"')
+        self.assertEqual(attrs_to_html({"x": True}), ' x="True"')
+        self.assertEqual(attrs_to_html({"x": 1.0}), ' x="1.0"')
+        # unhashable, and escaped once made text
+        self.assertEqual(attrs_to_html({"data-x": ["<a>"]}), " data-x=\"['&lt;a&gt;']\"")
+
+    def test_nodes_escape_their_values(self):
+        self.assertEqual(LeafNode(None, "<b>").to_html(), "&lt;b&gt;")
+        self.assertEqual(LeafNode("a", "x & y", {"href": "/?q=<>"}).to_html(), '<a href="/?q=&lt;&gt;">x &amp; y</a>')
+        self.assertEqual(LeafNode("br", "").to_html(), "<br>")
+        self.assertEqual(LeafNode("span", "s", {"class": "k"}).to_html(), '<span class="k">s</span>')
+        self.assertEqual(
+            ParentNode("div", [LeafNode(None, "1 < 2")], {"id": "x"}).to_html(), '<div id="x">1 &lt; 2</div>'
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
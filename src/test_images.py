@@ -0,0 +1,120 @@
+import os
+import struct
+import unittest
+import zlib
+
+import images
+import instrument
+from converter import markdown_to_html_node, text_node_to_html_node
+from manifest import BuildManifest
+from render_cache import RenderCache
+from testing import TempDirTestCase
+from textnode import TextNode, TextType
+
+
+def png_bytes(width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x00\x00\x00" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def jpeg_bytes(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+
+class TestImageSize(TempDirTestCase):
+    def size_of(self, data):
+        path = os.path.join(self.root, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return images.image_size(path)
+
+    def test_formats(self):
+        vp8x = b"VP8X" + struct.pack("<I", 10) + b"\x00" * 4 + (639).to_bytes(3, "little") + (479).to_bytes(3, "little")
+        vp8l_bits = (300 - 1) | ((200 - 1) << 14)
+        vp8l = b"VP8L" + struct.pack("<I", 5) + b"\x2f" + vp8l_bits.to_bytes(4, "little")
+        for name, data, expected in [
+            ("png", png_bytes(928, 468), (928, 468)),
+            ("gif", b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 8, (32, 16)),
+            ("jpeg", jpeg_bytes(1026, 388), (1026, 388)),
+            ("webp vp8x", b"RIFF" + struct.pack("<I", 30) + b"WEBP" + vp8x, (640, 480)),
+            ("webp vp8l", b"RIFF" + struct.pack("<I", 30) + b"WEBP" + vp8l + b"\x00" * 8, (300, 200)),
+            ("text", b"not an image at all, just some bytes", None),
+        ]:
+            with self.subTest(name):
+                self.assertEqual(self.size_of(data), expected)
+
+
+class TestImageStage(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.out = os.path.join(self.root, "docs")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(self.out)
+        self.write("images/tom.png", png_bytes(40, 20))
+        self.write("index.css", b"body {}")
+
+    def write(self, rel, data):
+        with open(os.path.join(self.static, rel), "wb") as f:
+            f.write(data)
+
+    def build(self, widths=()):
+        manifest = BuildManifest.load(self.manifest_path)
+        index = images.process_images(self.static, self.out, manifest, widths)
+        manifest.save()
+        return index
+
+    def test_index_and_content_hash_cache(self):
+        self.assertEqual(self.build(), {"/images/tom.png": (40, 20, [])})
+
+        tracer = instrument.configure(instrument.SUMMARY)
+        os.utime(os.path.join(self.static, "images", "tom.png"), ns=(1, 1))
+        self.assertEqual(self.build(), {"/images/tom.png": (40, 20, [])})
+        self.assertEqual(tracer.counters, {"images_unchanged": 1})
+
+        self.write("images/tom.png", png_bytes(30, 30))
+        self.assertEqual(self.build(), {"/images/tom.png": (30, 30, [])})
+        self.assertEqual(tracer.counters["images_processed"], 1)
+
+    @unittest.skipIf(images._pillow() is None, "Pillow is not installed")
+    def test_variants(self):
+        index = self.build(widths=(10, 20, 80))
+        self.assertEqual(index["/images/tom.png"][2], [("/images/tom-10w.png", 10), ("/images/tom-20w.png", 20)])
+        self.assertEqual(images.image_size(os.path.join(self.out, "images", "tom-10w.png")), (10, 5))
+
+        self.build(widths=(10,))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "images", "tom-20w.png")))
+
+    def test_img_tags_carry_dimensions(self):
+        images.configure({"/images/tom.png": (40, 20, [("/images/tom-10w.png", 10)])})
+        node = text_node_to_html_node(TextNode("Tom", TextType.IMAGES, "/images/tom.png"), "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/site/images/tom.png" alt="Tom" width="40" height="20" '
+            'srcset="/site/images/tom-10w.png 10w, /site/images/tom.png 40w">',
+        )
+        unknown = text_node_to_html_node(TextNode("x", TextType.IMAGES, "https://example.com/x.png"))
+        self.assertEqual(unknown.to_html(), '<img src="https://example.com/x.png" alt="x">')
+
+    def test_cached_blocks_follow_new_sizes(self):
+        cache = RenderCache()
+        markdown = "![Tom Bombadil, merry fellow, in his bright blue jacket](/images/tom.png)"
+        images.configure({"/images/tom.png": (40, 20, [])})
+        self.assertIn('width="40"', markdown_to_html_node(markdown, cache=cache).to_html())
+        images.configure({"/images/tom.png": (30, 30, [])})
+        self.assertIn('width="30"', markdown_to_html_node(markdown, cache=cache).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import unittest
+
+import instrument
+
+
+class TestInstrument(unittest.TestCase):
+    def tearDown(self):
+        instrument.configure(instrument.QUIET)
+
+    def test_quiet_without_trace_installs_null_tracer(self):
+        tracer = instrument.configure(instrument.QUIET)
+        self.assertFalse(tracer.enabled)
+        self.assertIs(tracer.span("a"), tracer.span("b"))
+        self.assertIsNone(tracer.export())
+
+    def test_spans_and_counters_aggregate(self):
+        tracer = instrument.configure(instrument.SUMMARY)
+        for _ in range(3):
+            with tracer.span("parse"):
+                pass
+        tracer.count("bytes_read", 10)
+        tracer.count("bytes_read", 5)
+        self.assertEqual(tracer.stages["parse"][0], 3)
+        self.assertEqual(tracer.counters, {"bytes_read": 15})
+        self.assertEqual(tracer.events, [])
+
+    def test_merge_worker_data(self):
+        parent = instrument.Tracer(keep_events=True)
+        worker = instrument.Tracer(keep_events=True)
+        with worker.span("page", path="a.md"):
+            pass
+        worker.count("pages_rendered")
+        parent.merge(worker.export())
+        self.assertEqual(parent.counters, {"pages_rendered": 1})
+        self.assertEqual(parent.events[0]["args"], {"path": "a.md"})
+
+    def test_write_chrome_trace(self):
+        tracer = instrument.configure(instrument.QUIET, keep_events=True)
+        with tracer.span("write"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            tracer.write_trace(path)
+            with open(path, encoding="utf-8") as f:
+                events = json.load(f)["traceEvents"]
+        self.assertEqual([(e["name"], e["ph"]) for e in events], [("write", "X")])
+
+
+if __name__ == "__main__":
+    unittest.main()
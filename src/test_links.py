@@ -0,0 +1,112 @@
+import os
+import unittest
+
+from converter import markdown_to_html_node
+from generate_page import generate_pages_recursive
+from links import LinkIndex, resolves
+from manifest import BuildManifest
+from render_cache import RenderCache
+from testing import TempDirTestCase
+
+MARKDOWN = """# Title
+
+Intro [home](/) and enough words to pass the cache's size cutoff
+a second line with ![pic](/images/a.png).
+
+- [one](/one)
+- [two](two/)
+
+> a quote long enough that the render cache keeps it too
+> [away](https://example.com)
+
+```
+[not a link](/code)
+```
+
+1. first
+2. [third line](/missing#part)
+"""
+
+EXPECTED = [
+    (3, "link", "/"),
+    (4, "image", "/images/a.png"),
+    (6, "link", "/one"),
+    (7, "link", "two/"),
+    (10, "link", "https://example.com"),
+    (17, "link", "/missing#part"),
+]
+
+
+class TestLinkCollection(unittest.TestCase):
+    def test_links_come_from_the_render(self):
+        links = []
+        markdown_to_html_node(MARKDOWN, "/repo/", links=links)
+        self.assertEqual(links, EXPECTED)
+
+    def test_cached_blocks_report_the_same_links(self):
+        cache = RenderCache()
+        first, second = [], []
+        html = markdown_to_html_node(MARKDOWN, cache=cache, links=first).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache=cache, links=second).to_html(), html)
+        self.assertEqual(second, first)
+        self.assertEqual(cache.stats["hits"], 2)
+
+
+class TestResolve(unittest.TestCase):
+    targets = {"index.html", "blog/tom/index.html", "images/a.png", "contact/index.html"}
+
+    def test_resolution(self):
+        for url, page_dir, expected in [
+            ("/", "/blog/tom/", True),
+            ("/blog/tom", "/", True),
+            ("/blog/tom/", "/", True),
+            ("/images/a.png?v=2", "/", True),
+            ("../../contact", "/blog/tom/", True),
+            ("index.html#top", "/blog/tom/", True),
+            ("#top", "/contact/", True),
+            ("mailto:me@example.com", "/", True),
+            ("//cdn.example.com/x.js", "/", True),
+            ("/blog/jerry", "/", False),
+            ("images/a.png", "/blog/tom/", False),
+            ("/images/a%20b.png", "/", False),
+        ]:
+            with self.subTest(url=url, page_dir=page_dir):
+                self.assertEqual(resolves(url, page_dir, self.targets), expected)
+
+    def test_check_reports_source_and_line(self):
+        index = LinkIndex()
+        index.add("content/index.md", "/", [(3, "link", "/blog/tom"), (9, "image", "/gone.png")])
+        broken = index.check(self.targets)
+        self.assertEqual([str(link) for link in broken], ["content/index.md:9: broken image /gone.png"])
+
+
+class TestSiteIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.out = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/post) and [nowhere](/nowhere)")
+        self.write(os.path.join(self.content, "post", "index.md"), "# Post\n\n[back](../)")
+
+    def test_unchanged_pages_keep_their_links(self):
+        manifest_path = os.path.join(self.root, "manifest.json")
+        manifest = BuildManifest.load(manifest_path)
+        first = generate_pages_recursive(self.content, self.template, self.out, manifest=manifest)
+        manifest.save()
+
+        manifest = BuildManifest.load(manifest_path)
+        second = generate_pages_recursive(self.content, self.template, self.out, manifest=manifest)
+        self.assertEqual(second.pages, first.pages)
+
+        targets = {"index.html", "post/index.html"}
+        broken = second.check(targets)
+        self.assertEqual(
+            [str(link) for link in broken],
+            [f"{os.path.join(self.content, 'index.md')}:3: broken link /nowhere"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
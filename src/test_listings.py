@@ -0,0 +1,141 @@
+import os
+import unittest
+
+import instrument
+from generate_page import PageBuildError, collect_metadata, generate_pages_recursive
+from listings import paginate
+from manifest import BuildManifest
+from testing import TempDirTestCase
+
+
+class TestListings(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.out = os.path.join(self.root, "docs")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.post("tom", "Tom", "2024-03-01", "[tolkien, characters]")
+        self.post("glorfindel", "Glorfindel", "2024-02-10", "[characters]")
+        self.post("wip", "Work in progress", "2024-05-01", "[tolkien]", draft=True)
+
+    def read(self, *parts):
+        with open(os.path.join(self.out, *parts), encoding="utf-8") as f:
+            return f.read()
+
+    def post(self, name, title, date, tags, draft=False, body=None):
+        path = os.path.join(self.content, "blog", name, "index.md")
+        front = f"---\ntitle: {title}\ndate: {date}\ntags: {tags}\ndraft: {str(draft).lower()}\n---\n"
+        self.write(path, front + (body if body is not None else f"# {title}\n\nBody of {name}."))
+        return path
+
+    def build(self, **kwargs):
+        tracer = instrument.configure(instrument.SUMMARY)
+        manifest = BuildManifest.load(self.manifest_path)
+        generate_pages_recursive(
+            self.content, self.template, self.out, manifest=manifest, listings=True, site_url="https://x.org", **kwargs
+        )
+        manifest.save()
+        return tracer.counters
+
+    def test_metadata_index(self):
+        tom = os.path.join(self.content, "blog", "tom", "index.md")
+        home = os.path.join(self.content, "index.md")
+        manifest = BuildManifest(self.manifest_path)
+        metadata, failures = collect_metadata([tom, home], manifest)
+        self.assertEqual(failures, [])
+        self.assertEqual(
+            metadata[tom], {"title": "Tom", "date": "2024-03-01", "tags": ["characters", "tolkien"], "draft": False}
+        )
+        self.assertEqual(metadata[home], {"title": "Home", "date": None, "tags": [], "draft": False})
+
+        tracer = instrument.configure(instrument.SUMMARY)
+        self.assertEqual(collect_metadata([tom, home], manifest)[0], metadata)
+        self.assertEqual(tracer.counters, {"metadata_unchanged": 2})
+
+        self.write(home, "---\ndate: 1 March\n---\n# Home")
+        _, failures = collect_metadata([tom, home], manifest)
+        self.assertEqual(failures, [(home, "ValueError: " + f"{home}: date is not YYYY-MM-DD: '1 March'")])
+
+    def test_listings_drafts_and_feed(self):
+        counters = self.build()
+        self.assertEqual(counters["listings_written"], 5)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "blog", "wip", "index.html")))
+
+        blog = self.read("blog", "index.html")
+        self.assertTrue(blog.startswith("<title>Blog</title>"))
+        self.assertLess(blog.index('href="/blog/tom/">Tom</a>'), blog.index('href="/blog/glorfindel/"'))
+        self.assertNotIn("Work in progress", blog)
+        self.assertIn('<time datetime="2024-03-01">', blog)
+        self.assertIn('href="/tags/characters/">characters</a> (2)', self.read("tags", "index.html"))
+        self.assertNotIn("glorfindel", self.read("tags", "tolkien", "index.html"))
+
+        feed = self.read("blog", "feed.xml")
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn('<link href="https://x.org/blog/tom/"/>', feed)
+        self.assertIn("<updated>2024-03-01T00:00:00Z</updated>", feed)
+
+        # post pages render without their front matter
+        self.assertEqual(
+            self.read("blog", "tom", "index.html"), "<title>Tom</title><div><h1>Tom</h1><p>Body of tom.</p></div>"
+        )
+
+        drafts = self.build(drafts=True)
+        self.assertIn("Work in progress", self.read("blog", "index.html"))
+        self.assertEqual(drafts["pages_rendered"], 1)
+
+    def test_incremental(self):
+        self.build()
+        # a body edit changes no metadata: listings stay as they are
+        self.post("tom", "Tom", "2024-03-01", "[tolkien, characters]", body="# Tom\n\nEdited.")
+        counters = self.build()
+        self.assertEqual((counters["metadata_read"], counters["listings_unchanged"]), (1, 5))
+
+        # dropping the last post of a tag removes the tag's page
+        self.post("tom", "Tom", "2024-03-01", "[tolkien]")
+        self.post("glorfindel", "Glorfindel", "2024-02-10", "[tolkien]")
+        counters = self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.out, "tags", "characters", "index.html")))
+        self.assertEqual(counters["outputs_removed"], 1)
+
+        # a build without listings removes them all
+        manifest = BuildManifest.load(self.manifest_path)
+        generate_pages_recursive(self.content, self.template, self.out, manifest=manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "blog", "feed.xml")))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "tags")))
+
+    def test_bad_front_matter_is_a_page_failure(self):
+        path = os.path.join(self.content, "broken.md")
+        self.write(path, "---\ntitle: x\n# Broken")
+        with self.assertRaises(PageBuildError) as caught:
+            self.build()
+        self.assertEqual([source for source, _ in caught.exception.failures], [path])
+
+    def test_post_without_a_title_is_a_page_failure(self):
+        # reported from the metadata pass, so a shard that does not render
+        # the post still never lists it
+        path = self.post("zz", "", "2024-01-01", "[x]", body="no heading")
+        with self.assertRaises(PageBuildError) as caught:
+            self.build(shard=(1, 3))
+        self.assertEqual(
+            caught.exception.failures,
+            [(path, f"ValueError: {path}: no title: add a title to the front matter or an H1 header")],
+        )
+
+    def test_paginate(self):
+        pages = paginate(list(range(25)), "blog/", per_page=10)
+        self.assertEqual(
+            [(d, len(posts), newer, older) for d, posts, newer, older in pages],
+            [
+                ("blog/", 10, None, "blog/page/2/"),
+                ("blog/page/2/", 10, "blog/", "blog/page/3/"),
+                ("blog/page/3/", 5, "blog/page/2/", None),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
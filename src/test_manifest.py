@@ -0,0 +1,103 @@
+import os
+import unittest
+from unittest import mock
+
+import generate_page
+from generate_page import PageBuildError, generate_pages_recursive
+from manifest import BuildManifest
+from testing import TempDirTestCase
+
+
+class TestIncrementalBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nposts")
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest.load(self.manifest_path)
+        try:
+            generate_pages_recursive(self.content, self.template, self.dest, basepath, manifest=manifest)
+        finally:
+            # saved on failure too, as main.py does
+            manifest.save()
+        return manifest
+
+    def mtimes(self):
+        return {
+            path: os.stat(os.path.join(self.dest, path)).st_mtime_ns
+            for path in ("index.html", os.path.join("blog", "index.html"))
+        }
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        before = self.mtimes()
+        self.build()
+        self.assertEqual(before, self.mtimes())
+
+    def test_changed_page_is_rerendered(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        self.build()
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertIn("changed", f.read())
+
+    def test_deleted_source_removes_outputs(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        manifest = self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertNotIn(os.path.join(self.content, "blog", "index.md"), manifest.data["pages"])
+
+    def test_failed_page_keeps_its_last_output(self):
+        blog = os.path.join(self.content, "blog", "index.md")
+        output = os.path.join(self.dest, "blog", "index.html")
+        self.build()
+
+        # unreadable front matter: the page never reaches the render
+        self.write(blog, "---\ndate: notadate\n---\n# Blog\n\nbroken")
+        with self.assertRaises(PageBuildError):
+            self.build()
+        self.assertTrue(os.path.exists(output))
+
+        # a render failure
+        render_page = generate_page.render_page
+
+        def fail_blog(from_path, *args):
+            if from_path == blog:
+                raise RuntimeError("render failed")
+            return render_page(from_path, *args)
+
+        self.write(blog, "# Blog\n\nfixed")
+        with mock.patch("generate_page.render_page", side_effect=fail_blog):
+            with self.assertRaises(PageBuildError):
+                self.build()
+        self.assertTrue(os.path.exists(output))
+
+        # and the page is retried once it builds again
+        self.build()
+        with open(output, encoding="utf-8") as f:
+            self.assertIn("fixed", f.read())
+
+    def test_template_or_basepath_change_invalidates(self):
+        manifest = self.build()
+        self.assertFalse(manifest.use_settings("pages", **manifest.data["settings"]["pages"]))
+
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertTrue(f.read().startswith("<h1>Home</h1>"))
+
+        manifest = self.build(basepath="/repo/")
+        self.assertEqual(manifest.data["settings"]["pages"]["basepath"], "/repo/")
+
+
+if __name__ == "__main__":
+    unittest.main()
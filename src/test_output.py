@@ -0,0 +1,122 @@
+import errno
+import os
+import unittest
+from unittest import mock
+
+import instrument
+from generate_page import generate_pages_recursive
+from output import link_alias, write_output, write_output_stream
+from testing import TempDirTestCase
+
+
+class TestOutput(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.root, "page.html")
+
+    def test_identical_bytes_are_not_rewritten(self):
+        self.assertTrue(write_output(self.path, b"<p>one</p>"))
+        os.utime(self.path, ns=(1, 1))
+        inode = os.stat(self.path).st_ino
+
+        self.assertFalse(write_output(self.path, b"<p>one</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1)
+
+        self.assertTrue(write_output(self.path, b"<p>two</p>"))
+        # replaced by a rename, not written in place
+        self.assertNotEqual(os.stat(self.path).st_ino, inode)
+        self.assertEqual(os.listdir(self.root), ["page.html"])
+
+    def test_stream(self):
+        def produce(write):
+            for part in ("<p>", "é", "</p>"):
+                write(part)
+
+        self.assertEqual(write_output_stream(self.path, produce), (True, 9))
+        os.utime(self.path, ns=(1, 1))
+        self.assertEqual(write_output_stream(self.path, produce), (False, 9))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1)
+        self.assertEqual(os.listdir(self.root), ["page.html"])
+
+    def test_failed_write_leaves_the_old_file(self):
+        write_output(self.path, b"<p>old</p>")
+
+        def produce(write):
+            write("<p>half")
+            raise RuntimeError("render failed")
+
+        with self.assertRaises(RuntimeError):
+            write_output_stream(self.path, produce)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>old</p>")
+        self.assertEqual(os.listdir(self.root), ["page.html"])
+
+    def test_alias_is_a_hardlink_or_a_redirect(self):
+        target = os.path.join(self.root, "about", "index.html")
+        alias = os.path.join(self.root, "about.html")
+        self.write(target, "<p>about</p>")
+
+        self.assertEqual(link_alias(target, alias), "hardlink")
+        self.assertTrue(os.path.samefile(target, alias))
+        self.assertEqual(link_alias(target, alias), "unchanged")
+
+        os.remove(alias)
+        with mock.patch("os.link", side_effect=OSError(errno.EXDEV, "cross-device link")):
+            self.assertEqual(link_alias(target, alias), "redirect")
+        with open(alias, encoding="utf-8") as f:
+            self.assertIn('<meta http-equiv="refresh" content="0; url=about/">', f.read())
+
+        # a hardlink becomes a redirect without touching the page itself
+        os.remove(alias)
+        link_alias(target, alias)
+        self.assertEqual(link_alias(target, alias, redirect=True), "redirect")
+        self.assertFalse(os.path.samefile(target, alias))
+        self.assertEqual(link_alias(target, alias, redirect=True), "unchanged")
+        with open(target, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "<p>about</p>")
+
+    def test_site_build_skips_unchanged_pages(self):
+        content = os.path.join(self.root, "content")
+        template = os.path.join(self.root, "template.html")
+        out = os.path.join(self.root, "docs")
+        self.write(template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(content, "index.md"), "# Home")
+        self.write(os.path.join(content, "about.md"), "# About")
+
+        tracer = instrument.configure(instrument.SUMMARY)
+        generate_pages_recursive(content, template, out)
+        self.assertEqual((tracer.counters["pages_rendered"], tracer.counters["aliases_hardlink"]), (2, 1))
+        self.assertTrue(os.path.samefile(os.path.join(out, "about", "index.html"), os.path.join(out, "about.html")))
+
+        # without a manifest every page renders again, but nothing is rewritten
+        tracer = instrument.configure(instrument.SUMMARY)
+        generate_pages_recursive(content, template, out)
+        self.assertEqual(tracer.counters["outputs_unchanged"], 2)
+        self.assertEqual(tracer.counters["aliases_unchanged"], 1)
+        self.assertNotIn("bytes_written", tracer.counters)
+
+    def test_pages_with_relative_urls_get_a_redirect_alias(self):
+        content = os.path.join(self.root, "content")
+        template = os.path.join(self.root, "template.html")
+        out = os.path.join(self.root, "docs")
+        self.write(template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(content, "index.md"), "# Home")
+        self.write(os.path.join(content, "about.md"), "# About\n\n[home](/) [#](#top) [x](https://x.org/y)")
+        # tom.png sits next to docs/tom/index.html; from docs/tom.html it would not resolve
+        self.write(os.path.join(content, "tom.md"), "# Tom\n\n![Tom](tom.png)")
+
+        # the serial render loop, then the pipeline's writer over the same output
+        expected = ({"aliases_hardlink": 1, "aliases_redirect": 1}, {"aliases_unchanged": 2})
+        for queue_size, counts in zip((None, 4), expected):
+            with self.subTest(queue_size=queue_size):
+                tracer = instrument.configure(instrument.SUMMARY)
+                generate_pages_recursive(content, template, out, queue_size=queue_size)
+                about = os.path.join(out, "about.html")
+                self.assertTrue(os.path.samefile(os.path.join(out, "about", "index.html"), about))
+                with open(os.path.join(out, "tom.html"), encoding="utf-8") as f:
+                    self.assertIn('<link rel="canonical" href="tom/">', f.read())
+                self.assertEqual({k: v for k, v in tracer.counters.items() if k.startswith("aliases_")}, counts)
+
+
+if __name__ == "__main__":
+    unittest.main()
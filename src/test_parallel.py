@@ -0,0 +1,65 @@
+import os
+import unittest
+
+from generate_page import PageBuildError, generate_pages_recursive
+from manifest import BuildManifest
+from testing import TempDirTestCase, read_tree
+
+
+class TestParallelBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+
+        self.write(self.template, '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        for i in range(12):
+            self.write(
+                os.path.join(self.content, f"post{i}", "index.md"),
+                f"# Post {i}\n\nSee [the index](/) and **bold** text.\n\n- one\n- two",
+            )
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/repo/")
+        generate_pages_recursive(self.content, self.template, parallel, "/repo/", jobs=3)
+        self.assertEqual(read_tree(serial), read_tree(parallel))
+
+    def test_errors_are_reported_per_source(self):
+        broken = os.path.join(self.content, "broken", "index.md")
+        self.write(broken, "no title here")
+
+        with self.assertRaises(PageBuildError) as ctx:
+            generate_pages_recursive(self.content, self.template, os.path.join(self.root, "out"), jobs=3)
+
+        self.assertEqual([path for path, _ in ctx.exception.failures], [broken])
+        self.assertIn(broken, str(ctx.exception))
+
+    def test_serial_build_reports_failures_and_keeps_progress(self):
+        out = os.path.join(self.root, "out")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        generate_pages_recursive(self.content, self.template, out, manifest=manifest, jobs=2)
+
+        # post0 cannot be written: a directory stands where its output goes
+        blocked = os.path.join(self.content, "post0", "index.md")
+        edited = os.path.join(self.content, "post1", "index.md")
+        os.remove(os.path.join(out, "post0", "index.html"))
+        os.makedirs(os.path.join(out, "post0", "index.html"))
+        self.write(blocked, "# Post 0\n\nEdited.")
+        self.write(edited, "# Post 1\n\nEdited.")
+
+        with self.assertRaises(PageBuildError) as ctx:
+            generate_pages_recursive(self.content, self.template, out, manifest=manifest)
+        self.assertEqual([path for path, _ in ctx.exception.failures], [blocked])
+        self.assertTrue(ctx.exception.failures[0][1].startswith("IsADirectoryError: "))
+        # the page that built is recorded, so the next build skips it
+        self.assertEqual(manifest.entry("pages", edited)["outputs"], [os.path.join(out, "post1", "index.html")])
+
+        # only one dirty page: --jobs 2 falls back to the serial loop
+        with self.assertRaises(PageBuildError) as ctx:
+            generate_pages_recursive(self.content, self.template, out, manifest=manifest, jobs=2)
+        self.assertEqual([path for path, _ in ctx.exception.failures], [blocked])
+
+if __name__ == "__main__":
+    unittest.main()
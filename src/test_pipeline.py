@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pipeline
+from generate_page import PageBuildError, generate_pages_recursive
+from testing import TempDirTestCase, read_tree
+
+
+class TestPipelinedBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+
+        self.write(self.template, '<title>{{ Title }}</title><meta content="{{ Description }}">{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome [in](/post0).")
+        for i in range(40):
+            self.write(
+                os.path.join(self.content, f"post{i}", "index.md"),
+                f"# Post {i}\n\nSee [the index](/) and **bold** text.\n\n- one\n- two",
+            )
+
+    def test_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        piped = os.path.join(self.root, "piped")
+        serial_links = generate_pages_recursive(self.content, self.template, serial, "/repo/")
+        piped_links = generate_pages_recursive(self.content, self.template, piped, "/repo/", queue_size=2)
+        self.assertEqual(read_tree(serial), read_tree(piped))
+        self.assertEqual(piped_links.pages, serial_links.pages)
+
+    def test_streamed_pages_go_through_the_pipeline(self):
+        serial = os.path.join(self.root, "serial")
+        piped = os.path.join(self.root, "piped")
+        generate_pages_recursive(self.content, self.template, serial)
+        generate_pages_recursive(self.content, self.template, piped, stream_threshold=0, queue_size=4)
+        self.assertEqual(read_tree(serial), read_tree(piped))
+
+    def test_errors_are_reported_per_source(self):
+        broken = os.path.join(self.content, "broken", "index.md")
+        self.write(broken, "no title here")
+
+        with self.assertRaises(PageBuildError) as ctx:
+            generate_pages_recursive(self.content, self.template, os.path.join(self.root, "out"), queue_size=4)
+
+        self.assertEqual([path for path, _ in ctx.exception.failures], [broken])
+        self.assertTrue(os.path.exists(os.path.join(self.root, "out", "post39", "index.html")))
+
+    def test_reader_is_held_back_by_a_slow_renderer(self):
+        lock = threading.Lock()
+        state = {"read": 0, "rendered": 0, "ahead": 0}
+        read, render = pipeline._read, pipeline._render
+
+        def counting_read(*args):
+            markdown = read(*args)
+            with lock:
+                state["read"] += 1
+                state["ahead"] = max(state["ahead"], state["read"] - state["rendered"])
+            return markdown
+
+        def slow_render(*args):
+            time.sleep(0.002)
+            with lock:
+                state["rendered"] += 1
+            return render(*args)
+
+        with mock.patch.object(pipeline, "_read", counting_read), mock.patch.object(pipeline, "_render", slow_render):
+            generate_pages_recursive(self.content, self.template, os.path.join(self.root, "out"), queue_size=2)
+
+        self.assertEqual(state["rendered"], 41)
+        # the queue, the reads in flight and the page being rendered
+        self.assertLessEqual(state["ahead"], 2 + pipeline.IO_THREADS + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
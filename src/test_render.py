@@ -0,0 +1,148 @@
+import unittest
+
+import images
+from blocks import scan_blocks
+from converter import RENDERERS, markdown_to_html_node, write_markdown_html
+from htmlnode import ParentNode, RawNode
+from render_cache import RenderCache
+
+# the blocks and inline texts of test_textnode.py, plus escaping cases,
+# with the HTML every renderer backend must produce for them
+CONFORMANCE_CASES = [
+    # code
+    ("```\nprint('hi')\n```", "<pre><code>print('hi')</code></pre>"),
+    ("```\n# not a heading inside code\n```", "<pre><code># not a heading inside code</code></pre>"),
+    (
+        "```\n- not a list inside code\n1. not ordered inside code\n```",
+        "<pre><code>- not a list inside code\n1. not ordered inside code</code></pre>",
+    ),
+    # headings
+    ("# Title", "<h1>Title</h1>"),
+    ("###### Title", "<h6>Title</h6>"),
+    ("####### Too many", "<p>####### Too many</p>"),
+    ("###NoSpace", "<p>###NoSpace</p>"),
+    ("###", "<p>###</p>"),
+    # quotes
+    ("> hello", "<blockquote>hello</blockquote>"),
+    ("> hello\n> there\n> friend", "<blockquote>hello\nthere\nfriend</blockquote>"),
+    ("> good\nbad", "<p>&gt; good\nbad</p>"),
+    # lists
+    ("- one", "<ul><li>one</li></ul>"),
+    ("- one\n- two\n- three", "<ul><li>one</li><li>two</li><li>three</li></ul>"),
+    ("- one\ntwo", "<p>- one\ntwo</p>"),
+    ("1. one", "<ol><li>one</li></ol>"),
+    ("1. one\n2. two\n3. three", "<ol><li>one</li><li>two</li><li>three</li></ol>"),
+    ("2. two\n3. three", "<p>2. two\n3. three</p>"),
+    ("1. one\n3. three", "<p>1. one\n3. three</p>"),
+    ("1.one\n2. two", "<p>1.one\n2. two</p>"),
+    ("1. one\n2. two\n- three", "<p>1. one\n2. two\n- three</p>"),
+    # paragraphs
+    ("This is just a normal paragraph.", "<p>This is just a normal paragraph.</p>"),
+    ("This is a paragraph\nthat spans multiple lines", "<p>This is a paragraph\nthat spans multiple lines</p>"),
+    # whole documents
+    (
+        "# Title\n\nSome **text**\nmore\n\n\n- a\n- b\n\n1. x\n2. y\n\n> q",
+        "<h1>Title</h1><p>Some <b>text</b>\nmore</p><ul><li>a</li><li>b</li></ul>"
+        "<ol><li>x</li><li>y</li></ol><blockquote>q</blockquote>",
+    ),
+    (
+        "intro\n\n```python\ndef f():\n\n    return 1\n```\n\nafter",
+        "<p>intro</p><pre><code>def f():\n\n    return 1</code></pre><p>after</p>",
+    ),
+    ("```x``` text\n\nnext", "<p><code></code><code>x</code><code></code> text</p><p>next</p>"),
+    # inline markup
+    (
+        "This is **text** with an _italic_ word and a `code block` and an "
+        "![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+        '<p>This is <b>text</b> with an <i>italic</i> word and a <code>code block</code> and an '
+        '<img src="https://i.imgur.com/fJRm4Vk.jpeg" alt="obi wan image"> and a <a href="https://boot.dev">link</a></p>',
+    ),
+    ("**a**[b](c)", '<p><b>a</b><a href="c">b</a></p>'),
+    ("[wiki](https://x.org/some_page_name)", '<p><a href="https://x.org/some_page_name">wiki</a></p>'),
+    (
+        "a **b** c _d_ e `f` ![g](h.png) i [j](k) l [m](n) o",
+        '<p>a <b>b</b> c <i>d</i> e <code>f</code> <img src="h.png" alt="g"> i <a href="k">j</a> l <a href="n">m</a> o</p>',
+    ),
+    ("![a](b) [a](b)", '<p><img src="b" alt="a"> <a href="b">a</a></p>'),
+    # escaping
+    ("[< Back Home](/)", '<p><a href="/">&lt; Back Home</a></p>'),
+    (
+        'a <b> & **"c"** `<i>` ![x "y"](/q?a=1&b=2) [<z>](/r?s="t")',
+        '<p>a &lt;b&gt; &amp; <b>"c"</b> <code>&lt;i&gt;</code> <img src="/q?a=1&amp;b=2" alt="x &quot;y&quot;"> '
+        '<a href="/r?s=&quot;t&quot;">&lt;z&gt;</a></p>',
+    ),
+    ("```\nif a < b && c > d:\n```", "<pre><code>if a &lt; b &amp;&amp; c &gt; d:</code></pre>"),
+    # an unclosed fence runs to the end of the document, so it stays last
+    ("# T\n\n```\ncode\n", "<h1>T</h1><pre><code>code</code></pre>"),
+]
+
+
+class RendererConformance:
+    # run against every backend by the subclasses below
+    backend = None
+
+    def setUp(self):
+        self.renderer = RENDERERS[self.backend]
+
+    def tearDown(self):
+        images.configure({})
+
+    def render(self, markdown, basepath="/", cache=None, links=None):
+        return markdown_to_html_node(markdown, basepath, cache, links, self.renderer).to_html()
+
+    def test_cases(self):
+        for markdown, expected in CONFORMANCE_CASES:
+            with self.subTest(markdown):
+                self.assertEqual(self.render(markdown), f"<div>{expected}</div>")
+
+    def test_streamed_and_cached_output_match(self):
+        markdown = "\n\n".join(markdown for markdown, _ in CONFORMANCE_CASES)
+        expected = "<div>" + "".join(html for _, html in CONFORMANCE_CASES) + "</div>"
+        parts = []
+        # lines as a file yields them, without the "" after the final newline
+        write_markdown_html(markdown.splitlines(True), parts.append, renderer=self.renderer)
+        self.assertEqual("".join(parts), expected)
+        cache = RenderCache()
+        self.assertEqual(self.render(markdown, cache=cache), expected)
+        self.assertEqual(self.render(markdown, cache=cache), expected)
+
+    def test_basepath_and_measured_images(self):
+        images.configure({"/images/tom.png": (40, 20, [("/images/tom-10w.png", 10)])})
+        self.assertEqual(
+            self.render("[home](/) ![Tom](/images/tom.png) [x](//cdn.org/x)", "/site/"),
+            '<div><p><a href="/site/">home</a> <img src="/site/images/tom.png" alt="Tom" width="40" height="20" '
+            'srcset="/site/images/tom-10w.png 10w, /site/images/tom.png 40w"> <a href="//cdn.org/x">x</a></p></div>',
+        )
+
+    def test_links_are_collected_with_line_numbers(self):
+        links = []
+        self.render("# [T](/t)\n\nsee\n[a](/a) and\n![b](/b.png)\n\n- x\n- [c](/c)\n\n```\n[no](/no)\n```", links=links)
+        self.assertEqual(links, [(1, "link", "/t"), (4, "link", "/a"), (5, "image", "/b.png"), (8, "link", "/c")])
+
+
+class TestTreeRenderer(RendererConformance, unittest.TestCase):
+    backend = "tree"
+
+    def test_blocks_are_node_trees(self):
+        block = next(scan_blocks(["- a", "- **b**"]))
+        node = self.renderer.block_node(block)
+        self.assertIsInstance(node, ParentNode)
+        self.assertEqual([child.tag for child in node.children[1].children], ["b"])
+
+
+class TestDirectRenderer(RendererConformance, unittest.TestCase):
+    backend = "direct"
+
+    def test_blocks_are_raw_html(self):
+        block = next(scan_blocks(["- a", "- **b**"]))
+        self.assertIsInstance(self.renderer.block_node(block), RawNode)
+
+
+class TestBackends(unittest.TestCase):
+    def test_every_backend_runs_the_conformance_suite(self):
+        tested = {cls.backend for cls in RendererConformance.__subclasses__()}
+        self.assertEqual(tested, set(RENDERERS))
+
+
+if __name__ == "__main__":
+    unittest.main()
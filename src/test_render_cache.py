@@ -0,0 +1,65 @@
+import os
+import unittest
+
+from blocks import scan_blocks
+from converter import markdown_to_html_node
+from render_cache import RenderCache
+from testing import TempDirTestCase
+
+MARKDOWN = (
+    "# Title\n\n"
+    "A shared disclaimer paragraph that is long enough to be worth caching, with a [link](/about).\n\n"
+    "- first list item that is also fairly long\n- second item with **bold** text"
+)
+
+
+class TestRenderCache(TempDirTestCase):
+    def test_cached_render_matches_uncached(self):
+        cache = RenderCache()
+        expected = markdown_to_html_node(MARKDOWN, "/repo/").to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, "/repo/", cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, "/repo/", cache).to_html(), expected)
+        self.assertEqual(cache.stats["misses"], 2)
+        self.assertEqual(cache.stats["hits"], 2)
+        self.assertEqual(cache.hit_rate(), 0.5)
+
+    def test_key_depends_on_basepath_and_text(self):
+        block = next(scan_blocks(["some paragraph"]))
+        other = next(scan_blocks(["some paragraph!"]))
+        self.assertNotEqual(RenderCache.key(block, "/"), RenderCache.key(block, "/repo/"))
+        self.assertNotEqual(RenderCache.key(block, "/"), RenderCache.key(other, "/"))
+
+    def test_memory_lru_eviction(self):
+        cache = RenderCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertEqual(list(cache.memory), ["a", "c"])
+        self.assertEqual(cache.stats["evictions"], 1)
+
+        cache = RenderCache(max_memory_bytes=5)
+        cache.put("a", "123")
+        cache.put("b", "456")
+        self.assertEqual(list(cache.memory), ["b"])
+
+    def test_disk_store_survives_new_process_cache(self):
+        RenderCache(self.root).put("ab12", "<p>x</p>")
+        cache = RenderCache(self.root)
+        self.assertEqual(cache.get("ab12"), "<p>x</p>")
+        self.assertEqual(cache.stats["disk_hits"], 1)
+        self.assertEqual(cache.get("ab12"), "<p>x</p>")
+        self.assertEqual(cache.stats["hits"], 1)
+
+    def test_prune_disk_drops_oldest(self):
+        cache = RenderCache(self.root, max_disk_bytes=10)
+        cache.put("aa01", "x" * 8)
+        cache.put("bb02", "y" * 8)
+        os.utime(cache._disk_path("aa01"), ns=(1, 1))
+        cache.prune_disk()
+        self.assertFalse(os.path.exists(cache._disk_path("aa01")))
+        self.assertTrue(os.path.exists(cache._disk_path("bb02")))
+
+
+if __name__ == "__main__":
+    unittest.main()
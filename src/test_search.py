@@ -0,0 +1,93 @@
+import os
+import unittest
+from unittest import mock
+
+import instrument
+import search
+from blocks import scan_blocks
+from search import SEARCH_INDEX_NAME, SearchIndex, block_words, build_search_index, page_document
+from testing import TempDirTestCase, write_file
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.out = os.path.join(self.root, "docs")
+        os.makedirs(self.out)
+        self.pages = {}
+        self.write("index.md", "# Home\n\nWelcome to the **Shire**.", "/")
+        self.write("blog/tom/index.md", "# Tom\n\nTom Bombadil is a merry fellow.\n\n- bright blue jacket", "/blog/tom/")
+
+    def write(self, rel, text, page_dir=None):
+        path = write_file(os.path.join(self.content, rel), text)
+        if page_dir is not None:
+            self.pages[path] = page_dir
+        return path
+
+    def build(self):
+        tracer = instrument.configure(instrument.SUMMARY)
+        index = build_search_index(self.pages, self.out, "/site/")
+        return index, tracer.counters
+
+    def test_words_follow_the_rendered_text(self):
+        markdown = (
+            "## Second _level_\n\n"
+            "> quoted [link text](/x) and ![alt words](/a.png)\n\n"
+            "1. first step\n2. Second step\n\n"
+            "```\nprint(hello)\n```"
+        )
+        words = [word for block in scan_blocks(markdown.split("\n")) for word in block_words(block)]
+        self.assertEqual(
+            words,
+            ["second", "level", "quoted", "link", "text", "and", "alt", "words",
+             "first", "step", "second", "step", "print", "hello"],
+        )
+
+    def test_page_document(self):
+        path = self.write("post.md", "Intro line.\n\n# The Title\n\nthe end")
+        title, terms, words = page_document(path)
+        self.assertEqual(title, "The Title")
+        self.assertEqual(terms["the"], [2, 4])
+        self.assertEqual(words, 6)
+
+        # the front matter's title wins over the first H1, and the source is
+        # read once
+        path = self.write("fm.md", "---\ntitle: From Front Matter\n---\n# Heading\n\nbody")
+        with mock.patch("search.skip_front_matter", wraps=search.skip_front_matter) as skip:
+            title, terms, words = page_document(path)
+        self.assertEqual(skip.call_count, 1)
+        self.assertEqual((title, sorted(terms), words), ("From Front Matter", ["body", "heading"], 2))
+
+    def test_build_and_search(self):
+        index, counters = self.build()
+        self.assertEqual(counters, {"search_pages_indexed": 2})
+        self.assertEqual(index.search("Tom"), [("/site/blog/tom/", "Tom")])
+        self.assertEqual(index.search("shire welcome"), [("/site/", "Home")])
+        self.assertEqual(index.search("tom shire"), [])
+
+        loaded = SearchIndex.load(os.path.join(self.out, SEARCH_INDEX_NAME))
+        self.assertEqual(loaded.to_json(), index.to_json())
+        self.assertEqual(loaded.docs["/site/blog/tom/"]["terms"]["tom"], [0, 1])
+
+    def test_incremental_update(self):
+        self.build()
+        path = os.path.join(self.out, SEARCH_INDEX_NAME)
+        mtime = os.stat(path).st_mtime_ns
+
+        index, counters = self.build()
+        self.assertEqual(counters, {"search_pages_unchanged": 2})
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+        self.write("index.md", "# Home\n\nWelcome to Bree.")
+        self.write("about.md", "# About\n\nAbout Bree.", "/about/")
+        del self.pages[os.path.join(self.content, "blog", "tom", "index.md")]
+        index, counters = self.build()
+        self.assertEqual(counters, {"search_pages_indexed": 2})
+        self.assertEqual(index.search("bree"), [("/site/", "Home"), ("/site/about/", "About")])
+        self.assertEqual(index.search("shire"), [])
+        self.assertEqual(index.search("tom"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
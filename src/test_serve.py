@@ -0,0 +1,45 @@
+import os
+import unittest
+
+from serve import OutputStore, diff_snapshots, snapshot
+from testing import TempDirTestCase, write_file
+
+
+class TestOutputStore(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("index.html", "<p>home</p>")
+        self.write("blog/tom/index.html", "<p>tom</p>")
+
+    def write(self, rel, text):
+        return write_file(os.path.join(self.root, rel), text)
+
+    def test_lookup_resolves_directories(self):
+        store = OutputStore(self.root)
+        store.refresh()
+        self.assertEqual(store.lookup("/")[0], "index.html")
+        self.assertEqual(store.lookup("/blog/tom")[0], "blog/tom/index.html")
+        self.assertEqual(store.lookup("/blog/tom/")[0], "blog/tom/index.html")
+        self.assertIsNone(store.lookup("/missing"))
+
+    def test_refresh_reports_changed_and_removed(self):
+        store = OutputStore(self.root)
+        store.refresh()
+        etag = store.lookup("/")[1][2]
+
+        path = self.write("index.html", "<p>home, edited</p>")
+        os.utime(path, ns=(1, 1))
+        os.remove(os.path.join(self.root, "blog", "tom", "index.html"))
+
+        self.assertEqual(sorted(store.refresh()), ["blog/tom/index.html", "index.html"])
+        self.assertNotEqual(store.lookup("/")[1][2], etag)
+        self.assertEqual(store.refresh(), [])
+
+    def test_snapshot_diff(self):
+        before = snapshot([self.root])
+        added = self.write("new.html", "x")
+        self.assertEqual(diff_snapshots(before, snapshot([self.root])), {added})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import unittest
+
+from generate_page import generate_pages_recursive, page_shard
+from manifest import BuildManifest
+from shard import SHARD_INFO_NAME, ShardMergeError, merge_shards, parse_shard, write_shard_info
+from testing import TempDirTestCase, read_tree
+
+
+class TestShards(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.out = os.path.join(self.root, "docs")
+
+        self.write(self.template, "<title>{{ Title }}</title>{{ Nav }}{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[first post](/blog/p0)")
+        for i in range(12):
+            self.write(os.path.join(self.content, "blog", f"p{i}", "index.md"), f"# Post {i}\n\n[home](/)")
+
+    def build_shard(self, index, count):
+        out = os.path.join(self.root, "shards", f"{index}-of-{count}")
+        manifest = BuildManifest(os.path.join(self.root, f"manifest-{index}.json"))
+        link_index = generate_pages_recursive(
+            self.content, self.template, out, manifest=manifest, shard=(index, count)
+        )
+        self.write(os.path.join(out, "index.css"), "body {}")
+        write_shard_info(out, (index, count), "/", link_index, manifest)
+        return out
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "2", "a/b"):
+            with self.subTest(text), self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_partition_is_stable_and_covers_every_page(self):
+        sources = [os.path.join(self.content, "blog", f"p{i}", "index.md") for i in range(12)]
+        shards = [page_shard(source, self.content, 3) for source in sources]
+        self.assertEqual(shards, [page_shard(source, self.content, 3) for source in sources])
+        self.assertTrue(set(shards) <= {1, 2, 3})
+        self.assertGreater(len(set(shards)), 1)
+        # the same relative path lands on the same shard whatever the checkout location
+        moved = os.path.join(self.root, "elsewhere")
+        self.assertEqual(shards[0], page_shard(os.path.join(moved, "blog", "p0", "index.md"), moved, 3))
+
+    def test_shards_merge_into_the_unsharded_site(self):
+        generate_pages_recursive(self.content, self.template, os.path.join(self.root, "whole"))
+        dirs = [self.build_shard(i, 3) for i in (1, 2, 3)]
+
+        rendered = []
+        for d in dirs:
+            with open(os.path.join(d, SHARD_INFO_NAME), encoding="utf-8") as f:
+                rendered.append(json.load(f)["pages"])
+        self.assertEqual(sum(map(len, rendered)), 13)
+
+        link_index = merge_shards(dirs, self.out)
+        self.assertEqual(len(link_index.pages), 13)
+        self.assertEqual(len(link_index), 13)
+        merged = read_tree(self.out)
+        for rel, data in read_tree(os.path.join(self.root, "whole")).items():
+            self.assertEqual(data, merged.get(rel), rel)
+
+    def test_collisions_are_reported(self):
+        dirs = [self.build_shard(i, 2) for i in (1, 2)]
+        self.write(os.path.join(dirs[1], "index.css"), "body { color: red }")
+        # the home page belongs to one shard; a stray copy turns up in the other
+        owner = page_shard(os.path.join(self.content, "index.md"), self.content, 2)
+        self.write(os.path.join(dirs[2 - owner], "index.html"), "<p>stray</p>")
+
+        with self.assertRaises(ShardMergeError) as caught:
+            merge_shards(dirs, self.out)
+        self.assertEqual(
+            sorted(caught.exception.problems),
+            [
+                "index.css: differs between shard 1 and shard 2",
+                f"index.html: page of shard {owner} also written by shard {3 - owner}",
+            ],
+        )
+        self.assertFalse(os.path.exists(self.out))
+
+    def test_incomplete_shard_set(self):
+        dirs = [self.build_shard(i, 3) for i in (1, 3)]
+        with self.assertRaises(ShardMergeError) as caught:
+            merge_shards(dirs, self.out)
+        self.assertEqual(caught.exception.problems, ["missing shard(s): 2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
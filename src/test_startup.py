@@ -0,0 +1,52 @@
+import importlib
+import os
+import subprocess
+import sys
+import unittest
+
+from bench_startup import DEFERRED_MODULES, STARTUP_BUDGET, import_profile
+from testing import TempDirTestCase
+
+
+class TestStartup(unittest.TestCase):
+    def test_optional_stages_load_lazily(self):
+        loaded = set(import_profile("main")["modules"])
+        self.assertEqual([m for m in DEFERRED_MODULES if m in loaded], [])
+
+    def test_import_within_budget(self):
+        # best of three, so one slow run on a busy machine does not fail it
+        seconds = min(import_profile("main")["seconds"] for _ in range(3))
+        self.assertLess(seconds, STARTUP_BUDGET)
+
+    def test_cli_defaults_match_the_stages(self):
+        import compress
+        import main
+        import pipeline
+
+        self.assertEqual(main.QUEUE_SIZE, pipeline.QUEUE_SIZE)
+        self.assertEqual(main.COMPRESS_LEVEL, compress.COMPRESS_LEVEL)
+        self.assertEqual(main.COMPRESS_MIN_SIZE, compress.COMPRESS_MIN_SIZE)
+
+    def test_public_names_exist(self):
+        for name in ("textnode", "htmlnode", "blocks", "extract", "delimiter", "inline", "converter", "generate_page"):
+            module = importlib.import_module(name)
+            with self.subTest(name):
+                self.assertEqual([n for n in module.__all__ if not hasattr(module, n)], [])
+
+
+class TestCommandLine(TempDirTestCase):
+    def test_page_failures_exit_without_a_traceback(self):
+        self.write(os.path.join(self.root, "template.html"), "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.root, "static", "index.css"), "body {}")
+        self.write(os.path.join(self.root, "content", "index.md"), "# Home")
+        self.write(os.path.join(self.root, "content", "broken.md"), "no heading")
+        main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        result = subprocess.run([sys.executable, main, "-q"], cwd=self.root, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertTrue(result.stderr.startswith("error: 1 page(s) failed to build:\n"), result.stderr)
+        self.assertIn("broken.md: ValueError: ", result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
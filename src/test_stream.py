@@ -0,0 +1,86 @@
+import os
+import tracemalloc
+import unittest
+from unittest import mock
+
+from generate_page import generate_page, scan_page_head
+from template import CompiledTemplate
+from testing import TempDirTestCase
+
+
+class TestStreamingRender(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write(
+            os.path.join(self.root, "template.html"),
+            '<title>{{ Title }}</title><meta content="{{ Description }}">{{ Content }}',
+        )
+
+    def write_source(self, name, sections):
+        path = os.path.join(self.root, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("```\n# not the title\n```\n\nIntro with a [link](/x).\n\n# Real Title\n\n")
+            for i in range(sections):
+                f.write(f"## Part {i}\n\nParagraph {i} with **bold** and `code`.\n\n- a {i}\n- b {i}\n\n")
+        return path
+
+    def render(self, source, threshold):
+        dest = os.path.join(self.root, f"out-{threshold}", "index.html")
+        generate_page(source, self.template, dest, "/repo/", stream_threshold=threshold)
+        with open(dest, encoding="utf-8") as f:
+            return f.read()
+
+    def test_streamed_output_matches_in_memory(self):
+        source = self.write_source("page.md", 50)
+        streamed = self.render(source, 0)
+        self.assertEqual(streamed, self.render(source, None))
+        self.assertTrue(streamed.startswith('<title>Real Title</title><meta content="Intro with a link.">'))
+
+    def test_small_pages_are_written_as_a_stream_too(self):
+        # a source below the threshold is parsed whole, but its page is
+        # never joined into one string before writing
+        source = self.write_source("page.md", 5)
+        with mock.patch.object(CompiledTemplate, "render", side_effect=AssertionError("page built as a string")):
+            self.assertIn("<h2>Part 4</h2>", self.render(source, None))
+
+    def test_date_and_tags_from_front_matter(self):
+        self.write(self.template, "<title>{{ Title }}</title><time>{{ Date }}</time><p>{{ Tags }}</p>{{ Content }}")
+        source = self.write(
+            os.path.join(self.root, "post.md"),
+            "---\ntitle: Tom\ndate: 2024-03-01\ntags: [Tolkien, <b>, characters]\n---\n# Tom\n",
+        )
+        expected = "<title>Tom</title><time>2024-03-01</time><p>&lt;b&gt;, characters, tolkien</p>"
+        self.assertTrue(self.render(source, None).startswith(expected))
+        self.assertTrue(self.render(source, 0).startswith(expected))
+
+        # a page without front matter leaves both slots empty
+        source = self.write_source("page.md", 1)
+        self.assertTrue(self.render(source, 0).startswith("<title>Real Title</title><time></time><p></p>"))
+
+    def test_title_from_first_h1_block(self):
+        lines = ["```", "# comment", "```", "", "# Title", "", "text"]
+        self.assertEqual(scan_page_head(lines), ("Title", ""))
+        with self.assertRaises(Exception):
+            scan_page_head(["no heading"])
+
+    def peak_memory(self, sections):
+        source = self.write_source(f"big-{sections}.md", sections)
+        dest = os.path.join(self.root, "big.html")
+        # an untraced first run absorbs one-off growth of interpreter tables
+        generate_page(source, self.template, dest, stream_threshold=0)
+        tracemalloc.start()
+        try:
+            generate_page(source, self.template, dest, stream_threshold=0)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_stays_bounded(self):
+        small = self.peak_memory(1_000)
+        large = self.peak_memory(8_000)
+        # 8x the input must not mean more than a little extra peak memory
+        self.assertLess(large, small * 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import unittest
+
+from generate_page import build_nav, generate_page
+from template import compile_template, load_template, resolve_template
+from testing import TempDirTestCase
+
+
+class TestTemplate(TempDirTestCase):
+    def test_compile_splits_literals_and_slots(self):
+        template = compile_template("<title>{{ Title }}</title>{{Content}}!")
+        self.assertEqual(template.chunks, ["<title>", "</title>", "!"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(template.render({"Title": "T", "Content": "C"}), "<title>T</title>C!")
+
+    def test_unknown_and_callable_slots(self):
+        template = compile_template("[{{ Date }}]{{ Content }}")
+        self.assertEqual(template.render({"Content": lambda write: write("streamed")}), "[]streamed")
+
+    def test_basepath_rewritten_in_template_only(self):
+        path = os.path.join(self.root, "template.html")
+        self.write(path, '<link href="/index.css">{{ Content }}')
+        md = os.path.join(self.root, "page.md")
+        self.write(md, '# T\n\n[post](/blog/a)\n\n```\n<a href="/raw">\n```')
+        dest = os.path.join(self.root, "out", "index.html")
+
+        generate_page(md, path, dest, "/repo/")
+
+        with open(dest, encoding="utf-8") as f:
+            html = f.read()
+        self.assertIn('<link href="/repo/index.css">', html)
+        self.assertIn('<a href="/repo/blog/a">post</a>', html)
+        self.assertIn('&lt;a href="/raw"&gt;', html)
+
+    def test_nav_is_escaped(self):
+        content = os.path.join(self.root, "content")
+        pages = [(os.path.join(content, "index.md"), []), (os.path.join(content, 'q&a-"x"', "index.md"), [])]
+        self.assertEqual(
+            build_nav(pages, content, "/site/"),
+            '<nav><ul><li><a href="/site/">Home</a></li>'
+            '<li><a href="/site/q&amp;a-&quot;x&quot;">Q&amp;A "X"</a></li></ul></nav>',
+        )
+
+    def test_load_template_recompiles_on_change(self):
+        path = os.path.join(self.root, "template.html")
+        self.write(path, "a{{ Content }}")
+        first = load_template(path)
+        self.assertIs(first, load_template(path))
+
+        self.write(path, "bb{{ Content }}")
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(load_template(path).chunks, ["bb", ""])
+
+    def test_partials(self):
+        path = os.path.join(self.root, "template.html")
+        head = os.path.join(self.root, "parts", "head.html")
+        nav = os.path.join(self.root, "parts", "nav.html")
+        self.write(path, '{{> parts/head.html }}<main>{{ Content }}</main>')
+        self.write(head, '<head><link href="/index.css"></head>{{>nav.html}}')
+        self.write(nav, "<nav>{{ Nav }}</nav>")
+
+        template = load_template(path, "/repo/")
+        self.assertEqual(template.partials, (head, nav))
+        self.assertEqual(template.slots, ["Nav", "Content"])
+        self.assertEqual(
+            template.render({"Nav": "N", "Content": "C"}),
+            '<head><link href="/repo/index.css"></head><nav>N</nav><main>C</main>',
+        )
+
+        # editing a partial alone recompiles the template
+        self.write(nav, "<nav>{{ Nav }}</nav><hr>")
+        os.utime(nav, ns=(0, 0))
+        self.assertTrue(load_template(path, "/repo/").render({}).endswith("<hr><main></main>"))
+
+    def test_partial_cycle(self):
+        path = os.path.join(self.root, "template.html")
+        self.write(path, "{{> a.html }}")
+        self.write(os.path.join(self.root, "a.html"), "{{> template.html }}")
+        with self.assertRaises(ValueError):
+            load_template(path)
+
+    def test_resolve_section_template(self):
+        content = os.path.join(self.root, "content")
+        default = os.path.join(self.root, "template.html")
+        section = os.path.join(content, "blog", "template.html")
+        self.write(section, "{{ Content }}")
+
+        post = os.path.join(content, "blog", "post", "index.md")
+        page = os.path.join(content, "contact", "index.md")
+        self.assertEqual(resolve_template(post, content, default), section)
+        self.assertEqual(resolve_template(page, content, default), default)
+
+
+if __name__ == "__main__":
+    unittest.main()
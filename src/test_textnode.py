@@ -101,5 +101,96 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
 
+class TestScanBlocks(unittest.TestCase):
+    def test_blocks_types_and_line_numbers(self):
+        markdown = "# Title\n\nSome **text**\nmore\n\n\n- a\n- b\n\n1. x\n2. y\n\n> q"
+        blocks = list(scan_blocks(markdown.split("\n")))
+        self.assertEqual(
+            [(b.block_type, b.lineno) for b in blocks],
+            [
+                (BlockType.HEADING, 1),
+                (BlockType.PARAGRAPH, 3),
+                (BlockType.UNORDERED_LIST, 7),
+                (BlockType.ORDERED_LIST, 10),
+                (BlockType.QUOTE, 13),
+            ],
+        )
+        self.assertEqual(blocks[1].lines, ["Some **text**", "more"])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        markdown = "intro\n\n```python\ndef f():\n\n    return 1\n```\n\nafter"
+        blocks = list(scan_blocks(markdown.split("\n")))
+        self.assertEqual([b.block_type for b in blocks], [BlockType.PARAGRAPH, BlockType.CODE, BlockType.PARAGRAPH])
+        self.assertEqual(blocks[1].lines, ["```python", "def f():", "", "    return 1", "```"])
+        self.assertEqual(
+            markdown_to_html_node(markdown).to_html(),
+            "<div><p>intro</p><pre><code>def f():\n\n    return 1</code></pre><p>after</p></div>",
+        )
+
+    def test_inline_triple_backticks_are_not_a_fence(self):
+        blocks = list(scan_blocks(["```x``` text", "", "next"]))
+        self.assertEqual([b.block_type for b in blocks], [BlockType.PARAGRAPH, BlockType.PARAGRAPH])
+
+    def test_reads_file_lines(self):
+        lines = ["# T\r\n", "\r\n", "body\n"]
+        self.assertEqual([b.lines for b in scan_blocks(lines)], [["# T"], ["body"]])
+
+    def test_markdown_to_blocks_compat(self):
+        markdown = "  para one\nline  \n\n\n- a\n- b\n"
+        self.assertEqual(markdown_to_blocks(markdown), ["para one\nline", "- a\n- b"])
+
+
+class TestTextToTextNodes(unittest.TestCase):
+    def test_all_inline_types(self):
+        text = (
+            "This is **text** with an _italic_ word and a `code block` and an "
+            "![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        )
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("This is ", TextType.TEXT),
+                TextNode("text", TextType.BOLD),
+                TextNode(" with an ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                TextNode(" word and a ", TextType.TEXT),
+                TextNode("code block", TextType.CODE),
+                TextNode(" and an ", TextType.TEXT),
+                TextNode("obi wan image", TextType.IMAGES, "https://i.imgur.com/fJRm4Vk.jpeg"),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINKS, "https://boot.dev"),
+            ],
+        )
+
+    def test_no_empty_text_nodes_at_edges(self):
+        self.assertEqual(
+            text_to_textnodes("**a**[b](c)"),
+            [TextNode("a", TextType.BOLD), TextNode("b", TextType.LINKS, "c")],
+        )
+
+    def test_underscores_inside_urls_are_not_italic(self):
+        self.assertEqual(
+            text_to_textnodes("[wiki](https://x.org/some_page_name)"),
+            [TextNode("wiki", TextType.LINKS, "https://x.org/some_page_name")],
+        )
+
+    def test_matches_split_passes_on_plain_markup(self):
+        text = "a **b** c _d_ e `f` ![g](h.png) i [j](k) l [m](n) o"
+        nodes = [TextNode(text, TextType.TEXT)]
+        nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+        nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+        nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        nodes = split_nodes_image(nodes)
+        nodes = split_nodes_link(nodes)
+        self.assertEqual(text_to_textnodes(text), [n for n in nodes if n.text])
+
+    def test_link_splitter_ignores_image_with_same_markup(self):
+        nodes = split_nodes_link([TextNode("![a](b) [a](b)", TextType.TEXT)])
+        self.assertEqual(
+            nodes,
+            [TextNode("![a](b) ", TextType.TEXT), TextNode("a", TextType.LINKS, "b")],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+import images
+import instrument
+
+__all__ = ["TempDirTestCase", "write_file", "read_tree"]
+
+
+def write_file(path: str, text: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def read_tree(root: str) -> dict[str, bytes]:
+    # every file below root, by relative path, for comparing two outputs
+    tree = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                tree[os.path.relpath(path, root)] = f.read()
+    return tree
+
+
+class TempDirTestCase(unittest.TestCase):
+    # A fresh temporary directory per test, as self.root. It is removed after
+    # the test, and the tracer and image table a test configured are reset.
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(images.configure, {})
+        self.addCleanup(instrument.configure, instrument.QUIET)
+
+    def write(self, path: str, text: str) -> str:
+        return write_file(path, text)
@@ -1,5 +1,7 @@
 from enum import Enum
 
+__all__ = ["TextType", "TextNode"]
+
 class TextType(Enum):
     TEXT = "text"
     BOLD = "bold"
@@ -9,6 +11,8 @@ class TextType(Enum):
     IMAGES = "images"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type